@@ -5,8 +5,49 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import allure
 
-@pytest.fixture(scope="module")
-def browser():
+from utils.stub_server import StubServer
+
+pytest_plugins = ["utils.sharding", "utils.throttle", "utils.soak", "utils.benchmarks", "utils.auth",
+                  "utils.impact", "utils.events", "utils.warmup",
+                  "utils.snapshots", "utils.profiler"]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("qa_portfolio", "Настройки тестового фреймворка")
+    group.addoption("--fuzz-payloads", type=int, default=2000,
+                    help="Количество тел запросов в fuzz-тестах POST/PUT /users")
+    group.addoption("--fuzz-workers", type=int, default=16,
+                    help="Количество параллельных потоков fuzz-тестов")
+    group.addoption("--dataset-size", type=int, default=200_000,
+                    help="Размер синтетического набора пользователей для тестов фильтрации на объеме")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "fuzz: генеративные fuzz-тесты против локального стенда")
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    """Локальная замена JSONPlaceholder (лояльная, как оригинал)."""
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def strict_stub_server():
+    """Локальный стенд со строгой валидацией тел POST/PUT и экранированием ответов."""
+    with StubServer(strict=True) as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def large_stub_server(request):
+    """Локальный стенд с синтетическим набором пользователей и индексами фильтров."""
+    with StubServer(dataset_size=request.config.getoption("--dataset-size")) as server:
+        yield server
+
+
+def chrome_driver():
     # Настройки для headless режима
     chrome_options = Options()
     chrome_options.add_argument("--headless")  # Запуск без GUI
@@ -19,6 +60,17 @@ def browser():
     service = ChromeService(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
     driver.implicitly_wait(10)
+    return driver
+
+
+@pytest.fixture(scope="module")
+def browser(request):
+    daemon = request.config.pluginmanager.get_plugin("warm-daemon")
+    if daemon is not None:
+        # Под utils.daemon браузер запускается один раз и живет между прогонами
+        yield daemon.browser(chrome_driver)
+        return
+    driver = chrome_driver()
     yield driver
     driver.quit() # Закрываем браузер после всех тестов в модуле
 
@@ -1,12 +1,20 @@
 # tests/api/test_api_example.py
+import os
 import requests
 import pytest
 from jsonschema import validate
+import statistics
 import time
 
-BASE_URL = "https://jsonplaceholder.typicode.com"
+from utils.auth import bearer, make_invalid_token
+from utils.pagination import iter_pages
+from utils.schemas import USER_SCHEMA
+from utils.warmup import cold_session
 
-def test_get_user_by_id():
+# Адрес API можно переопределить, например на локальный стенд: python -m utils.stub_server
+BASE_URL = os.environ.get("BASE_URL", "https://jsonplaceholder.typicode.com")
+
+def test_get_user_by_id(snapshot):
     """Проверка получения данных пользователя по ID (позитивный тест)."""
 
     user_id = 1
@@ -24,6 +32,9 @@ def test_get_user_by_id():
     # 3. Проверка заголовков
     assert response.headers['Content-Type'] == 'application/json; charset=utf-8'
 
+    # 4. Полное тело ответа совпадает с эталонным снимком
+    snapshot.assert_match(data)
+
 def test_get_nonexistent_user():
     """Проверка несуществующего пользователя (негативный тест)."""
 
@@ -303,46 +314,8 @@ def test_search_users_by_name():
 def test_users_schema_validation():
     """Проверка валидации схемы данных пользователей с использованием JSON Schema."""
     
-    # Определяем ожидаемую схему для пользователя
-    user_schema = {
-        "type": "object",
-        "properties": {
-            "id": {"type": "integer"},
-            "name": {"type": "string"},
-            "username": {"type": "string"},
-            "email": {"type": "string"},
-            "address": {
-                "type": "object",
-                "properties": {
-                    "street": {"type": "string"},
-                    "suite": {"type": "string"},
-                    "city": {"type": "string"},
-                    "zipcode": {"type": "string"},
-                    "geo": {
-                        "type": "object",
-                        "properties": {
-                            "lat": {"type": "string"},
-                            "lng": {"type": "string"}
-                        },
-                        "required": ["lat", "lng"]
-                    }
-                },
-                "required": ["street", "suite", "city", "zipcode", "geo"]
-            },
-            "phone": {"type": "string"},
-            "website": {"type": "string"},
-            "company": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string"},
-                    "catchPhrase": {"type": "string"},
-                    "bs": {"type": "string"}
-                },
-                "required": ["name", "catchPhrase", "bs"]
-            }
-        },
-        "required": ["id", "name", "username", "email", "address", "phone", "website", "company"]
-    }
+    # Ожидаемая схема пользователя
+    user_schema = USER_SCHEMA
 
     # Выполняем GET-запрос для получения всех пользователей
     response = requests.get(f"{BASE_URL}/users")
@@ -418,33 +391,65 @@ def test_response_data_types():
     assert isinstance(company["name"], str), f"Поле 'company.name' должно быть строкой, получено: {type(company['name'])}"
 
 
-def test_response_time():
-    """Проверка времени отклика API."""
+def test_response_time(perf_benchmark):
+    """Проверка времени отклика API: холодный и теплый запрос отдельно."""
     
     # Устанавливаем порог времени отклика в 1 секунду
     max_response_time = 1.0  # секунды
-    
-    # Замеряем время до выполнения запроса
-    start_time = time.time()
-    
-    # Выполняем GET-запрос для получения пользователя
     user_id = 1
-    response = requests.get(f"{BASE_URL}/users/{user_id}")
-    
-    # Замеряем время после выполнения запроса
-    end_time = time.time()
-    
-    # Рассчитываем время отклика
-    response_time = end_time - start_time
-    
-    # 1. Проверка статуса: должен быть 200 OK
-    assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
-    
-    # 2. Проверка времени отклика: должно быть меньше порога
+
+    # Сравнение с историей требует не меньше 5 замеров за запуск, поэтому каждый вид запроса повторяем
+    samples = 5
+    cold_times, warm_times = [], []
+    for _ in range(samples):
+        # Холодный запрос: разрешение имени, TCP- и TLS-рукопожатие входят в замер
+        with cold_session() as session:
+            start_time = time.time()
+            cold_response = session.get(f"{BASE_URL}/users/{user_id}")
+            cold_times.append(time.time() - start_time)
+
+        # Теплый запрос: при --dns-cache-ttl/--prewarm-connections имя и соединение уже готовы
+        start_time = time.time()
+        response = requests.get(f"{BASE_URL}/users/{user_id}")
+        warm_times.append(time.time() - start_time)
+
+        # 1. Проверка статуса: должен быть 200 OK
+        assert cold_response.status_code == 200, f"Ожидался статус 200, получен {cold_response.status_code}"
+        assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+
+    # 2. Проверка времени отклика: медиана должна быть меньше порога
+    response_time = statistics.median(warm_times)
+    cold_time = statistics.median(cold_times)
     assert response_time < max_response_time, f"Время отклика {response_time} секунд превышает порог {max_response_time} секунд"
+    assert cold_time < max_response_time, f"Время холодного отклика {cold_time} секунд превышает порог {max_response_time} секунд"
     
     # 3. Выводим время отклика для информирования
-    print(f"\nВремя отклика: {response_time:.4f} секунд")
+    print(f"\nВремя отклика (медиана {samples} замеров): холодное {cold_time:.4f} с, теплое {response_time:.4f} с")
+
+    # 4. Сохраняем замеры в историю производительности раздельно
+    for cold_value, warm_value in zip(cold_times, warm_times):
+        perf_benchmark.record("get_user_response_time_cold", cold_value)
+        perf_benchmark.record("get_user_response_time_warm", warm_value)
+
+
+def test_response_time_distribution(perf_benchmark):
+    """Серия замеров времени отклика для контроля регрессий производительности."""
+
+    # Одиночный замер зашумлен, поэтому собираем выборку из нескольких запросов
+    samples = 20
+    session = requests.Session()
+    user_id = 1
+
+    # 1. Прогревочный запрос: устанавливаем соединение, чтобы не учитывать его в выборке
+    assert session.get(f"{BASE_URL}/users/{user_id}").status_code == 200
+
+    # 2. Замеряем серию запросов по уже открытому соединению
+    for _ in range(samples):
+        response = perf_benchmark.measure("get_user_keepalive", session.get, f"{BASE_URL}/users/{user_id}")
+        assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+
+    # 3. Сравнение с историей выполняется после теста, результат прикладывается к Allure
+    print(f"\nЗамеров в выборке: {len(perf_benchmark.samples['get_user_keepalive'])}")
 
 
 def test_rate_limiting():
@@ -571,13 +576,10 @@ def test_unauthorized_access():
 def test_invalid_token():
     """Проверка попытки доступа с невалидным токеном."""
     
-    # Подготовим невалидный токен для проверки
-    invalid_token = "Bearer invalid_token_12345"
-    
     # Создаем заголовки с невалидным токеном аутентификации
     headers_with_invalid_token = {
         "Content-Type": "application/json",
-        "Authorization": invalid_token
+        **bearer(make_invalid_token())
     }
     
     # Выполняем GET-запрос к гипотетическому защищенному ресурсу с невалидным токеном
@@ -782,7 +784,7 @@ def test_multiple_user_ids(user_id, expected_name):
     print(f"Пользователь с ID {user_id} и именем '{expected_name}' успешно проверен")
 
 
-def test_get_all_users():
+def test_get_all_users(snapshot):
     """Тест для проверки работы с массивами данных: получение списка всех пользователей.
     
     Проверяет:
@@ -859,6 +861,10 @@ def test_get_all_users():
     unique_ids = set(user_ids)
     assert len(unique_ids) == len(users_list), f"Найдены дубликаты ID среди пользователей: {len(user_ids) - len(unique_ids)} дубликатов"
     
+    # 8. Список сверяется со снимком полностью: изменчивых полей у пользователей нет,
+    #    а снимок фиксирует и длину списка — 10 пользователей
+    snapshot.assert_match(users_list)
+
     print(f"Получено {len(users_list)} пользователей. Все пользователи имеют корректную структуру и обязательные поля.")
 
 
@@ -945,4 +951,17 @@ def test_content_encoding():
     assert "id" in json_data, "Ответ должен содержать поле id"
     assert json_data["id"] == user_id, f"ID в ответе должен совпадать с запрошенным, ожидается {user_id}, получено {json_data['id']}"
     
-    print(f"Сжатие данных проверено. Тело ответа корректно обработано.")
\ No newline at end of file
+    print(f"Сжатие данных проверено. Тело ответа корректно обработано.")
+
+def test_paginated_users_match_full_list():
+    """Постраничное чтение /users с упреждающей загрузкой совпадает с полным списком."""
+
+    # 1. Полный список одним запросом
+    response = requests.get(f"{BASE_URL}/users")
+    assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+
+    # 2. Тот же список страницами по 3 записи, следующие страницы загружаются параллельно
+    paged = list(iter_pages(f"{BASE_URL}/users", limit=3, prefetch=2))
+
+    # 3. Записи не теряются и не повторяются, порядок сохраняется
+    assert paged == response.json(), "Постраничная выдача отличается от полного списка"
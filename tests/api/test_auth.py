@@ -0,0 +1,119 @@
+# tests/api/test_auth.py
+import os
+import stat
+import threading
+import time
+
+import pytest
+import requests
+
+from utils.auth import TokenProvider, bearer
+from utils.stub_server import StubServer
+
+TOKEN_TTL = 2.0
+
+
+@pytest.fixture(scope="module")
+def auth_server():
+    """Локальный стенд, выдающий короткоживущие токены."""
+    with StubServer(auth_ttl=TOKEN_TTL, auth_users={"tester": "secret"}) as server:
+        yield server
+
+
+@pytest.fixture
+def provider(auth_server, tmp_path):
+    provider = TokenProvider(f"{auth_server.url}/login", "tester", "secret",
+                             cache_path=str(tmp_path / "token.json"), refresh_margin=0.5)
+    yield provider
+    provider.stop()
+
+
+def test_authorized_and_negative_tokens(auth_server, provider):
+    """Действующий токен дает доступ, отсутствующий, поддельный и истекший — 401."""
+
+    url = f"{auth_server.url}/users/1"
+
+    # 1. С действующим токеном доступ разрешен
+    response = requests.get(url, headers=provider.headers())
+    assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+
+    # 2. Без токена — 401 Unauthorized
+    assert requests.get(url).status_code == 401
+
+    # 3. С поддельным токеном — 401 Unauthorized
+    response = requests.get(url, headers=bearer(provider.invalid_token()))
+    assert response.status_code == 401
+    assert response.json()["error"] == "Недействительный токен"
+
+    # 4. С истекшим токеном — 401 с сообщением об истечении срока
+    response = requests.get(url, headers=bearer(provider.expired_token()))
+    assert response.status_code == 401
+    assert response.json()["error"] == "Срок действия токена истек"
+
+
+def test_token_shared_between_workers(auth_server, tmp_path):
+    """Воркеры с общим кэшем выполняют вход один раз."""
+
+    cache_path = str(tmp_path / "shared.json")
+    login_calls_before = auth_server.httpd.auth.login_calls
+    workers = [
+        TokenProvider(f"{auth_server.url}/login", "tester", "secret", cache_path=cache_path)
+        for _ in range(8)
+    ]
+
+    # 1. Все воркеры одновременно запрашивают токен
+    tokens = []
+    threads = [threading.Thread(target=lambda w=worker: tokens.append(w.token())) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 2. Токен один, а сервер увидел ровно один вход
+    assert len(set(tokens)) == 1, f"Воркеры получили разные токены: {len(set(tokens))}"
+    assert auth_server.httpd.auth.login_calls - login_calls_before == 1
+
+
+def test_token_refreshed_before_expiry(auth_server, provider):
+    """Фоновое обновление не дает тестам получить 401 после истечения первого токена."""
+
+    provider.start()
+    first_token = provider.token()
+    statuses = []
+
+    # 1. Отправляем запросы дольше, чем живут два токена подряд
+    deadline = time.monotonic() + TOKEN_TTL * 2
+    while time.monotonic() < deadline:
+        statuses.append(requests.get(f"{auth_server.url}/users/1", headers=provider.headers()).status_code)
+        time.sleep(0.05)
+
+    # 2. Ни одного отказа, а токен успел смениться
+    assert set(statuses) == {200}, f"Получены статусы: {sorted(set(statuses))}"
+    assert provider.token() != first_token, "Токен не был обновлен"
+    assert provider.login_calls >= 2
+
+
+def test_token_cache_readable_only_by_owner(provider):
+    """Файл кэша с живым токеном создается с правами 0600, даже если уже существовал."""
+
+    with open(provider.cache_path, "w", encoding="utf-8"):
+        pass
+    os.chmod(provider.cache_path, 0o644)
+
+    provider.token()
+
+    assert stat.S_IMODE(os.stat(provider.cache_path).st_mode) == 0o600
+
+
+def test_expired_token_skips_long_lived_token(tmp_path):
+    """Если сервер игнорирует expires_in, тест пропускается, а не ждет истечения токена."""
+
+    server = StubServer(auth_ttl=3600, auth_users={"tester": "secret"})
+    server.httpd.auth.login = lambda payload, issue=server.httpd.auth.login: issue(
+        {key: value for key, value in payload.items() if key != "expires_in"})
+    with server:
+        provider = TokenProvider(f"{server.url}/login", "tester", "secret", cache_path=str(tmp_path / "long.json"))
+        start = time.monotonic()
+        with pytest.raises(pytest.skip.Exception, match="3600"):
+            provider.expired_token()
+    assert time.monotonic() - start < 5
@@ -0,0 +1,78 @@
+# tests/api/test_fuzz_users.py
+import pytest
+
+from utils.fuzzing import FuzzCase, FuzzEngine, PayloadGenerator, shrink_candidates
+from utils.schemas import VALID_USER
+
+pytestmark = pytest.mark.fuzz
+
+
+def test_fuzz_create_and_update_lenient(stub_server, request):
+    """Fuzz POST/PUT /users против лояльного стенда с допущениями JSONPlaceholder."""
+
+    payloads = request.config.getoption("--fuzz-payloads")
+    workers = request.config.getoption("--fuzz-workers")
+
+    # 1. Генерируем и параллельно отправляем некорректные тела запросов
+    engine = FuzzEngine(stub_server.url, workers=workers)
+    report = engine.run(PayloadGenerator(seed=1).cases(payloads))
+    print(f"\n{report.summary()}")
+
+    # 2. Все тела должны быть отправлены, сервер не должен падать
+    assert report.total == payloads, f"Отправлено {report.total} из {payloads} тел запросов"
+    assert not report.failures, f"Найдены ошибки:\n{report.summary()}"
+
+
+def test_fuzz_create_and_update_strict(strict_stub_server, request):
+    """Fuzz POST/PUT /users: строгий сервер отклоняет невалидное и экранирует XSS."""
+
+    payloads = request.config.getoption("--fuzz-payloads")
+    workers = request.config.getoption("--fuzz-workers")
+
+    engine = FuzzEngine(strict_stub_server.url, strict=True, workers=workers)
+    report = engine.run(PayloadGenerator(seed=2).cases(payloads))
+    print(f"\n{report.summary()}")
+
+    assert not report.failures, f"Найдены ошибки:\n{report.summary()}"
+
+
+def test_fuzz_detects_and_shrinks_unescaped_markup(stub_server):
+    """Строгий оракул против лояльного стенда находит отраженный XSS и сжимает пример."""
+
+    # 1. Лояльный стенд, как и JSONPlaceholder, возвращает разметку как есть
+    engine = FuzzEngine(stub_server.url, strict=True, workers=4)
+    payload = {**VALID_USER, "name": "<script>alert('XSS')</script>"}
+    report = engine.run([FuzzCase("POST", "/users", payload)])
+
+    # 2. Ошибка должна быть найдена
+    assert "reflected_markup" in report.failures, f"XSS не обнаружен:\n{report.summary()}"
+
+    # 3. Минимальный пример короче исходного и все еще содержит разметку в name
+    minimal = report.failures["reflected_markup"].minimal.payload
+    assert len(str(minimal)) < len(str(payload)), f"Пример не сжат: {minimal}"
+    assert minimal["name"].startswith("<s"), f"Из примера пропала разметка: {minimal}"
+
+
+def test_payload_generator_is_deterministic():
+    """Один и тот же seed дает одинаковую последовательность тел запросов."""
+
+    first = [case.payload for case in PayloadGenerator(seed=7).cases(50)]
+    second = [case.payload for case in PayloadGenerator(seed=7).cases(50)]
+    assert first == second, "Генератор с одинаковым seed выдал разные тела запросов"
+
+    # Каждое тело содержит хотя бы одну мутацию
+    assert all(case.mutations for case in PayloadGenerator(seed=7).cases(50))
+
+
+def test_shrink_candidates_simplify_value():
+    """Кандидаты на упрощение всегда отличаются от исходного значения."""
+
+    value = {"name": "abcdef", "address": {"city": "x" * 10}, "age": 5}
+    candidates = list(shrink_candidates(value))
+    assert candidates, "Для непустого значения нет кандидатов на упрощение"
+    for candidate in candidates:
+        assert candidate != value, f"Кандидат совпадает с исходным значением: {candidate}"
+
+    # Минимальные значения упростить уже нельзя
+    for minimal in ("", 0, None, {}, []):
+        assert list(shrink_candidates(minimal)) == [], f"Значение {minimal!r} не должно упрощаться"
@@ -0,0 +1,65 @@
+# tests/api/test_large_dataset.py
+import time
+
+import requests
+
+from utils.pagination import iter_pages
+
+
+def get_users(server, **params):
+    response = requests.get(f"{server.url}/users", params=params)
+    assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+    return response
+
+
+def test_seed_queries_at_scale(large_stub_server):
+    """Фильтры из test_api_example на большом наборе находят тех же пользователей."""
+
+    # 1. Равенство по username и name обслуживается индексами
+    assert [user["id"] for user in get_users(large_stub_server, username="Bret").json()] == [1]
+    assert [user["id"] for user in get_users(large_stub_server, name="Leanne Graham").json()] == [1]
+
+    # 2. Равенство чувствительно к регистру, как в JSONPlaceholder
+    assert get_users(large_stub_server, username="bret").json() == []
+
+
+def test_indexed_prefix_matches_full_scan(large_stub_server):
+    """Префикс по индексу дает тот же результат, что и перебор, и намного быстрее."""
+
+    # ^(...) не сводится к префиксу и заставляет стенд перебрать все записи
+    start = time.perf_counter()
+    indexed = get_users(large_stub_server, name_like="^ava ab", _limit=1000)
+    indexed_time = time.perf_counter() - start
+    start = time.perf_counter()
+    scanned = get_users(large_stub_server, name_like="^(ava ab)", _limit=1000)
+    scan_time = time.perf_counter() - start
+
+    print(f"\nПрефикс по индексу {indexed_time * 1000:.1f} мс, перебор {scan_time * 1000:.0f} мс")
+    assert indexed.headers["X-Total-Count"] == scanned.headers["X-Total-Count"]
+    assert indexed.json() == scanned.json()
+    assert all(user["name"].startswith("Ava Ab") for user in indexed.json())
+    assert indexed_time * 10 < scan_time, "Индексированный фильтр должен быть на порядок быстрее перебора"
+
+
+def test_pagination_headers(large_stub_server):
+    """_page и _limit режут выдачу, X-Total-Count сообщает размер всего набора."""
+
+    response = get_users(large_stub_server, _page=3, _limit=50)
+    users = response.json()
+
+    assert int(response.headers["X-Total-Count"]) == large_stub_server.store.count
+    assert [user["id"] for user in users] == list(range(101, 151))
+
+
+def test_prefetch_iterator_reads_every_page(large_stub_server):
+    """Итератор с упреждающей загрузкой выдает все записи фильтра по порядку и без повторов."""
+
+    params = {"address.city": "Upton"}
+    total = int(get_users(large_stub_server, _limit=1, **params).headers["X-Total-Count"])
+
+    users = list(iter_pages(f"{large_stub_server.url}/users", params, limit=250, prefetch=4))
+    ids = [user["id"] for user in users]
+
+    assert len(users) == total > 250, f"Прочитано {len(users)} из {total}"
+    assert ids == sorted(set(ids)), "Записи идут по порядку и без повторов"
+    assert all(user["address"]["city"] == "Upton" for user in users)
@@ -0,0 +1,49 @@
+# tests/framework/conftest.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+class PytestProcess:
+    """Запуск pytest отдельным процессом во временном проекте с плагинами фреймворка.
+
+    Каталог проекта — tmp_path теста, он же rootdir; пакет utils импортируется
+    из корня репозитория через PYTHONPATH.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.env = {**os.environ, "PYTHONPATH": str(ROOT)}
+
+    def write(self, source, name="test_target.py"):
+        path = self.path / name
+        path.write_text(source, encoding="utf-8")
+        return path
+
+    def run_module(self, module, *args, env=None, timeout=120):
+        """python -m module args в каталоге проекта; возвращает (код возврата, вывод)."""
+
+        result = subprocess.run(
+            [sys.executable, "-m", module, *args],
+            cwd=self.path, capture_output=True, text=True, timeout=timeout, env={**self.env, **(env or {})}
+        )
+        return result.returncode, result.stdout + result.stderr
+
+    def run(self, *args, plugins=(), env=None, timeout=120):
+        """pytest -q с плагинами plugins (например, "utils.events") и без кэша."""
+
+        options = [option for plugin in plugins for option in ("-p", plugin)]
+        return self.run_module("pytest", "-q", *options, "-p", "no:cacheprovider", "--rootdir", str(self.path),
+                               *args, env=env, timeout=timeout)
+
+
+@pytest.fixture
+def isolated_pytest(tmp_path):
+    """Запускает pytest отдельным процессом в tmp_path (см. PytestProcess)."""
+
+    return PytestProcess(tmp_path)
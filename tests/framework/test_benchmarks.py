@@ -0,0 +1,110 @@
+# tests/framework/test_benchmarks.py
+import random
+
+import pytest
+
+from utils.benchmarks import HistoryStore, compare, mann_whitney_greater, sparkline, trend_html
+
+
+def noisy_samples(rng, median, count, noise=0.15):
+    """Времена отклика с логнормальным шумом вокруг медианы."""
+
+    return [median * rng.lognormvariate(0, noise) for _ in range(count)]
+
+
+def noisy_runs(rng, median, runs, count, noise=0.15, run_noise=0.10):
+    """Запуски, у каждого из которых свой сдвиг медианы (нагрузка агента, сеть)."""
+
+    return [noisy_samples(rng, median * rng.lognormvariate(0, run_noise), count, noise) for _ in range(runs)]
+
+
+def test_noise_does_not_cause_regressions():
+    """Запуски из одного распределения почти никогда не признаются регрессией."""
+
+    rng = random.Random(42)
+    false_positives = 0
+    for _ in range(300):
+        baseline = noisy_runs(rng, 0.050, runs=10, count=20)
+        current = noisy_runs(rng, 0.050, runs=1, count=20)[0]
+        if compare("noise", current, baseline).regression:
+            false_positives += 1
+
+    assert false_positives <= 3, f"Ложных срабатываний: {false_positives} из 300"
+
+
+def test_significant_slowdown_is_regression():
+    """Рост медианы на 40% при той же дисперсии признается регрессией."""
+
+    rng = random.Random(1)
+    baseline = noisy_runs(rng, 0.050, runs=10, count=20, run_noise=0.03)
+    current = noisy_samples(rng, 0.070, 20)
+
+    comparison = compare("slow", current, baseline)
+
+    assert comparison.regression, comparison.describe()
+    assert comparison.change > 0.3
+    assert comparison.cliffs_delta > 0.5
+
+
+def test_small_significant_change_is_not_regression():
+    """Статистически значимый, но небольшой рост (3%) сборку не роняет."""
+
+    rng = random.Random(2)
+    baseline = noisy_runs(rng, 0.050, runs=10, count=200, noise=0.02, run_noise=0.0)
+    current = noisy_samples(rng, 0.0515, 500, noise=0.02)
+
+    comparison = compare("tiny", current, baseline)
+
+    assert comparison.p_value < 0.01, "Для проверки нужен значимый сдвиг"
+    assert not comparison.regression, comparison.describe()
+
+
+def test_too_few_runs_is_not_regression():
+    """Пока в истории мало запусков, даже сильный рост не роняет сборку."""
+
+    rng = random.Random(3)
+    baseline = noisy_runs(rng, 0.050, runs=2, count=20, run_noise=0.0)
+    current = noisy_samples(rng, 0.080, 20)
+
+    comparison = compare("young", current, baseline)
+
+    assert comparison.change > 0.3
+    assert not comparison.regression, comparison.describe()
+
+
+def test_mann_whitney_ties_and_direction():
+    """U-критерий учитывает совпадающие значения и направление сдвига."""
+
+    u, p_value = mann_whitney_greater([1, 1, 1], [1, 1, 1])
+    assert u == pytest.approx(4.5)
+    assert p_value == 1.0
+
+    _, p_faster = mann_whitney_greater([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    _, p_slower = mann_whitney_greater([6, 7, 8, 9, 10], [1, 2, 3, 4, 5])
+    assert p_faster > 0.9
+    assert p_slower < 0.01
+
+
+def test_history_store_baseline_window(tmp_path):
+    """В baseline попадают только последние запуски окна, без текущего."""
+
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    runs = []
+    for index in range(5):
+        run_id = store.start_run(f"build-{index}")
+        store.add_samples(run_id, "get_user", [index + 0.1, index + 0.2])
+        runs.append(run_id)
+
+    assert store.baseline("get_user", runs[-1], window=2) == [[2.1, 2.2], [3.1, 3.2]]
+    assert [median for _, median in store.trend("get_user", runs[-1], window=2)] == [
+        pytest.approx(2.15), pytest.approx(3.15), pytest.approx(4.15)
+    ]
+    store.close()
+
+
+def test_trend_report():
+    """Тренд выводится спарклайном и HTML-линией."""
+
+    assert sparkline([1, 2, 3, 4]) == "▁▃▅█"
+    report = trend_html("get_user", [(1, 0.05), (2, 0.06)], None)
+    assert "<polyline" in report and "#2" in report
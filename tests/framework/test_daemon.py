@@ -0,0 +1,182 @@
+# tests/framework/test_daemon.py
+import os
+import shlex
+import subprocess
+import sys
+import time
+import types
+
+import pytest
+
+import utils.daemon
+from utils.daemon import ModuleWatcher, WarmResources, benchmark, request, split_command, wait_ready
+
+TARGET_TESTS = """
+import os
+
+VALUE = os.environ.get("DAEMON_VALUE", "")
+
+def test_value_read_at_import():
+    assert VALUE == os.environ.get("DAEMON_VALUE", "")
+
+def test_answer():
+    assert 42 == 42
+"""
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.visited = []
+        self.quit_calls = 0
+
+    def delete_all_cookies(self):
+        if not self.alive:
+            raise ConnectionError("браузер закрыт")
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def test_warm_browser_is_reused_and_relaunched():
+    """Браузер демона переживает модули, а упавший запускается заново."""
+
+    resources = WarmResources()
+    launched = []
+
+    def factory():
+        launched.append(FakeDriver())
+        return launched[-1]
+
+    first = resources.browser(factory)
+    assert resources.browser(factory) is first and first.visited == ["about:blank"]
+
+    first.alive = False
+    second = resources.browser(factory)
+    assert second is not first and len(launched) == 2 and first.quit_calls == 1
+
+    resources.quit_browser()
+    assert second.quit_calls == 1 and resources.driver is None
+
+
+def test_module_watcher_detects_changes(tmp_path, monkeypatch):
+    """Изменение файла загруженного модуля проекта выгружает модули проекта."""
+
+    (tmp_path / "watched_module.py").write_text("VALUE = 1\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import watched_module  # noqa: F401
+
+    watcher = ModuleWatcher(tmp_path)
+    watcher.snapshot()
+    assert watcher.changed() == []
+
+    path = tmp_path / "watched_module.py"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert watcher.changed() == ["watched_module.py"]
+    assert watcher.unload() == ["watched_module"]
+    assert "watched_module" not in sys.modules
+
+
+def test_unload_restores_patched_requests_send(tmp_path, monkeypatch):
+    """Перед выгрузкой http_hooks возвращает оригинальный send, чтобы обертки не накапливались."""
+
+    path = tmp_path / "utils" / "http_hooks.py"
+    path.parent.mkdir()
+    path.write_text("", encoding="utf-8")
+    calls = []
+    hooks = types.ModuleType("utils.http_hooks")
+    hooks.__file__ = str(path)
+    hooks.uninstall = lambda: calls.append("uninstall")
+    monkeypatch.setitem(sys.modules, "utils.http_hooks", hooks)
+
+    assert ModuleWatcher(tmp_path).unload() == ["utils.http_hooks"]
+    assert calls == ["uninstall"] and "utils.http_hooks" not in sys.modules
+
+
+def test_command_line_split_at_subcommand(monkeypatch):
+    """run и bench определяются по первому позиционному аргументу, а не по слову run где угодно."""
+
+    assert split_command(["--socket", "run", "run", "-k", "run", "tests"]) == (
+        ["--socket", "run", "run"], ["-k", "run", "tests"])
+    assert split_command(["bench", "--repeat", "2", "--", "-k", "run"]) == (
+        ["bench", "--repeat", "2"], ["-k", "run"])
+    assert split_command(["serve", "--preload", "run"]) == (["serve", "--preload", "run"], [])
+
+    calls = []
+    monkeypatch.setattr(utils.daemon, "benchmark", lambda selection, repeat, serve_args: calls.append(
+        (selection, repeat, serve_args)))
+    monkeypatch.setattr(utils.daemon, "benchmark_report", lambda result: "")
+    utils.daemon.main(["bench", "-k", "run", "tests/api/test_auth.py"])
+    assert calls == [(["-k", "run", "tests/api/test_auth.py"], 3, ["--preload", "tests/api/test_auth.py"])]
+
+
+@pytest.fixture
+def daemon(isolated_pytest, tmp_path):
+    isolated_pytest.write(TARGET_TESTS)
+    socket_path = str(tmp_path / "daemon.sock")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "utils.daemon", "--socket", socket_path, "serve",
+         "--preload", f"test_target.py -p no:cacheprovider --rootdir {tmp_path}",
+         "--prewarm-connections", "0", "--dns-cache-ttl", "0"],
+        cwd=tmp_path, env=isolated_pytest.env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    try:
+        wait_ready(socket_path, process=process)
+        yield socket_path
+    finally:
+        if process.poll() is None:
+            list(request(socket_path, {"command": "stop"}))
+        process.wait(timeout=30)
+
+
+def run_client(isolated_pytest, socket_path, **env):
+    return isolated_pytest.run_module("utils.daemon", "--socket", socket_path, "run", "-q", "-p", "no:cacheprovider",
+                                      "--rootdir", str(isolated_pytest.path), "test_target.py", env=env, timeout=60)
+
+
+def test_runs_stream_results_and_reload_changed_modules(isolated_pytest, tmp_path, daemon):
+    """Демон выполняет прогоны, перезагружает измененный тест и подхватывает новое окружение."""
+
+    socket_path = daemon
+
+    code, output = run_client(isolated_pytest, socket_path)
+    assert code == 0 and "2 passed" in output, output
+    assert "перезагружено" not in output
+
+    target = isolated_pytest.write(TARGET_TESTS.replace("42 == 42", "41 == 42"))
+    stat = target.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    code, output = run_client(isolated_pytest, socket_path)
+    assert code == 1 and "изменены test_target.py" in output and "1 failed, 1 passed" in output, output
+
+    # Значение, прочитанное при импорте модуля, обновляется вместе с окружением
+    code, output = run_client(isolated_pytest, socket_path, DAEMON_VALUE="warm")
+    assert "изменилось окружение: DAEMON_VALUE" in output and "1 failed, 1 passed" in output, output
+
+    events = list(request(socket_path, {"command": "run", "cwd": str(tmp_path),
+                                        "env": {**isolated_pytest.env, "DAEMON_VALUE": "warm"},
+                                        "args": ["-q", "-p", "no:cacheprovider", "--rootdir", str(tmp_path),
+                                                 "test_target.py::test_answer"]}))
+    results = [event for event in events if event["event"] == "result"]
+    assert [(event["nodeid"], event["outcome"]) for event in results] == [("test_target.py::test_answer", "failed")]
+    assert events[-1]["event"] == "exit" and events[-1]["code"] == 1 and not events[-1]["reloaded"]
+
+
+def test_warm_first_result_is_faster_than_cold(isolated_pytest, tmp_path):
+    """Бенчмарк: время до первого результата у демона меньше, чем у нового процесса pytest."""
+
+    target = isolated_pytest.write(TARGET_TESTS)
+    selection = [str(target), "-p", "no:cacheprovider", "--rootdir", str(tmp_path)]
+
+    start = time.perf_counter()
+    result = benchmark(selection, repeat=1, path=str(tmp_path / "bench.sock"),
+                       serve_args=["--preload", shlex.join(selection), "--prewarm-connections", "0"])
+    print(f"\nхолодный: {result['cold']['first_result']:.2f} с, теплый: {result['warm']['first_result']:.2f} с "
+          f"(бенчмарк {time.perf_counter() - start:.1f} с)")
+
+    assert result["cold"]["codes"] == result["warm"]["codes"] == [0]
+    assert result["warm"]["first_result"] < result["cold"]["first_result"]
@@ -0,0 +1,135 @@
+# tests/framework/test_dataset.py
+import threading
+
+import pytest
+
+import utils.pagination
+from utils.dataset import SyntheticUsers, benchmark, fields, literal_prefix
+from utils.pagination import iter_pages
+from utils.stub_server import compile_filters, default_users, page_bounds
+
+
+@pytest.fixture(scope="module")
+def store():
+    return SyntheticUsers(5000)
+
+
+def scan(store, params):
+    matcher = compile_filters(params)
+    return [user for user in map(store.get, range(1, store.count + 1)) if matcher(user)]
+
+
+def test_literal_prefix():
+    """Индекс используется только для шаблонов, равносильных префиксу."""
+
+    assert literal_prefix("^Leanne") == "Leanne"
+    assert literal_prefix("^Ava\\.Ab") == "Ava.Ab"
+    assert literal_prefix("^Ava.Ab") is None
+    assert literal_prefix("Leanne") is None
+    assert literal_prefix("^\\d") is None
+
+
+def test_seed_users_are_preserved(store):
+    """Первые 10 пользователей совпадают со стандартным набором стенда."""
+
+    assert [store.get(user_id) for user_id in range(1, 11)] == default_users()
+    assert store.get(0) is None and store.get(store.count + 1) is None
+
+
+@pytest.mark.parametrize("params", [
+    {"username": ["Bret"]},
+    {"username": ["bret"]},
+    {"name": ["Ava Abbott", "Leanne Graham"]},
+    {"name_like": ["^ava ab"]},
+    {"username_like": ["^Ava\\.Ab", "^Omar"]},
+    {"address.city": ["Upton"], "name_like": ["^Ida"]},
+    {"address.city": ["Upton"], "email_like": ["users\\.test$"]},
+    {"email_like": ["^ida\\."]},
+])
+def test_indexes_match_full_scan(store, params):
+    """Поиск по индексам и смешанный поиск дают тот же результат, что и перебор."""
+
+    expected = scan(store, params)
+    users, total = store.search(params)
+
+    assert users == expected and total == len(expected)
+    assert store.search(params, 3, 5) == (expected[3:8], len(expected))
+
+
+def test_page_bounds():
+    """Параметры пагинации json-server переводятся в смещение и размер страницы."""
+
+    params = {"_page": ["3"], "_limit": ["20"], "username": ["Bret"]}
+    assert page_bounds(params) == (40, 20)
+    assert params == {"username": ["Bret"]}
+    assert page_bounds({"_page": ["2"]}) == (10, 10)
+    assert page_bounds({"_start": ["5"], "_limit": ["2"]}) == (5, 2)
+    assert page_bounds({"username": ["Bret"]}) is None
+
+
+class FakePageResponse:
+    def __init__(self, page, limit, total):
+        self.headers = {"X-Total-Count": str(total)}
+        self.records = list(range((page - 1) * limit, min(page * limit, total)))
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.records
+
+
+class FakePageSession:
+    """Сессия, которая отдает страницы без сети и запоминает запрошенные номера."""
+
+    def __init__(self, total=10):
+        self.total = total
+        self.requested = []
+        self.window = threading.Semaphore(0)
+        self.closed = False
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, params, timeout):
+        self.requested.append(params["_page"])
+        if params["_page"] > 1:
+            self.window.release()
+        return FakePageResponse(params["_page"], params["_limit"], self.total)
+
+    def close(self):
+        self.closed = True
+
+
+def test_pages_prefetched_while_first_page_is_consumed(monkeypatch):
+    """Следующие страницы загружаются, пока вызывающий обрабатывает первую; своя сессия закрывается."""
+
+    session = FakePageSession()
+    monkeypatch.setattr(utils.pagination.requests, "Session", lambda: session)
+    pages = iter_pages("http://host/users", limit=2, prefetch=2)
+
+    assert next(pages) == 0
+    for _ in range(2):
+        assert session.window.acquire(timeout=5), "Пока обрабатывалась первая страница, окно загрузки не заполнилось"
+    assert sorted(session.requested) == [1, 2, 3]
+
+    assert list(pages) == list(range(1, 10))
+    assert session.closed
+
+
+def test_throughput_by_dataset_size():
+    """Индексированные фильтры не зависят от размера набора так, как полный перебор."""
+
+    results = [benchmark(size, lookups=500) for size in (10_000, 100_000)]
+    for result in results:
+        print(f"\n{result['size']:>7}: индексы {result['build_s']:.2f} с, "
+              f"username= {result['username_eq_qps']:.0f} зап/с, name= {result['name_eq_page_qps']:.0f} зап/с, "
+              f"префикс {result['username_prefix_page_qps']:.0f} зап/с, "
+              f"перебор {result['full_scan_rows_per_s']:.0f} строк/с", end="")
+
+    large = results[-1]
+    scan_qps = large["full_scan_rows_per_s"] / large["size"]
+    assert large["username_eq_qps"] > 100 * scan_qps
+    assert large["username_prefix_page_qps"] > 100 * scan_qps
+    assert large["full_scan_matches"] == sum(fields(user_id)[2].endswith("@users.test")
+                                             for user_id in range(1, large["size"] + 1))
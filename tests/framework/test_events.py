@@ -0,0 +1,129 @@
+# tests/framework/test_events.py
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from utils.events import EventStream, ProgressTracker, current_run_offset, main, read_events
+from utils.stub_server import StubServer
+
+TARGET_TESTS = """
+import os
+import pytest
+import requests
+
+def test_http():
+    assert requests.get(os.environ["BASE_URL"] + "/users/1").status_code == 200
+
+def test_fails():
+    assert 1 == 2
+
+@pytest.mark.skip(reason="пропуск")
+def test_skipped():
+    pass
+"""
+
+
+def test_run_writes_events(isolated_pytest, tmp_path):
+    """Прогон пишет события фаз и итоги тестов со статистикой HTTP."""
+
+    events_path = tmp_path / "results" / "events.jsonl"
+    isolated_pytest.write(TARGET_TESTS)
+    with StubServer() as server:
+        code, output = isolated_pytest.run("test_target.py", f"--events-file={events_path}",
+                                           plugins=["utils.events"], env={"BASE_URL": server.url})
+    assert code == 1, output
+
+    events = list(read_events(events_path))
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "session_start" and events[0]["total"] == 3
+    assert kinds[-1] == "session_end" and events[-1]["exitstatus"] == 1
+    assert kinds.count("test_start") == kinds.count("test_end") == 3
+
+    phases = [event for event in events if event["event"] == "phase" and event["nodeid"].endswith("test_http")]
+    assert [event["when"] for event in phases] == ["setup", "call", "teardown"]
+
+    ends = {event["nodeid"].split("::")[1]: event for event in events if event["event"] == "test_end"}
+    assert ends["test_http"]["outcome"] == "passed"
+    assert ends["test_http"]["http_calls"] == 1 and ends["test_http"]["http_bytes"] > 100
+    assert ends["test_fails"]["outcome"] == "failed"
+    assert ends["test_skipped"]["outcome"] == "skipped" and ends["test_skipped"]["http_calls"] == 0
+
+    # Итог по потоку совпадает с итогом прогона
+    tracker = ProgressTracker()
+    for event in events:
+        tracker.feed(event)
+    assert tracker.finished == 3 and tracker.eta() == 0.0
+    assert tracker.outcomes == {"passed": 1, "failed": 1, "skipped": 1}
+
+
+def test_throughput_and_eta():
+    """Пропускная способность считается по окну последних тестов, ETA — по остатку."""
+
+    tracker = ProgressTracker(window=5)
+    tracker.feed({"event": "session_start", "source": "a", "total": 60, "ts": 0.0})
+    tracker.feed({"event": "session_start", "source": "b", "total": 40, "ts": 0.0})
+    for number in range(20):
+        # Первые тесты медленные, последние — по 0.5 с
+        ts = number * 2.0 if number < 10 else 18.0 + (number - 9) * 0.5
+        tracker.feed({"event": "test_end", "ts": ts, "outcome": "passed", "http_calls": 1, "http_bytes": 10})
+
+    assert tracker.throughput() == 2.0
+    assert tracker.eta() == 40.0
+    assert "20/100 тестов" in tracker.status()
+
+
+def test_writer_overhead_per_test(tmp_path):
+    """Накладные расходы потока событий на один тест — единицы микросекунд."""
+
+    stream = EventStream(str(tmp_path / "events.jsonl"), flush_interval=0.05)
+    reports = [SimpleNamespace(nodeid="t::x", when=when, outcome="passed", duration=0.001,
+                               failed=False, skipped=False) for when in ("setup", "call", "teardown")]
+    tests = 20000
+
+    start = time.perf_counter()
+    for _ in range(tests):
+        stream.pytest_runtest_logstart("t::x", None)
+        for report in reports:
+            stream.pytest_runtest_logreport(report)
+        stream.pytest_runtest_logfinish("t::x", None)
+    per_test_us = (time.perf_counter() - start) / tests * 1e6
+
+    stream.writer.close()
+    print(f"Накладные расходы на тест: {per_test_us:.2f} мкс")
+    assert stream.writer.written == tests * 5
+    assert per_test_us < 50, f"Накладные расходы {per_test_us:.1f} мкс на тест"
+
+
+def test_follow_skips_finished_sessions_of_previous_builds(tmp_path, capsys):
+    """--follow не завершается на session_end прошлой сборки и считает только текущий прогон."""
+
+    def line(event, source, **fields):
+        return json.dumps({"ts": time.time(), "event": event, "source": source, **fields}) + "\n"
+
+    def test_end(source, nodeid, outcome):
+        return line("test_end", source, nodeid=nodeid, outcome=outcome, duration=0.1, http_calls=1, http_bytes=10)
+
+    path = tmp_path / "events.jsonl"
+    previous = line("session_start", "old:1", total=1) + test_end("old:1", "t::old", "failed") + \
+        line("session_end", "old:1", exitstatus=1)
+    path.write_text(previous, encoding="utf-8")
+    assert current_run_offset(path) == len(previous.encode("utf-8"))
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line("session_start", "new:2", total=2) + test_end("new:2", "t::first", "passed"))
+    assert current_run_offset(path) == len(previous.encode("utf-8"))
+
+    follower = threading.Thread(target=main, args=([str(path), "--follow", "--interval", "60"],))
+    follower.start()
+    time.sleep(0.3)
+    assert follower.is_alive(), "Чтение завершилось на сессии прошлой сборки"
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(test_end("new:2", "t::second", "failed") + line("session_end", "new:2", exitstatus=1))
+    follower.join(timeout=10)
+    assert not follower.is_alive()
+
+    output = capsys.readouterr().out
+    assert "FAILED: t::second" in output and "t::old" not in output
+    assert output.splitlines()[-1].startswith("2/2 тестов")
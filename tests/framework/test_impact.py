@@ -0,0 +1,136 @@
+# tests/framework/test_impact.py
+import json
+import time
+
+import pytest
+import requests
+
+from utils.impact import (changed_endpoints, empty_index, endpoint_key, estimate_savings, match_endpoints,
+                          response_shape_hash, select, shape)
+from utils.stub_server import StubServer
+
+TARGET_TESTS = """
+import os
+import requests
+
+BASE_URL = os.environ["BASE_URL"]
+
+def test_user():
+    assert requests.get(f"{BASE_URL}/users/3").status_code == 200
+
+def test_filter():
+    assert requests.get(f"{BASE_URL}/users?username=Bret").status_code == 200
+
+def test_create():
+    assert requests.post(f"{BASE_URL}/users", json={"name": "A"}).status_code == 201
+
+def test_offline():
+    assert True
+"""
+
+
+def run_pytest(isolated_pytest, base_url, *args):
+    isolated_pytest.write(TARGET_TESTS)
+    return isolated_pytest.run("test_target.py", *args, plugins=["utils.impact"], env={"BASE_URL": base_url})
+
+
+def test_endpoint_key_normalizes_ids_and_query():
+    """Идентификаторы заменяются на {id}, строка запроса отбрасывается."""
+
+    assert endpoint_key("get", "http://host:80/users/42?x=1") == "GET /users/{id}"
+    assert endpoint_key("GET", "https://host/users") == "GET /users"
+    assert endpoint_key("PUT", "/orders/3f2b1c9e-8a7d-4e6f-9b0a-1c2d3e4f5a6b/items/7") == "PUT /orders/{id}/items/{id}"
+    assert endpoint_key("GET", "http://host") == "GET /"
+
+
+def test_shape_ignores_values_and_list_length():
+    """Структура не зависит от значений и длины списков, но видит новые поля и типы."""
+
+    assert shape([{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]) == shape([{"id": 7, "name": "z"}])
+    assert shape({"id": 1}) != shape({"id": "1"})
+    assert shape({"id": 1}) != shape({"id": 1, "email": "x"})
+
+
+def test_record_and_select_by_endpoint(isolated_pytest, tmp_path):
+    """Полный прогон записывает индекс, а выборка запускает только затронутые тесты."""
+
+    with StubServer() as server:
+        code, output = run_pytest(isolated_pytest, server.url, "--impact-record")
+        assert code == 0, output
+
+        index = json.loads((tmp_path / ".impact_index.json").read_text(encoding="utf-8"))
+        tests = index["tests"]
+        assert tests["test_target.py::test_user"]["endpoints"] == ["GET /users/{id}"]
+        assert tests["test_target.py::test_filter"]["endpoints"] == ["GET /users"]
+        assert tests["test_target.py::test_offline"]["endpoints"] == []
+        assert index["endpoints"]["GET /users/{id}"]["sample"] == "/users/3"
+
+        code, output = run_pytest(isolated_pytest, server.url, "--impact-endpoint=GET /users/5")
+        assert code == 0, output
+        assert "1 passed, 3 deselected" in output
+        assert "выбрано тестов 1 из 4" in output and "оценка экономии" in output
+
+        code, output = run_pytest(isolated_pytest, server.url, "--impact-endpoint=* /users*")
+        assert "3 passed, 1 deselected" in output, output
+
+        # Незатронутый эндпоинт: ничего не выполняется, но прогон успешен
+        code, output = run_pytest(isolated_pytest, server.url, "--impact-endpoint=GET /posts")
+        assert code == 0, output
+        assert "4 deselected" in output
+
+
+def test_changed_shape_selects_affected_tests():
+    """Изменение структуры ответа эндпоинта выбирает его тесты."""
+
+    with StubServer() as server:
+        session = requests.Session()
+        response = session.get(f"{server.url}/users/1")
+        index = empty_index()
+        index["endpoints"] = {
+            "GET /users/{id}": {"shapes": {"200": response_shape_hash(response)}, "sample": "/users/1"},
+            "POST /users": {"shapes": {}, "sample": "/users"},
+        }
+
+        def fetch(path):
+            return session.get(f"{server.url}{path}")
+
+        # 1. Структура не менялась — ничего не выбрано, POST не повторяется
+        assert changed_endpoints(index, fetch) == set()
+
+        # 2. У пользователя появилось новое поле
+        server.store.users[1]["nickname"] = "bret"
+        assert changed_endpoints(index, fetch) == {"GET /users/{id}"}
+
+
+def test_selection_is_fast_for_thousands_of_tests():
+    """Выбор по индексу из 5000 тестов и 200 эндпоинтов занимает миллисекунды."""
+
+    index = empty_index()
+    endpoints = [f"GET /resource{number}/{{id}}" for number in range(200)]
+    for number in range(5000):
+        index["tests"][f"tests/api/test_{number // 50}.py::test_{number}"] = {
+            "endpoints": [endpoints[number % 200], endpoints[(number * 7) % 200]],
+            "duration": 0.5,
+        }
+    index["endpoints"] = {key: {"shapes": {}, "sample": ""} for key in endpoints}
+    nodeids = list(index["tests"]) + ["tests/api/test_new.py::test_unknown"]
+
+    start = time.perf_counter()
+    selected, deselected = select(index, nodeids, match_endpoints(["GET /resource1/*"], index["endpoints"]))
+    elapsed = time.perf_counter() - start
+
+    assert "tests/api/test_new.py::test_unknown" in selected, "Тест без записи в индексе должен выполняться"
+    assert len(selected) + len(deselected) == len(nodeids)
+    assert len(selected) < 100
+    selected_time, saved_time = estimate_savings(index, selected, deselected)
+    assert saved_time > selected_time * 10
+    assert elapsed < 0.1, f"Выбор занял {elapsed * 1000:.1f} мс"
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("GET /users/42", {"GET /users/{id}"}),
+    ("/users", {"GET /users", "POST /users"}),
+    ("* /users*", {"GET /users", "POST /users", "GET /users/{id}"}),
+])
+def test_match_endpoints(spec, expected):
+    assert match_endpoints([spec], ["GET /users", "POST /users", "GET /users/{id}", "GET /posts"]) == expected
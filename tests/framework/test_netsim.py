@@ -0,0 +1,101 @@
+# tests/framework/test_netsim.py
+import time
+
+import pytest
+import requests
+
+from utils.netsim import NetworkProfile, NetworkProxy, matrix_report, run_matrix
+from utils.stub_server import StubServer
+
+TARGET_TESTS = """
+import os
+import requests
+
+def test_response_time():
+    assert requests.get(os.environ["BASE_URL"] + "/users/1").status_code == 200
+
+def test_many_requests():
+    for user_id in range(1, 6):
+        assert requests.get(os.environ["BASE_URL"] + f"/users/{user_id}").status_code == 200
+"""
+
+
+@pytest.fixture(scope="module")
+def upstream():
+    with StubServer() as server:
+        yield server.httpd.server_address[:2]
+
+
+def timed_get(session, url):
+    start = time.perf_counter()
+    response = session.get(url, timeout=10)
+    return response, time.perf_counter() - start
+
+
+def test_latency_and_connection_cost(upstream):
+    """Запрос стоит RTT, а новое соединение — еще один RTT на рукопожатие."""
+
+    profile = NetworkProfile("test", latency_ms=40)
+    with NetworkProxy(upstream, profile) as proxy:
+        session = requests.Session()
+        cold, cold_time = timed_get(session, f"{proxy.url}/users/1")
+        warm, warm_time = timed_get(session, f"{proxy.url}/users/1")
+
+    assert cold.status_code == warm.status_code == 200
+    assert cold.json() == warm.json()
+    assert 0.15 <= cold_time < 0.4, f"Холодный запрос: {cold_time:.3f} с"
+    assert 0.075 <= warm_time < 0.15, f"Теплый запрос: {warm_time:.3f} с"
+    assert proxy.stats["connections"] == 1
+
+
+def test_bandwidth_cap(upstream):
+    """Передача ответа ограничена полосой канала."""
+
+    profile = NetworkProfile("slow", bandwidth_kbps=64)
+    with NetworkProxy(upstream, profile) as proxy:
+        response, elapsed = timed_get(requests.Session(), f"{proxy.url}/users")
+
+    assert response.status_code == 200
+    expected = len(response.content) * 8 / 64_000
+    assert elapsed >= expected * 0.9, f"{elapsed:.3f} с при ожидаемых {expected:.3f} с"
+
+
+def test_connection_resets(upstream):
+    """При обрыве клиент получает ошибку соединения, а прокси учитывает обрыв."""
+
+    with NetworkProxy(upstream, NetworkProfile("broken", reset_rate=1.0)) as proxy:
+        with pytest.raises(requests.ConnectionError):
+            requests.get(f"{proxy.url}/users/1", timeout=5)
+        assert proxy.stats["resets"] == 1
+
+
+def test_jitter_keeps_byte_order(upstream):
+    """Джиттер меняет задержку, но не порядок данных в соединении."""
+
+    profile = NetworkProfile("jitter", latency_ms=5, jitter_ms=5, bandwidth_kbps=2_000)
+    with NetworkProxy(upstream, profile, seed=1) as proxy:
+        session = requests.Session()
+        expected = requests.get(f"{proxy.url}/users").json()
+        for _ in range(5):
+            assert session.get(f"{proxy.url}/users").json() == expected
+
+
+def test_matrix_report(isolated_pytest):
+    """Матрица показывает длительность набора по профилям и выигрыш от пула соединений."""
+
+    target = isolated_pytest.write(TARGET_TESTS)
+    results = run_matrix([str(target)], ["local", "broadband"])
+
+    assert [(run["profile"], run["reuse"]) for run in results] == [
+        ("local", False), ("local", True), ("broadband", False), ("broadband", True)
+    ]
+    assert all(run["exitstatus"] == 0 for run in results), results
+    slow, reused = results[2], results[3]
+    assert slow["proxy"]["connections"] == 6 and reused["proxy"]["connections"] == 1
+    many = next(nodeid for nodeid in slow["tests"] if nodeid.endswith("test_many_requests"))
+    assert slow["tests"][many]["duration"] > reused["tests"][many]["duration"]
+
+    report = matrix_report(results)
+    assert "broadband" in report and "test_response_time" in report.splitlines()[0]
+    assert "Выигрыш от переиспользования соединений" in report
+    assert "test_many_requests" in report.split("Самые чувствительные")[1]
@@ -0,0 +1,89 @@
+# tests/framework/test_profiler.py
+import glob
+import json
+import time
+import xml.etree.ElementTree as ElementTree
+
+from utils.profiler import StackSampler, collapsed_text, flamegraph_svg, top_functions
+
+TARGET_TESTS = """
+import time
+
+def busy_loop():
+    total = 0
+    for index in range(3_000_000):
+        total += index % 7
+    return total
+
+def test_cpu():
+    busy_loop()
+
+def test_wait():
+    time.sleep(0.3)
+"""
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+def test_top_functions_and_flamegraph():
+    """Собственные выборки считаются по листу стека, полные — по всем кадрам без повторов."""
+
+    folded = {"main;parse;decode": 3, "main;parse": 1, "main;validate;validate": 2}
+
+    assert top_functions(folded, 3) == [("decode", 3, 3), ("validate", 2, 2), ("parse", 1, 4)]
+    assert collapsed_text(folded).splitlines()[0] == "main;parse 1"
+
+    svg = ElementTree.fromstring(flamegraph_svg(folded, "test"))
+    titles = [element.text for element in svg.iter("{http://www.w3.org/2000/svg}title")]
+    assert "main: 6 (100.0%)" in titles and "decode: 3 (50.0%)" in titles
+
+
+def test_sampler_finds_hot_function_and_skips_waiting():
+    """По часам cpu выборки попадают в горячую функцию, а sleep в профиль не входит."""
+
+    sampler = StackSampler(rate=200).start()
+    busy_loop(0.5)
+    time.sleep(0.5)
+    sampler.stop()
+
+    folded = sampler.collapsed(sampler.collect())
+    samples = sum(folded.values())
+    hot = sum(count for stack, count in folded.items() if "busy_loop" in stack)
+    waiting = sum(count for stack, count in folded.items() if "sleep" in stack.split(";")[-1])
+    print(f"\n{samples} выборок, {sampler.idle} простоя, {sampler.effective_rate:.0f} Гц, "
+          f"накладные расходы {sampler.overhead:.3%}")
+
+    assert samples >= 40, f"Слишком мало выборок: {samples}"
+    assert hot / samples > 0.9
+    assert waiting == 0 and sampler.idle >= 40
+    assert sampler.overhead < 0.02
+
+
+def test_profile_option_per_test_with_allure(isolated_pytest, tmp_path):
+    """--profile --profile-mode=test пишет профиль каждого теста, прикладывает его к Allure и печатает топ функций."""
+
+    isolated_pytest.write(TARGET_TESTS)
+    # Флаг --profile перед путем не должен забирать путь себе в значение
+    code, output = isolated_pytest.run("--profile-mode=test", "--alluredir", str(tmp_path / "allure"),
+                                       "--profile-top", "5", "--profile", "test_target.py",
+                                       plugins=["utils.profiler"])
+    assert code == 0, output
+
+    summary = output.split("= profile =")[-1]
+    assert "накладные расходы" in summary and "busy_loop (test_target.py:4)" in summary, output
+    for name in ("session", "test_target.py_test_cpu"):
+        assert (tmp_path / ".profile" / f"{name}.svg").exists()
+        assert "busy_loop" in (tmp_path / ".profile" / f"{name}.collapsed").read_text(encoding="utf-8")
+
+    attachments = {}
+    for path in glob.glob(str(tmp_path / "allure" / "*-result.json")):
+        with open(path, encoding="utf-8") as f:
+            test = json.load(f)
+        attachments[test["name"]] = {attachment["type"] for attachment in test.get("attachments", [])}
+    assert attachments["test_cpu"] == {"image/svg+xml", "text/plain"}
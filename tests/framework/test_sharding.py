@@ -0,0 +1,89 @@
+# tests/framework/test_sharding.py
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from utils.sharding import DEFAULT_DURATIONS_PATH, load_durations, main, merge_durations, partition
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def collect_shard(index, total, *extra):
+    """Запускает pytest --collect-only для одного шарда отдельным процессом."""
+
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "tests/api", "--collect-only", "-q", "-p", "no:cacheprovider",
+         f"--shard-index={index}", f"--shard-total={total}", *extra],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, f"Сбор шарда {index} завершился ошибкой:\n{result.stdout}{result.stderr}"
+    return [line for line in result.stdout.splitlines() if "::" in line]
+
+
+def test_shards_cover_full_suite_without_overlap():
+    """Объединение шардов, запущенных отдельными процессами, равно полному набору тестов."""
+
+    total = 3
+    full = collect_shard(0, 1)
+    shards = [collect_shard(index, total) for index in range(total)]
+
+    # 1. Каждый тест попал ровно в один шард
+    union = [nodeid for shard in shards for nodeid in shard]
+    assert sorted(union) == sorted(full), "Объединение шардов не совпадает с полным набором"
+    assert len(union) == len(set(union)), "Один и тот же тест попал в несколько шардов"
+
+    # 2. Внутри шарда сохраняется исходный порядок тестов
+    for shard in shards:
+        assert shard == [nodeid for nodeid in full if nodeid in shard], "Порядок тестов в шарде нарушен"
+
+    # 3. Разбиение детерминировано между запусками
+    assert collect_shard(1, total) == shards[1], "Повторный запуск шарда дал другой набор тестов"
+
+
+def test_partition_balances_by_durations():
+    """Долгие тесты распределяются так, чтобы шарды были близки по времени."""
+
+    durations = {"a": 10.0, "b": 6.0, "c": 5.0, "d": 4.0, "e": 1.0}
+    groups = {nodeid: [nodeid] for nodeid in durations}
+
+    shards = partition(groups, durations, 2)
+    loads = [sum(durations[key] for key in shard) for shard in shards]
+
+    assert sum(loads) == 26.0, f"Потеряны тесты при разбиении: {loads}"
+    assert max(loads) - min(loads) <= 2.0, f"Шарды несбалансированы: {loads}"
+
+
+def test_partition_keeps_groups_together():
+    """Тесты одной группы не разделяются между шардами."""
+
+    groups = {"group:crud": ["t1", "t2", "t3"], "t4": ["t4"], "t5": ["t5"]}
+    shards = partition(groups, {}, 3)
+
+    assert sum("group:crud" in shard for shard in shards) == 1
+    assert sorted(len(shard) for shard in shards) == [1, 1, 1]
+
+
+def test_merge_durations(tmp_path):
+    """Слияние длительностей шардов дополняет историю новыми замерами."""
+
+    first = tmp_path / "durations-0.json"
+    second = tmp_path / "durations-1.json"
+    first.write_text(json.dumps({"a": 1.0, "b": 2.0}), encoding="utf-8")
+    second.write_text(json.dumps({"c": 3.0, "b": 2.5}), encoding="utf-8")
+
+    merged = merge_durations([str(first), str(second)], base={"old": 9.0})
+
+    assert merged == {"a": 1.0, "b": 2.5, "c": 3.0, "old": 9.0}
+
+
+def test_merge_cli_updates_history_read_by_sharder(tmp_path, monkeypatch):
+    """merge по умолчанию дописывает длительности в тот файл, который читает разбиение."""
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / DEFAULT_DURATIONS_PATH).write_text(json.dumps({"old": 9.0, "a": 5.0}), encoding="utf-8")
+    (tmp_path / "durations-0.json").write_text(json.dumps({"a": 1.0}), encoding="utf-8")
+
+    assert main(["merge", "--durations", str(tmp_path / "durations-*.json")]) == 0
+
+    assert load_durations(str(tmp_path / DEFAULT_DURATIONS_PATH)) == {"a": 1.0, "old": 9.0}
@@ -0,0 +1,130 @@
+# tests/framework/test_snapshots.py
+import copy
+import hashlib
+import os
+import time
+
+from utils.snapshots import Snapshot, canonical, compare, diff, normalize
+from utils.stub_server import default_users
+
+TARGET_TESTS = """
+import os
+
+def test_user(snapshot):
+    snapshot.assert_match({"id": 1, "name": os.environ.get("USER_NAME", "Leanne"), "token": os.environ.get("TOKEN", "a")},
+                          mask=["token"])
+"""
+
+
+def write_snapshot(path, value, masks=()):
+    data = canonical(normalize(value, masks))
+    snapshot = Snapshot(str(path))
+    snapshot.write(data, hashlib.blake2b(data, digest_size=16).hexdigest(), masks)
+    return snapshot
+
+
+def large_payload(count):
+    """Список пользователей по образцу ответа /users; около 330 байт на пользователя."""
+
+    seeds = default_users()
+    users = []
+    for index in range(count):
+        user = copy.deepcopy(seeds[index % len(seeds)])
+        user["id"] = index + 1
+        user["username"] = f"{user['username']}{index}"
+        users.append(user)
+    return users
+
+
+def test_mask_hides_values_but_keeps_structure():
+    """Маска заменяет значения типами, оставляя ключи и длины списков."""
+
+    value = {"id": 7, "meta": {"created": "2024-01-01", "tags": ["a", "b"]}, "name": "x"}
+    normalized = normalize(value, ["id", "meta"])
+
+    assert normalized == {"id": "<number>", "meta": {"created": "<str>", "tags": ["<str>", "<str>"]}, "name": "x"}
+    assert normalize([{"id": 1}, {"id": 2}], ["[1-9]"]) == [{"id": 1}, {"id": "<number>"}]
+
+    # Диапазон индексов работает и для двузначных номеров, в отличие от класса символов [1-9]
+    users = [{"id": index, "name": "x"} for index in range(12)]
+    assert [user["id"] for user in normalize(users, ["1:"])] == [0] + ["<number>"] * 11
+    assert [user["id"] for user in normalize(users, ["2:4.id"])] == [0, 1, "<number>", "<number>"] + list(range(4, 12))
+    assert normalize({"items": [1, 2, 3]}, [":1"]) == {"items": [1, 2, 3]}
+
+
+def test_diff_reports_only_changed_paths():
+    """Отличия указывают путь; вставка в список дает одно отличие, а не сдвиг."""
+
+    expected = [{"id": index, "geo": {"lat": "1", "lng": "2"}} for index in range(100)]
+    actual = copy.deepcopy(expected)
+    actual.insert(0, {"id": -1})
+    actual[51]["geo"]["lat"] = 1.5
+    del actual[80]["geo"]
+
+    differences = {(item.path, item.kind) for item in diff(expected, actual)}
+
+    assert differences == {("0", "added"), ("51.geo.lat", "changed"), ("80.geo", "removed")}
+
+
+def test_bool_and_number_are_different(tmp_path):
+    """Для снимка true и 1 различаются, хотя в Python True == 1."""
+
+    snapshot = write_snapshot(tmp_path / "flags.json.gz", {"flags": [True, False], "count": 1})
+
+    assert [item.path for item in compare(snapshot, {"flags": [1, False], "count": 1})] == ["flags.0"]
+    assert compare(snapshot, {"flags": [True, False], "count": 1.0}) == []
+
+
+def test_snapshot_fixture_update_and_mismatch(isolated_pytest, tmp_path):
+    """Без снимка тест падает, --snapshot-update его пишет, изменение значения находится."""
+
+    isolated_pytest.write(TARGET_TESTS)
+
+    def run(*args, **env):
+        return isolated_pytest.run("test_target.py", *args, plugins=["utils.snapshots"], env=env)
+
+    code, output = run()
+    assert code == 1 and "--snapshot-update" in output, output
+
+    code, output = run("--snapshot-update")
+    assert code == 0 and "written: 1" in output, output
+    assert (tmp_path / "__snapshots__" / "test_target" / "test_user.json.gz").exists()
+
+    # Маскированный токен меняется, а сравнение проходит
+    code, output = run(TOKEN="другой")
+    assert code == 0 and "matched: 1" in output, output
+
+    code, output = run(USER_NAME="Ervin")
+    assert code == 1, output
+    assert 'name: ожидалось "Leanne", получено "Ervin"' in output
+
+
+def test_large_payload_benchmark(tmp_path):
+    """Многомегабайтный ответ: совпадение по хешу заголовка и быстрый поиск отличий."""
+
+    payload = large_payload(15000)
+    raw_size = len(canonical(payload))
+    snapshot = write_snapshot(tmp_path / "large.json.gz", payload)
+    file_size = os.path.getsize(snapshot.path)
+    assert raw_size > 4 * 1024 * 1024, f"Тело {raw_size} байт — меньше нескольких МБ"
+
+    # 1. Совпадение: тело снимка не распаковывается
+    start = time.perf_counter()
+    assert compare(snapshot, payload) == []
+    same_time = time.perf_counter() - start
+
+    # 2. Три изменения в разных элементах
+    changed = copy.deepcopy(payload)
+    changed[10]["email"] = "new@example.com"
+    changed[7000]["address"]["geo"]["lat"] = "0"
+    changed[14999]["company"]["bs"] = "other"
+    start = time.perf_counter()
+    differences = compare(snapshot, changed)
+    diff_time = time.perf_counter() - start
+
+    print(f"\nТело {raw_size / 1024 / 1024:.1f} МБ, снимок {file_size / 1024:.0f} КБ; "
+          f"совпадение {same_time * 1000:.0f} мс, поиск отличий {diff_time * 1000:.0f} мс")
+    assert [item.path for item in differences] == ["10.email", "7000.address.geo.lat", "14999.company.bs"]
+    assert file_size < raw_size / 10, "Снимок должен быть компактным"
+    assert same_time < 1.0, f"Сравнение совпадающего тела заняло {same_time:.2f} с"
+    assert diff_time < 3.0, f"Поиск отличий занял {diff_time:.2f} с"
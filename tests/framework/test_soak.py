@@ -0,0 +1,91 @@
+# tests/framework/test_soak.py
+import json
+
+import pytest
+
+from utils.soak import slope
+
+LEAKY_TEST = """
+CACHE = []
+
+def test_leaks():
+    CACHE.append(bytearray(100 * 1024))
+
+def test_clean():
+    data = [bytearray(100 * 1024) for _ in range(5)]
+    assert len(data) == 5
+"""
+
+SESSION_FIXTURE_LEAK = """
+import pytest
+
+@pytest.fixture(scope="session")
+def cache():
+    print("SETUP cache")
+    return []
+
+def test_fills_cache(cache):
+    cache.append(bytearray(100 * 1024))
+
+def test_reads_cache(cache):
+    assert cache
+"""
+
+
+def run_soak(isolated_pytest, *args, source=LEAKY_TEST):
+    """Запускает soak-прогон отдельным процессом pytest и возвращает (код, отчет, вывод)."""
+
+    isolated_pytest.write(source)
+    report_path = isolated_pytest.path / "soak.json"
+    code, output = isolated_pytest.run("test_target.py", f"--soak-report={report_path}", *args, plugins=["utils.soak"])
+    report = json.loads(report_path.read_text(encoding="utf-8")) if report_path.exists() else None
+    return code, report, output
+
+
+def test_soak_detects_leak_and_fails_over_budget(isolated_pytest):
+    """Утечка 100 КБ на итерацию находится, а превышение бюджета роняет прогон."""
+
+    code, report, output = run_soak(isolated_pytest, "--soak-iterations=12", "--soak-snapshot-every=5",
+                                    "--soak-budget-kb=20")
+
+    # 1. Прогон завершился ошибкой из-за превышения бюджета
+    assert code == pytest.ExitCode.TESTS_FAILED, output
+    assert report["iterations"] == 12
+    assert report["violations"], "Нарушение бюджета не зафиксировано"
+
+    # 2. Наклон роста близок к реальной утечке
+    assert 90 <= report["app_kb_per_iteration"] <= 120, report["app_kb_per_iteration"]
+
+    # 3. Главное место роста указывает на строку с утечкой
+    top_site = report["top_growth"][0]["site"]
+    assert "test_target.py:5" in top_site, f"Неверное место утечки: {top_site}"
+    assert "ПРЕВЫШЕН БЮДЖЕТ" in output
+
+
+def test_soak_passes_without_leak(isolated_pytest):
+    """Тест без утечки укладывается в бюджет."""
+
+    code, report, output = run_soak(isolated_pytest, "-k", "clean", "--soak-iterations=10", "--soak-budget-kb=20")
+
+    assert code == pytest.ExitCode.OK, output
+    assert not report["violations"], report["violations"]
+    assert report["app_kb_per_iteration"] < 20
+
+
+def test_soak_keeps_session_fixtures_between_iterations(isolated_pytest):
+    """Фикстура сессии создается один раз на весь прогон, и рост в ней находится."""
+
+    code, report, output = run_soak(isolated_pytest, "-s", "--soak-iterations=8", "--soak-snapshot-every=2",
+                                    source=SESSION_FIXTURE_LEAK)
+
+    assert code == pytest.ExitCode.OK, output
+    assert output.count("SETUP cache") == 1, output
+    assert 90 <= report["app_kb_per_iteration"] <= 120, report["app_kb_per_iteration"]
+
+
+def test_slope():
+    """Наклон по методу наименьших квадратов."""
+
+    assert slope([1, 2, 3, 4], [10, 12, 14, 16]) == pytest.approx(2.0)
+    assert slope([1, 2, 3], [5, 5, 5]) == 0.0
+    assert slope([1], [5]) == 0.0
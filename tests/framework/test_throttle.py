@@ -0,0 +1,105 @@
+# tests/framework/test_throttle.py
+import os
+import stat
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from utils.stub_server import StubServer
+from utils.throttle import EndpointRule, SharedThrottle
+from utils.token_bucket import TokenBucket
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Воркер: отдельный процесс со своим экземпляром троттлинга и общим файлом состояния
+WORKER = """
+import sys, requests
+from utils.throttle import SharedThrottle
+base_url, state_path, rate, burst, count = sys.argv[1], sys.argv[2], float(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5])
+SharedThrottle(rate, burst, state_path=state_path).install()
+statuses = [requests.get(f"{base_url}/users/1").status_code for _ in range(count)]
+print(",".join(map(str, statuses)))
+"""
+
+
+def test_token_bucket_reservations():
+    """Резервирование токенов в долг выстраивает запросы в очередь по rate."""
+
+    bucket = TokenBucket(rate=10, burst=2)
+
+    # 1. Запас burst выдается без ожидания
+    assert bucket.reserve(now=0.0) == 0.0
+    assert bucket.reserve(now=0.0) == 0.0
+
+    # 2. Следующие запросы ждут по 1/rate секунды каждый
+    assert bucket.reserve(now=0.0) == pytest.approx(0.1)
+    assert bucket.reserve(now=0.0) == pytest.approx(0.2)
+
+    # 3. После 429 ведро блокируется на Retry-After
+    bucket.penalize(now=1.0, seconds=2)
+    assert bucket.reserve(now=1.0) == pytest.approx(2.1)
+
+
+def test_endpoint_rules():
+    """Бюджеты эндпоинтов применяются по методу и glob-шаблону пути."""
+
+    rule = EndpointRule.parse("get /users/*=10:3")
+    assert (rule.method, rule.pattern, rule.rate, rule.burst) == ("GET", "/users/*", 10.0, 3.0)
+
+    throttle = SharedThrottle(rate=50, rules=[rule, EndpointRule.parse("* /posts*=5")])
+    assert throttle.keys_for("GET", "/users/1") == ["*", "GET /users/*"]
+    assert throttle.keys_for("POST", "/users/1") == ["*"]
+    assert throttle.keys_for("DELETE", "/posts/3") == ["*", "* /posts*"]
+
+    with pytest.raises(ValueError):
+        EndpointRule.parse("GET /users")
+
+
+def test_state_file_readable_only_by_owner(tmp_path):
+    """Файл состояния по умолчанию свой у каждого пользователя и создается с правами 0600."""
+
+    assert str(os.getuid()) in os.path.basename(SharedThrottle(rate=10).state_path)
+
+    state_path = tmp_path / "throttle.json"
+    state_path.write_text("", encoding="utf-8")
+    os.chmod(state_path, 0o666)
+    throttle = SharedThrottle(rate=1000, burst=10, state_path=str(state_path))
+
+    assert throttle.acquire("GET", "http://host/users/1") == 0.0
+    assert stat.S_IMODE(os.stat(state_path).st_mode) == 0o600
+
+
+def test_shared_budget_across_processes(tmp_path):
+    """Несколько процессов делят один бюджет и не получают ни одного 429."""
+
+    workers, per_worker = 4, 10
+    # Бюджет клиента ниже лимита сервера (20 rps, burst 2), запас поглощает задержки сети
+    rate, burst = 18, 1
+
+    with StubServer(rate_limit=20, rate_burst=2) as server:
+        # 1. Запускаем воркеры отдельными процессами с общим файлом состояния
+        start = time.perf_counter()
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", WORKER, server.url, str(tmp_path / "throttle.json"),
+                 str(rate), str(burst), str(per_worker)],
+                cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            for _ in range(workers)
+        ]
+        outputs = [process.communicate(timeout=60) for process in processes]
+        elapsed = time.perf_counter() - start
+
+    statuses = [status for stdout, _ in outputs for status in stdout.strip().split(",") if status]
+
+    # 2. Все запросы выполнены и сервер ни разу не ответил 429
+    assert len(statuses) == workers * per_worker, f"Ошибки воркеров: {[err for _, err in outputs]}"
+    assert set(statuses) == {"200"}, f"Получены статусы: {sorted(set(statuses))}"
+    assert server.httpd.rejected == 0, f"Сервер отклонил {server.httpd.rejected} запросов"
+
+    # 3. Общий бюджет действительно соблюдался: быстрее rate отправить нельзя
+    minimum = (workers * per_worker - burst) / rate
+    assert elapsed >= minimum, f"Запросы отправлены за {elapsed:.2f} с, быстрее бюджета {minimum:.2f} с"
@@ -0,0 +1,122 @@
+# tests/framework/test_warmup.py
+import socket
+
+import pytest
+import requests
+
+from utils.fuzzing import FuzzEngine
+from utils.pagination import iter_pages
+from utils.stub_server import StubServer
+from utils.warmup import DnsCache, SharedPool, cold_session
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def counted_server():
+    """Стенд, считающий принятые TCP-соединения."""
+
+    with StubServer() as server:
+        server.connections = 0
+        process_request = server.httpd.process_request
+
+        def counting(request, client_address):
+            server.connections += 1
+            return process_request(request, client_address)
+
+        server.httpd.process_request = counting
+        yield server
+
+
+def test_dns_cache_ttl_and_bypass():
+    """Повторное разрешение берется из кэша до истечения TTL; bypass идет мимо кэша."""
+
+    clock = FakeClock()
+    cache = DnsCache(ttl=30, clock=clock)
+    cache.install()
+    try:
+        first = socket.getaddrinfo("localhost", 80, 0, socket.SOCK_STREAM)
+        assert socket.getaddrinfo("localhost", 80, 0, socket.SOCK_STREAM) == first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        with cache.bypass():
+            socket.getaddrinfo("localhost", 80, 0, socket.SOCK_STREAM)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        clock.now = 31
+        socket.getaddrinfo("localhost", 80, 0, socket.SOCK_STREAM)
+        assert cache.misses == 2, "Запись с истекшим TTL должна разрешаться заново"
+
+        with pytest.raises(socket.gaierror):
+            socket.getaddrinfo("no-such-host.invalid", 80)
+        assert not any(key[0] == "no-such-host.invalid" for key in cache.entries)
+    finally:
+        cache.uninstall()
+    assert socket.getaddrinfo is not cache.getaddrinfo
+
+
+def test_prewarmed_pool_is_reused(counted_server):
+    """Прогрев открывает заданное число соединений, а тесты новых не открывают."""
+
+    url = f"{counted_server.url}/users/1"
+    pool = SharedPool(maxsize=4)
+    pool.install()
+    try:
+        pool.prewarm(url, 4)
+        assert counted_server.connections == 4
+
+        # Вызовы requests.get создают новую сессию, но берут соединение из общего пула
+        for _ in range(10):
+            assert requests.get(url).status_code == 200
+        assert counted_server.connections == 4
+
+        # Холодная сессия всегда открывает новое соединение
+        with cold_session() as session:
+            assert session.get(url).status_code == 200
+        assert counted_server.connections == 5
+    finally:
+        pool.uninstall()
+
+    requests.get(url)
+    assert counted_server.connections == 6, "После uninstall пул больше не используется"
+
+
+def test_concurrent_clients_do_not_overflow_shared_pool(caplog):
+    """Фаззер и упреждающая загрузка страниц берут свой пул, а не общий на maxsize соединений."""
+
+    pool = SharedPool(maxsize=1)
+    pool.install()
+    try:
+        with StubServer(dataset_size=2000) as server:
+            users = list(iter_pages(f"{server.url}/users", limit=50, prefetch=8))
+        engine = FuzzEngine("http://127.0.0.1")
+        adapter = engine.session().get_adapter("http://127.0.0.1")
+    finally:
+        pool.uninstall()
+
+    assert len(users) == 2000
+    assert adapter is not pool.adapter
+    assert "Connection pool is full" not in caplog.text
+
+
+def test_plugin_prewarms_before_first_test(counted_server, isolated_pytest):
+    """Плагин прогревает соединения при старте сессии и печатает статистику."""
+
+    isolated_pytest.write(
+        "import os, requests\n\n"
+        "def test_get():\n"
+        "    for _ in range(5):\n"
+        "        assert requests.get(os.environ['BASE_URL'] + '/users/1').status_code == 200\n"
+    )
+    code, output = isolated_pytest.run("test_target.py", "--dns-cache-ttl=60", "--prewarm-connections=3",
+                                       plugins=["utils.warmup"], env={"BASE_URL": counted_server.url})
+
+    assert code == 0, output
+    assert "Прогрев соединений" in output and "3 соединений" in output
+    assert counted_server.connections == 3, "Тест должен был использовать прогретые соединения"
@@ -0,0 +1 @@
+"""Вспомогательные инструменты для API и UI тестов."""
@@ -0,0 +1,247 @@
+"""Общий для сессии провайдер bearer-токенов с упреждающим обновлением.
+
+Токен получается один раз и переиспользуется всеми тестами и воркерами:
+он хранится в локальном файле-кэше, а вход выполняется под блокировкой
+fcntl.flock, поэтому одновременный старт нескольких воркеров дает один
+вызов /login. Фоновый поток обновляет токен за refresh_margin секунд до
+истечения срока, и тесты не получают 401 из-за протухшего токена.
+
+Контракт входа: POST {login_url} {"username", "password"[, "expires_in"]}
+-> {"token", "expires_in"}. Учетные данные берутся из AUTH_USERNAME и
+AUTH_PASSWORD, адрес входа — из --auth-login-url (по умолчанию BASE_URL/login).
+
+    def test_profile(auth_headers):
+        requests.get(f"{BASE_URL}/users/1", headers=auth_headers)
+
+    def test_expired(token_provider):
+        headers = bearer(token_provider.expired_token())
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+import pytest
+import requests
+
+
+# Сколько можно ждать истечения короткоживущего токена в expired_token()
+EXPIRED_TOKEN_MAX_WAIT = 5.0
+
+
+class AuthError(Exception):
+    """Не удалось получить токен."""
+
+
+def bearer(token):
+    """Заголовки запроса с bearer-токеном."""
+
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_invalid_token():
+    """Токен правильного вида, который сервер никогда не выдавал."""
+
+    return f"invalid_{secrets.token_urlsafe(24)}"
+
+
+class TokenProvider:
+    """Выдает действующий токен, обновляя его заранее и разделяя между процессами."""
+
+    def __init__(self, login_url, username, password, cache_path=None,
+                 refresh_margin=30.0, timeout=10, clock=time.time):
+        self.login_url = login_url
+        self.username = username
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.clock = clock
+        if cache_path is None:
+            # Отдельный кэш для каждой пары адрес/пользователь
+            key = hashlib.sha1(f"{login_url}|{username}".encode("utf-8")).hexdigest()[:12]
+            cache_path = os.path.join(tempfile.gettempdir(), f"qa-auth-{os.getuid()}-{key}.json")
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.cached = None
+        self.login_calls = 0
+        self.stop_event = threading.Event()
+        self.refresher = None
+
+    def refresh_at(self, entry):
+        """Момент упреждающего обновления; запас не больше половины срока жизни токена."""
+
+        margin = min(self.refresh_margin, entry["lifetime"] / 2)
+        return entry["expires_at"] - margin
+
+    def fresh(self, entry):
+        return bool(entry) and self.refresh_at(entry) > self.clock()
+
+    def login(self, expires_in=None):
+        """Вызывает эндпоинт входа и возвращает запись кэша {token, expires_at}."""
+
+        payload = {"username": self.username, "password": self.password}
+        if expires_in is not None:
+            payload["expires_in"] = expires_in
+        self.login_calls += 1
+        response = requests.post(self.login_url, json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            raise AuthError(f"Вход не выполнен: статус {response.status_code}, {response.text[:200]}")
+        data = response.json()
+        lifetime = float(data["expires_in"])
+        return {"token": data["token"], "expires_at": self.clock() + lifetime, "lifetime": lifetime}
+
+    def open_cache(self):
+        """Открывает файл кэша, доступный только владельцу: в нем лежит живой токен."""
+
+        fd = os.open(self.cache_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            stat = os.fstat(fd)
+            # Файл с предсказуемым именем в общем /tmp мог создать другой пользователь
+            if stat.st_uid != os.getuid():
+                raise AuthError(f"Кэш токена {self.cache_path} принадлежит другому пользователю")
+            if stat.st_mode & 0o077:
+                os.fchmod(fd, 0o600)
+            return os.fdopen(fd, "r+", encoding="utf-8")
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def locked_cache(self, update):
+        """Под межпроцессной блокировкой читает кэш, вызывает update(cache) и сохраняет результат."""
+
+        with self.open_cache() as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                cache = json.loads(raw) if raw else {}
+                result = update(cache)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(cache))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+
+    def refresh(self, force=False):
+        """Берет токен из общего кэша или входит заново, если он скоро истечет."""
+
+        def update(cache):
+            current = cache.get("current")
+            if force or not self.fresh(current):
+                if current:
+                    cache["previous"] = current
+                current = cache["current"] = self.login()
+            return current
+
+        with self.lock:
+            self.cached = self.locked_cache(update)
+            return self.cached["token"]
+
+    def token(self):
+        """Действующий токен; быстрый путь не обращается ни к файлу, ни к сети."""
+
+        cached = self.cached
+        if self.fresh(cached):
+            return cached["token"]
+        return self.refresh()
+
+    def headers(self):
+        return bearer(self.token())
+
+    def expired_token(self):
+        """Токен, выданный сервером, но с истекшим сроком действия.
+
+        Переиспользуется ранее истекший токен из кэша; если его нет, берется
+        токен с минимальным сроком жизни и выжидается его истечение. Если
+        сервер не поддерживает expires_in и выдал долгоживущий токен, тест
+        пропускается, а не ждет его истечения.
+        """
+
+        def update(cache):
+            previous = cache.get("previous")
+            if previous and previous["expires_at"] <= self.clock():
+                return previous
+            entry = self.login(expires_in=1)
+            cache["previous"] = entry
+            return entry
+
+        entry = self.locked_cache(update)
+        delay = entry["expires_at"] - self.clock()
+        if delay > EXPIRED_TOKEN_MAX_WAIT:
+            pytest.skip(f"Сервер выдал токен на {entry['lifetime']:.0f} с вместо запрошенной 1 с: "
+                        f"ждать его истечения слишком долго")
+        if delay > 0:
+            time.sleep(delay + 0.05)
+        return entry["token"]
+
+    def invalid_token(self):
+        return make_invalid_token()
+
+    def refresh_loop(self):
+        while not self.stop_event.is_set():
+            cached = self.cached
+            delay = self.refresh_at(cached) - self.clock() if cached else 0
+            if self.stop_event.wait(max(0.0, delay)):
+                break
+            try:
+                self.refresh()
+            except (AuthError, requests.RequestException):
+                # Повторим попытку позже; тест сам получит ошибку при вызове token()
+                self.stop_event.wait(1.0)
+
+    def start(self):
+        """Получает токен и запускает фоновое упреждающее обновление."""
+
+        self.token()
+        self.refresher = threading.Thread(target=self.refresh_loop, name="token-refresher", daemon=True)
+        self.refresher.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.refresher:
+            self.refresher.join()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("auth", "Аутентификация в API")
+    group.addoption("--auth-login-url", default=None,
+                    help="Адрес эндпоинта входа (по умолчанию BASE_URL/login)")
+    group.addoption("--auth-cache", default=None,
+                    help="Файл общего для воркеров кэша токена")
+    group.addoption("--auth-refresh-margin", type=float, default=30.0,
+                    help="За сколько секунд до истечения обновлять токен")
+
+
+@pytest.fixture(scope="session")
+def token_provider(request):
+    """Провайдер токена, общий для всех тестов сессии."""
+
+    config = request.config
+    login_url = config.getoption("--auth-login-url")
+    if login_url is None:
+        base_url = os.environ.get("BASE_URL", "https://jsonplaceholder.typicode.com")
+        login_url = f"{base_url.rstrip('/')}/login"
+    username = os.environ.get("AUTH_USERNAME")
+    password = os.environ.get("AUTH_PASSWORD")
+    if not username or not password:
+        pytest.skip("Не заданы AUTH_USERNAME и AUTH_PASSWORD")
+
+    provider = TokenProvider(login_url, username, password, config.getoption("--auth-cache"),
+                             config.getoption("--auth-refresh-margin")).start()
+    yield provider
+    provider.stop()
+
+
+@pytest.fixture
+def auth_headers(token_provider):
+    """Заголовки с действующим токеном."""
+
+    return token_provider.headers()
@@ -0,0 +1,362 @@
+"""История замеров производительности и статистический контроль регрессий.
+
+Каждый замер (например, время ответа GET /users/1) сохраняется в локальную
+базу SQLite вместе с номером запуска. Выборка текущего запуска сравнивается
+с объединенной выборкой последних запусков (окно baseline) односторонним
+U-критерием Манна — Уитни. Регрессией считается только изменение, которое
+одновременно статистически значимо (p < alpha) и заметно по величине:
+медиана выросла больше чем на min_effect, а дельта Клиффа выше порога.
+Замеры внутри одного запуска коррелированы (нагрузка агента, сеть), поэтому
+медиана текущего запуска к тому же должна выйти за контрольную границу
+медиан запусков окна (среднее + 4 стандартных отклонения: контрольная карта
+Шухарта с запасом на малое число запусков), а в окне должно быть не меньше
+min_runs запусков.
+Поэтому шум сам по себе сборку не роняет.
+
+Использование в тесте:
+
+    def test_something(perf_benchmark):
+        for _ in range(20):
+            perf_benchmark.measure("get_user", lambda: requests.get(url))
+
+    pytest tests/api --benchmark-gate --benchmark-db=.benchmarks/history.sqlite
+"""
+
+import html
+import math
+import os
+import sqlite3
+import statistics
+import time
+from dataclasses import dataclass
+
+import allure
+import pytest
+
+DEFAULT_DB_PATH = os.path.join(".benchmarks", "history.sqlite")
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    benchmark TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_benchmark ON samples(benchmark, run_id);
+"""
+
+
+class HistoryStore:
+    """Файловая история выборок замеров по запускам."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def start_run(self, label=None):
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started, label) VALUES (?, ?)", (time.time(), label)
+            )
+        return cursor.lastrowid
+
+    def add_samples(self, run_id, benchmark, values):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO samples (run_id, benchmark, value) VALUES (?, ?, ?)",
+                [(run_id, benchmark, float(value)) for value in values]
+            )
+
+    def samples(self, run_id, benchmark):
+        rows = self.connection.execute(
+            "SELECT value FROM samples WHERE run_id = ? AND benchmark = ?", (run_id, benchmark)
+        )
+        return [value for (value,) in rows]
+
+    def previous_runs(self, benchmark, before_run_id, window):
+        """Номера последних window запусков с этим замером, от старых к новым."""
+
+        rows = self.connection.execute(
+            "SELECT DISTINCT run_id FROM samples WHERE benchmark = ? AND run_id < ? "
+            "ORDER BY run_id DESC LIMIT ?", (benchmark, before_run_id, window)
+        )
+        return sorted(run_id for (run_id,) in rows)
+
+    def baseline(self, benchmark, before_run_id, window):
+        """Выборки запусков окна: список списков, по одному на запуск."""
+
+        run_ids = self.previous_runs(benchmark, before_run_id, window)
+        return [self.samples(run_id, benchmark) for run_id in run_ids]
+
+    def trend(self, benchmark, until_run_id, window):
+        """Медианы по запускам (окно + текущий) для отчета о тренде."""
+
+        run_ids = self.previous_runs(benchmark, until_run_id, window) + [until_run_id]
+        trend = []
+        for run_id in run_ids:
+            values = self.samples(run_id, benchmark)
+            if values:
+                trend.append((run_id, statistics.median(values)))
+        return trend
+
+    def close(self):
+        self.connection.close()
+
+
+def mann_whitney_greater(current, baseline):
+    """Односторонний U-критерий: значения current стохастически больше baseline?
+
+    Возвращает (U, p_value) в нормальном приближении с поправкой на
+    совпадающие ранги и поправкой на непрерывность.
+    """
+
+    n1, n2 = len(current), len(baseline)
+    combined = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+
+    # Средние ранги для совпадающих значений
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    index = 0
+    while index < len(combined):
+        end = index
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[index][0]:
+            end += 1
+        rank = (index + end) / 2 + 1
+        for position in range(index, end + 1):
+            ranks[position] = rank
+        size = end - index + 1
+        tie_term += size ** 3 - size
+        index = end + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@dataclass
+class Comparison:
+    """Результат сравнения выборки текущего запуска с окном baseline."""
+
+    benchmark: str
+    current_median: float
+    baseline_median: float
+    current_n: int
+    baseline_n: int
+    baseline_runs: int
+    p_value: float
+    cliffs_delta: float
+    regression: bool
+
+    @property
+    def change(self):
+        if not self.baseline_median:
+            return 0.0
+        return self.current_median / self.baseline_median - 1
+
+    def describe(self):
+        verdict = "РЕГРЕССИЯ" if self.regression else "ok"
+        return (
+            f"{self.benchmark}: медиана {self.current_median * 1000:.1f} мс "
+            f"(baseline {self.baseline_median * 1000:.1f} мс, {self.change:+.1%}), "
+            f"p={self.p_value:.4f}, δ={self.cliffs_delta:+.2f}, "
+            f"n={self.current_n}/{self.baseline_n} ({self.baseline_runs} запусков) — {verdict}"
+        )
+
+
+def compare(benchmark, current, baseline_runs, alpha=0.01, min_effect=0.10, min_delta=0.33,
+            min_samples=5, min_runs=3):
+    """Сравнивает выборку с выборками запусков окна; None, если данных недостаточно."""
+
+    baseline_runs = [run for run in baseline_runs if run]
+    baseline = [value for run in baseline_runs for value in run]
+    if len(current) < min_samples or len(baseline) < min_samples:
+        return None
+    u, p_value = mann_whitney_greater(current, baseline)
+    # Дельта Клиффа: P(current > baseline) - P(current < baseline)
+    cliffs_delta = 2 * u / (len(current) * len(baseline)) - 1
+    comparison = Comparison(
+        benchmark=benchmark,
+        current_median=statistics.median(current),
+        baseline_median=statistics.median(baseline),
+        current_n=len(current),
+        baseline_n=len(baseline),
+        baseline_runs=len(baseline_runs),
+        p_value=p_value,
+        cliffs_delta=cliffs_delta,
+        regression=False,
+    )
+    run_medians = [statistics.median(run) for run in baseline_runs]
+    control_limit = statistics.mean(run_medians) + 4 * (
+        statistics.stdev(run_medians) if len(run_medians) > 1 else 0.0
+    )
+    comparison.regression = (
+        len(baseline_runs) >= min_runs
+        and p_value < alpha
+        and comparison.change > min_effect
+        and cliffs_delta > min_delta
+        and comparison.current_median > control_limit
+    )
+    return comparison
+
+
+def sparkline(values):
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = high - low or 1.0
+    return "".join(SPARK_CHARS[int((value - low) / span * (len(SPARK_CHARS) - 1))] for value in values)
+
+
+def trend_text(benchmark, trend, comparison):
+    medians = [median for _, median in trend]
+    lines = [f"{benchmark}: {sparkline(medians)}"]
+    lines += [f"  запуск #{run_id}: медиана {median * 1000:.1f} мс" for run_id, median in trend]
+    lines.append(comparison.describe() if comparison else "  недостаточно истории для сравнения")
+    return "\n".join(lines)
+
+
+def trend_html(benchmark, trend, comparison):
+    """Компактный HTML-отчет: SVG-линия медиан и таблица запусков."""
+
+    medians = [median for _, median in trend]
+    width, height = 320, 60
+    points = ""
+    if medians:
+        low, high = min(medians), max(medians)
+        span = high - low or 1.0
+        step = width / max(1, len(medians) - 1)
+        points = " ".join(
+            f"{index * step:.1f},{height - (median - low) / span * (height - 10) - 5:.1f}"
+            for index, median in enumerate(medians)
+        )
+    rows = "".join(
+        f"<tr><td>#{run_id}</td><td>{median * 1000:.1f} мс</td></tr>" for run_id, median in trend
+    )
+    verdict = html.escape(comparison.describe() if comparison else "недостаточно истории для сравнения")
+    color = "#c0392b" if comparison and comparison.regression else "#2e86c1"
+    return (
+        f"<html><body><h3>{html.escape(benchmark)}</h3>"
+        f"<svg width='{width}' height='{height}'><polyline fill='none' stroke='{color}' "
+        f"stroke-width='2' points='{points}'/></svg>"
+        f"<p>{verdict}</p><table border='1' cellpadding='3'>"
+        f"<tr><th>Запуск</th><th>Медиана</th></tr>{rows}</table></body></html>"
+    )
+
+
+class BenchmarkRecorder:
+    """Собирает выборки замеров одного теста."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, name, value):
+        self.samples.setdefault(name, []).append(value)
+
+    def measure(self, name, func, *args, **kwargs):
+        """Выполняет func, записывает длительность в секундах и возвращает результат."""
+
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.record(name, time.perf_counter() - start)
+        return result
+
+
+class BenchmarkSession:
+    """Общее для сессии состояние: база истории, текущий запуск и результаты сравнений."""
+
+    def __init__(self, config):
+        self.config = config
+        self.store = None
+        self.run_id = None
+        self.comparisons = []
+
+    def ensure_run(self):
+        if self.store is None:
+            self.store = HistoryStore(self.config.getoption("--benchmark-db"))
+            self.run_id = self.store.start_run(self.config.getoption("--benchmark-label"))
+        return self.store
+
+    def submit(self, recorder):
+        """Сохраняет выборки теста, сравнивает их с историей и прикладывает тренд к Allure."""
+
+        if not recorder.samples:
+            return
+        store = self.ensure_run()
+        window = self.config.getoption("--benchmark-window")
+        for name, values in recorder.samples.items():
+            store.add_samples(self.run_id, name, values)
+            comparison = compare(
+                name, values, store.baseline(name, self.run_id, window),
+                alpha=self.config.getoption("--benchmark-alpha"),
+                min_effect=self.config.getoption("--benchmark-min-effect"),
+                min_runs=self.config.getoption("--benchmark-min-runs"),
+            )
+            if comparison:
+                self.comparisons.append(comparison)
+            trend = store.trend(name, self.run_id, window)
+            allure.attach(trend_text(name, trend, comparison), name=f"Тренд {name}",
+                          attachment_type=allure.attachment_type.TEXT)
+            allure.attach(trend_html(name, trend, comparison), name=f"Тренд {name} (HTML)",
+                          attachment_type=allure.attachment_type.HTML)
+
+    @property
+    def regressions(self):
+        return [comparison for comparison in self.comparisons if comparison.regression]
+
+    def pytest_sessionfinish(self, session):
+        if self.store is not None:
+            self.store.close()
+        if self.regressions and self.config.getoption("--benchmark-gate"):
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.comparisons:
+            return
+        terminalreporter.section("benchmarks")
+        for comparison in self.comparisons:
+            terminalreporter.write_line(comparison.describe(), red=comparison.regression)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks", "История замеров и контроль регрессий")
+    group.addoption("--benchmark-db", default=DEFAULT_DB_PATH,
+                    help="Файл SQLite с историей замеров")
+    group.addoption("--benchmark-label", default=os.environ.get("BUILD_TAG"),
+                    help="Метка запуска в истории (по умолчанию BUILD_TAG из Jenkins)")
+    group.addoption("--benchmark-window", type=int, default=10,
+                    help="Сколько прошлых запусков входит в baseline")
+    group.addoption("--benchmark-alpha", type=float, default=0.01,
+                    help="Уровень значимости U-критерия")
+    group.addoption("--benchmark-min-effect", type=float, default=0.10,
+                    help="Минимальный рост медианы, считающийся регрессией (0.10 = 10%%)")
+    group.addoption("--benchmark-min-runs", type=int, default=3,
+                    help="Сколько прошлых запусков нужно, чтобы признать регрессию")
+    group.addoption("--benchmark-gate", action="store_true",
+                    help="Завершать сессию с ошибкой при значимой регрессии")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(BenchmarkSession(config), "benchmark-session")
+
+
+@pytest.fixture
+def perf_benchmark(request):
+    """Записывает замеры теста в историю и сравнивает их с прошлыми запусками."""
+
+    recorder = BenchmarkRecorder()
+    yield recorder
+    request.config.pluginmanager.get_plugin("benchmark-session").submit(recorder)
@@ -0,0 +1,534 @@
+"""Постоянный теплый процесс pytest для быстрых повторных прогонов.
+
+Каждый запуск pytest заново импортирует requests, jsonschema, selenium и
+allure, собирает тесты, устанавливает соединения с BASE_URL, а для UI-
+тестов запускает Chrome. Демон делает это один раз и дальше выполняет
+прогоны в своем процессе через pytest.main():
+    - сторонние модули и плагины остаются импортированными;
+    - кэш DNS и общий пул соединений (utils.warmup) живут между прогонами,
+      соединения с BASE_URL открываются заранее;
+    - фикстура browser под демоном получает один браузер на все прогоны.
+
+Перед каждым прогоном демон проверяет время изменения файлов проекта,
+уже загруженных в процесс. Если файл изменился или изменилось окружение
+клиента (тесты читают BASE_URL при импорте), модули проекта выгружаются и
+импортируются заново; сторонние библиотеки не перезагружаются.
+
+Клиент — тонкая команда без тяжелых импортов: передает аргументы pytest
+и печатает вывод прогона по мере его поступления.
+
+    python -m utils.daemon serve &
+    python -m utils.daemon run tests/api -k users      # аргументы как у pytest
+    python -m utils.daemon stop
+    python -m utils.daemon bench tests/api/test_auth.py   # холодный запуск против теплого
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import re
+import shlex
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_SOCKET = os.environ.get("PYTEST_DAEMON_SOCKET", ".pytest-daemon.sock")
+# Строка результата теста в выводе pytest -v
+RESULT_LINE = re.compile(r" (PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b")
+# Модули, которые не выгружаются при перезагрузке проекта: сам демон
+PERSISTENT_MODULES = {"__main__", "utils.daemon"}
+# Переменные оболочки, которые меняются от вызова к вызову и не влияют на тесты
+SHELL_VARIABLES = {"_", "SHLVL", "PWD", "OLDPWD", "COLUMNS", "LINES"}
+# Тяжелые зависимости, импортируемые при старте демона
+WARM_IMPORTS = ["pytest", "requests", "jsonschema", "allure", "selenium.webdriver", "webdriver_manager.chrome"]
+
+
+def send(stream, message):
+    stream.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def connect(path, timeout=None):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    sock.settimeout(None)
+    return sock
+
+
+def request(path, message):
+    """Отправляет команду демону; генератор ответных сообщений."""
+
+    with connect(path) as sock, sock.makefile("rwb") as stream:
+        send(stream, message)
+        for line in stream:
+            yield json.loads(line)
+
+
+class Channel:
+    """Поток сообщений клиенту; после отключения клиента сообщения отбрасываются."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.closed = False
+
+    def send(self, message):
+        if self.closed:
+            return
+        try:
+            # Без буфера: сообщение уходит сразу, и после обрыва в буфере ничего не остается
+            self.sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        except OSError:
+            # Клиент отключился: прогон доводится до конца без вывода
+            self.closed = True
+
+
+class OutputStream:
+    """Файл для sys.stdout на время прогона: вывод pytest уходит клиенту."""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def write(self, text):
+        if text:
+            self.channel.send({"event": "output", "text": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class ResultStream:
+    """Плагин прогона: результат каждого теста отдельным сообщением."""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call" or report.outcome != "passed":
+            self.channel.send({"event": "result", "nodeid": report.nodeid, "when": report.when,
+                              "outcome": report.outcome, "duration": report.duration})
+
+
+class WarmResources:
+    """Ресурсы, которые живут дольше одного прогона: кэш DNS, пул соединений, браузер."""
+
+    def __init__(self, dns_cache=None, pool=None):
+        self.dns_cache = dns_cache
+        self.pool = pool
+        self.driver = None
+
+    def browser(self, factory):
+        """Живой браузер демона; factory запускает новый, если прежний закрыт или упал."""
+
+        if self.driver is not None:
+            try:
+                # Состояние предыдущего модуля не должно влиять на следующий
+                self.driver.delete_all_cookies()
+                self.driver.get("about:blank")
+                return self.driver
+            except Exception:
+                self.quit_browser()
+        self.driver = factory()
+        return self.driver
+
+    def quit_browser(self):
+        if self.driver is not None:
+            with contextlib.suppress(Exception):
+                self.driver.quit()
+            self.driver = None
+
+    def pytest_sessionstart(self, session):
+        # utils.warmup мог быть перезагружен: cold_session() должен видеть кэш демона
+        if self.dns_cache is not None:
+            import utils.warmup
+
+            utils.warmup.dns_cache = self.dns_cache
+
+
+class DaemonSession:
+    """Плагин одного прогона: регистрирует ресурсы демона под именем warm-daemon."""
+
+    def __init__(self, resources, channel=None):
+        self.resources = resources
+        self.channel = channel
+
+    def pytest_configure(self, config):
+        config.pluginmanager.register(self.resources, "warm-daemon")
+        if self.channel is not None:
+            config.pluginmanager.register(ResultStream(self.channel), "daemon-results")
+
+
+class ModuleWatcher:
+    """Следит за временем изменения файлов проекта, загруженных в процесс."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root) + os.sep
+        self.mtimes = {}
+
+    def project_modules(self):
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if not path or name in PERSISTENT_MODULES:
+                continue
+            path = os.path.abspath(path)
+            if path.startswith(self.root) and "site-packages" not in path:
+                yield name, path
+
+    def snapshot(self):
+        self.mtimes = {}
+        for name, path in self.project_modules():
+            with contextlib.suppress(OSError):
+                self.mtimes[name] = (path, os.stat(path).st_mtime_ns)
+
+    def changed(self):
+        changed = []
+        for path, mtime in self.mtimes.values():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                changed.append(os.path.relpath(path, self.root))
+        return sorted(changed)
+
+    def unload(self):
+        """Выгружает модули проекта; следующий прогон импортирует их заново."""
+
+        names = [name for name, _ in self.project_modules()]
+        # requests переживает перезагрузку: без отката новый http_hooks обернул бы старую обертку send
+        if "utils.http_hooks" in names:
+            sys.modules["utils.http_hooks"].uninstall()
+        for name in names:
+            del sys.modules[name]
+        importlib.invalidate_caches()
+        self.mtimes = {}
+        return names
+
+
+class Daemon:
+    """Сервер на unix-сокете: прогоны выполняются в его процессе по одному."""
+
+    def __init__(self, path, preload=("tests",), dns_cache_ttl=300.0, prewarm_urls=(), prewarm_connections=4):
+        self.path = path
+        self.preload = list(preload)
+        self.dns_cache_ttl = dns_cache_ttl
+        self.prewarm_urls = list(prewarm_urls)
+        self.prewarm_connections = prewarm_connections
+        self.root = os.getcwd()
+        self.watcher = ModuleWatcher(self.root)
+        self.resources = None
+        self.env = None
+        self.runs = 0
+        self.stopping = False
+
+    def log(self, text):
+        print(f"[демон] {text}", flush=True)
+
+    def warm_up(self):
+        """Импорты, кэш DNS, пул соединений и предварительный сбор тестов."""
+
+        start = time.perf_counter()
+        for name in WARM_IMPORTS:
+            try:
+                importlib.import_module(name)
+            except ImportError as error:
+                self.log(f"{name} не импортирован: {error}")
+
+        from utils.warmup import DnsCache, SharedPool
+
+        dns_cache = DnsCache(self.dns_cache_ttl) if self.dns_cache_ttl > 0 else None
+        if dns_cache:
+            dns_cache.install()
+        pool = SharedPool(maxsize=max(10, self.prewarm_connections))
+        pool.install()
+        self.resources = WarmResources(dns_cache, pool)
+        # utils.warmup — плагин pytest: пусть pytest импортирует его сам, с перезаписью assert
+        sys.modules.pop("utils.warmup", None)
+
+        urls = self.prewarm_urls or [os.environ.get("BASE_URL", "https://jsonplaceholder.typicode.com")]
+        if self.prewarm_connections > 0:
+            for url in urls:
+                try:
+                    elapsed = pool.prewarm(url, self.prewarm_connections, timeout=5)
+                    self.log(f"прогрев {url}: {self.prewarm_connections} соединений за {elapsed * 1000:.0f} мс")
+                except Exception as error:
+                    # Прогрев — оптимизация: недоступный хост проявится в самих тестах
+                    self.log(f"прогрев {url} не удался: {error}")
+
+        if self.preload:
+            # Сбор без запуска импортирует conftest, плагины и модули тестов
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                self.pytest_main(["--collect-only", "-q", "-p", "no:cacheprovider", *self.preload], None)
+        self.watcher.snapshot()
+        self.env = dict(os.environ)
+        return time.perf_counter() - start
+
+    def pytest_main(self, args, channel):
+        import pytest
+
+        return int(pytest.main(list(args), plugins=[DaemonSession(self.resources, channel)]))
+
+    def reload_reason(self, env):
+        changed = self.watcher.changed()
+        if changed:
+            return "изменены " + ", ".join(changed[:5]) + (f" и еще {len(changed) - 5}" if len(changed) > 5 else "")
+        if env is not None:
+            keys = sorted(key for key in env.keys() | self.env.keys()
+                          if key not in SHELL_VARIABLES and env.get(key) != self.env.get(key))
+            if keys:
+                return "изменилось окружение: " + ", ".join(keys[:5])
+        return None
+
+    def run(self, message, channel):
+        env = message.get("env")
+        reason = self.reload_reason(env)
+        if reason:
+            unloaded = self.watcher.unload()
+            channel.send({"event": "output", "text": f"[демон] перезагружено модулей проекта: {len(unloaded)} "
+                                                     f"({reason})\n"})
+        if env is not None and env != self.env:
+            os.environ.clear()
+            os.environ.update(env)
+            self.env = dict(env)
+
+        output = OutputStream(channel)
+        cwd = os.getcwd()
+        start = time.perf_counter()
+        try:
+            os.chdir(message.get("cwd") or self.root)
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                code = self.pytest_main(message.get("args", []), channel)
+        except Exception as error:
+            channel.send({"event": "output", "text": f"[демон] ошибка прогона: {type(error).__name__}: {error}\n"})
+            code = 3
+        finally:
+            os.chdir(cwd)
+        self.runs += 1
+        self.watcher.snapshot()
+        channel.send({"event": "exit", "code": code, "duration": time.perf_counter() - start,
+                      "reloaded": bool(reason)})
+
+    def handle(self, conn):
+        with conn, conn.makefile("rb") as stream:
+            line = stream.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            channel = Channel(conn)
+            command = message.get("command")
+            if command == "run":
+                self.run(message, channel)
+            elif command == "status":
+                channel.send({"event": "status", "pid": os.getpid(), "root": self.root, "runs": self.runs})
+            elif command == "stop":
+                self.stopping = True
+                channel.send({"event": "stopped"})
+            else:
+                channel.send({"event": "error", "text": f"Неизвестная команда {command!r}"})
+
+    def check_running(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            connect(self.path, timeout=1).close()
+        except OSError:
+            # Сокет остался от упавшего демона
+            os.unlink(self.path)
+        else:
+            raise RuntimeError(f"Демон уже запущен: {self.path}")
+
+    def serve_forever(self):
+        self.check_running()
+        elapsed = self.warm_up()
+        # Сокет появляется только после прогрева: клиент, дождавшийся его, попадает в теплый процесс
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen(8)
+        self.log(f"готов за {elapsed:.2f} с, сокет {self.path}")
+        try:
+            # Прогоны выполняются по очереди: pytest.main не рассчитан на параллельный вызов
+            while not self.stopping:
+                conn, _ = server.accept()
+                try:
+                    self.handle(conn)
+                except (OSError, ValueError) as error:
+                    self.log(f"ошибка соединения: {error}")
+        finally:
+            server.close()
+            with contextlib.suppress(OSError):
+                os.unlink(self.path)
+            self.resources.quit_browser()
+            self.resources.pool.uninstall()
+            if self.resources.dns_cache:
+                self.resources.dns_cache.uninstall()
+
+
+def wait_ready(path, timeout=60.0, process=None):
+    """Ждет, пока демон начнет отвечать на status; возвращает его ответ."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Демон завершился с кодом {process.returncode}")
+        try:
+            return next(request(path, {"command": "status"}))
+        except (OSError, StopIteration):
+            time.sleep(0.05)
+    raise TimeoutError(f"Демон не ответил за {timeout:.0f} с")
+
+
+def run_client(path, args):
+    """Отправляет прогон демону и печатает вывод; возвращает код завершения pytest."""
+
+    if sys.stdout.isatty() and not any(arg.startswith("--color") for arg in args):
+        args = ["--color=yes", *args]
+    message = {"command": "run", "args": args, "cwd": os.getcwd(), "env": dict(os.environ)}
+    try:
+        for event in request(path, message):
+            if event["event"] == "output":
+                sys.stdout.write(event["text"])
+                sys.stdout.flush()
+            elif event["event"] == "exit":
+                return event["code"]
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"Демон не запущен ({path}): python -m utils.daemon serve", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Вывод обрезан (например, | head): демон доведет прогон до конца сам
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    print("Демон прервал соединение до конца прогона", file=sys.stderr)
+    return 3
+
+
+def time_to_first_result(command, env=None):
+    """(первый результат, весь прогон, код) для команды, печатающей вывод pytest -v."""
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    first = None
+    for line in process.stdout:
+        if first is None and RESULT_LINE.search(line):
+            first = time.perf_counter() - start
+    process.wait()
+    total = time.perf_counter() - start
+    return first if first is not None else total, total, process.returncode
+
+
+def benchmark(selection, repeat=3, path=None, serve_args=()):
+    """Медианы времени до первого результата и всего прогона: новый процесс pytest против демона."""
+
+    path = path or f".pytest-daemon-bench-{os.getpid()}.sock"
+    daemon = subprocess.Popen([sys.executable, "-m", "utils.daemon", "--socket", path, "serve", *serve_args],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(path, process=daemon)
+        cold = [time_to_first_result([sys.executable, "-m", "pytest", "-v", *selection]) for _ in range(repeat)]
+        warm = [time_to_first_result([sys.executable, "-m", "utils.daemon", "--socket", path, "run", "-v", *selection])
+                for _ in range(repeat)]
+    finally:
+        with contextlib.suppress(OSError, StopIteration):
+            next(request(path, {"command": "stop"}))
+        daemon.wait(timeout=30)
+
+    def summary(runs):
+        return {"first_result": statistics.median(run[0] for run in runs),
+                "total": statistics.median(run[1] for run in runs),
+                "codes": [run[2] for run in runs]}
+
+    return {"cold": summary(cold), "warm": summary(warm)}
+
+
+def benchmark_report(result):
+    cold, warm = result["cold"], result["warm"]
+    return "\n".join([
+        f"{'':<10} {'первый результат, с':>20} {'весь прогон, с':>15}",
+        f"{'холодный':<10} {cold['first_result']:>20.2f} {cold['total']:>15.2f}",
+        f"{'теплый':<10} {warm['first_result']:>20.2f} {warm['total']:>15.2f}",
+        f"Ускорение до первого результата: x{cold['first_result'] / warm['first_result']:.1f}",
+    ])
+
+
+def split_command(argv):
+    """Делит командную строку на аргументы демона и аргументы pytest.
+
+    Подкоманда — первый аргумент, не являющийся опцией или значением
+    --socket. Все после run и bench передается pytest, кроме опций bench
+    в самом начале (--repeat); "--" перед аргументами pytest отбрасывается.
+    """
+
+    index = 0
+    while index < len(argv) and argv[index].startswith("-"):
+        index += 2 if argv[index] == "--socket" else 1
+    if index >= len(argv) or argv[index] not in ("run", "bench"):
+        return argv, []
+    head, tail = argv[:index + 1], argv[index + 1:]
+    if argv[index] == "bench":
+        while tail and tail[0].split("=")[0] == "--repeat":
+            size = 1 if "=" in tail[0] else 2
+            head, tail = head + tail[:size], tail[size:]
+    if tail[:1] == ["--"]:
+        tail = tail[1:]
+    return head, tail
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Теплый демон pytest")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Путь к unix-сокету демона")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Запустить демон в текущем каталоге проекта")
+    serve.add_argument("--preload", default="tests",
+                       help="Аргументы pytest для сбора при старте, чтобы импортировать модули тестов")
+    serve.add_argument("--dns-cache-ttl", type=float, default=300.0)
+    serve.add_argument("--prewarm-url", action="append", default=[],
+                       help="URL для прогрева соединений (по умолчанию BASE_URL)")
+    serve.add_argument("--prewarm-connections", type=int, default=4)
+
+    commands.add_parser("run", help="Выполнить прогон в демоне; остальные аргументы передаются pytest")
+    commands.add_parser("status", help="Состояние демона")
+    commands.add_parser("stop", help="Остановить демон")
+
+    bench = commands.add_parser("bench", help="Время до первого результата: холодный pytest против демона; "
+                                              "остальные аргументы передаются pytest")
+    bench.add_argument("--repeat", type=int, default=3)
+    argv = sys.argv[1:] if argv is None else list(argv)
+    daemon_args, pytest_args = split_command(argv)
+    args = parser.parse_args(daemon_args)
+
+    if args.command == "serve":
+        daemon = Daemon(args.socket, shlex.split(args.preload), args.dns_cache_ttl, args.prewarm_url, args.prewarm_connections)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == "run":
+        return run_client(args.socket, pytest_args)
+    if args.command == "bench":
+        paths = [arg for arg in pytest_args if os.path.exists(arg.split("::")[0])]
+        print(benchmark_report(benchmark(pytest_args, args.repeat, serve_args=["--preload", shlex.join(paths)])))
+        return 0
+    try:
+        for event in request(args.socket, {"command": args.command}):
+            print(json.dumps(event, ensure_ascii=False))
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"Демон не запущен ({args.socket})", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
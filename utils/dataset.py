@@ -0,0 +1,287 @@
+"""Синтетический набор из миллионов пользователей для локального стенда.
+
+Пользователи не хранятся целиком: запись собирается по id детерминированно,
+а в памяти лежат только индексы.
+    username — отсортированный список значений в нижнем регистре и
+               параллельный массив id: равенство и префикс ищутся бисекцией;
+    name     — хеш-индекс значение -> массив id и отсортированный список
+               различных значений для поиска по префиксу;
+    address.city — хеш-индекс.
+Первые 10 пользователей совпадают со стандартным набором стенда, поэтому
+запросы к ним из tests/api дают на большом наборе те же ответы.
+
+Фильтры GET /users, как в json-server (на нем работает JSONPlaceholder):
+    ?username=Bret                      равенство (несколько значений — ИЛИ)
+    ?name_like=^Leanne                  префикс без учета регистра (по индексу)
+    ?email_like=april                   регулярное выражение (полный перебор)
+    ?_page=2&_limit=50                  пагинация, всего — в X-Total-Count
+Поля без индекса фильтруются полным перебором записей.
+
+    python -m utils.stub_server --dataset-size 1000000
+    python -m utils.dataset --sizes 10000,100000,1000000   # замер пропускной способности
+"""
+
+import argparse
+import bisect
+import sys
+import time
+from array import array
+
+from utils.stub_server import _SEED, compile_filters, default_users, make_user
+
+FIRST_NAMES = [
+    "Aaliyah", "Abel", "Ada", "Adrian", "Aiden", "Alba", "Alec", "Alma", "Amos", "Anika",
+    "Arlo", "Ava", "Basil", "Bea", "Bruno", "Cara", "Cyrus", "Dara", "Dov", "Edda",
+    "Elio", "Emil", "Esme", "Ezra", "Faye", "Finn", "Gia", "Gus", "Hana", "Hugo",
+    "Ida", "Igor", "Ines", "Ivo", "Jana", "Jude", "Kai", "Kira", "Lars", "Lea",
+    "Lior", "Luka", "Mara", "Milo", "Nadia", "Nils", "Noa", "Olga", "Omar", "Otto",
+]
+LAST_NAMES = [
+    "Abbott", "Adler", "Baxter", "Becker", "Brandt", "Carver", "Dalton", "Decker", "Eaton", "Ellis",
+    "Farrow", "Fischer", "Garner", "Gibbs", "Hale", "Harper", "Ingram", "Irwin", "Jansen", "Jensen",
+    "Kemp", "Keller", "Lang", "Larsen", "Mercer", "Moss", "Nash", "Novak", "Oakley", "Olsen",
+    "Park", "Pratt", "Quinn", "Reyes", "Roth", "Sauer", "Stone", "Thorne", "Tate", "Ulrich",
+    "Vance", "Voss", "Wade", "Weber", "Wolfe", "Xu", "Yates", "Young", "Zeller", "Ziegler",
+]
+CITIES = [
+    "Alderport", "Brookvale", "Cedarfield", "Dunmore", "Eastwick", "Fairhaven", "Glenrock", "Hillcrest",
+    "Ironwood", "Juniper", "Kingsbridge", "Lakeside", "Millbrook", "Northgate", "Oakridge", "Pinecrest",
+    "Queensbury", "Riverton", "Stonebridge", "Thornbury", "Upton", "Valemont", "Westfield", "Yarrow",
+]
+DOMAINS = ["example.com", "mail.test", "corp.example", "users.test"]
+
+# Размер блока при переборе записей: запись не накапливается в памяти целиком
+SCAN_BLOCK = 4096
+
+
+def mix(value):
+    """Детерминированное перемешивание id (мультипликативный хеш Кнута)."""
+
+    return (value * 2654435761) & 0xFFFFFFFF
+
+
+def synthetic_fields(user_id):
+    """(name, username, email, city, company) пользователя с id > 10."""
+
+    h = mix(user_id)
+    first = FIRST_NAMES[h % len(FIRST_NAMES)]
+    last = LAST_NAMES[(h >> 8) % len(LAST_NAMES)]
+    username = f"{first}.{last}{user_id}"
+    email = f"{first.lower()}.{last.lower()}{user_id}@{DOMAINS[(h >> 16) % len(DOMAINS)]}"
+    return f"{first} {last}", username, email, CITIES[(h >> 20) % len(CITIES)], f"{last} Group"
+
+
+def fields(user_id):
+    if user_id <= len(_SEED):
+        return _SEED[user_id - 1]
+    return synthetic_fields(user_id)
+
+
+class SyntheticUsers:
+    """Хранилище стенда с индексами по username, name и address.city."""
+
+    def __init__(self, count):
+        self.count = count
+        self.defaults = {user["id"]: user for user in default_users()}
+        self.created_id = count + 1
+        start = time.perf_counter()
+        self.build_indexes()
+        self.build_time = time.perf_counter() - start
+
+    def build_indexes(self):
+        usernames = []
+        by_name = {}
+        by_city = {}
+        for user_id in range(1, self.count + 1):
+            name, username, _, city, _ = fields(user_id)
+            usernames.append((username, user_id))
+            by_name.setdefault(name, array("I")).append(user_id)
+            by_city.setdefault(city, array("I")).append(user_id)
+        # _like в json-server не учитывает регистр, поэтому индексы префиксов — в нижнем регистре
+        usernames = sorted((username.lower(), user_id) for username, user_id in usernames)
+        self.usernames = [username for username, _ in usernames]
+        self.username_ids = array("I", (user_id for _, user_id in usernames))
+        self.by_name = by_name
+        self.names = sorted((name.lower(), name) for name in by_name)
+        self.name_keys = [key for key, _ in self.names]
+        self.by_city = by_city
+
+    def get(self, user_id):
+        if not 1 <= user_id <= self.count:
+            return None
+        if user_id in self.defaults:
+            return self.defaults[user_id]
+        return make_user(user_id, *fields(user_id))
+
+    # Поиск по индексам: каждая функция возвращает итерируемые id или None, если индекса нет
+
+    def username_range(self, low, high):
+        start = bisect.bisect_left(self.usernames, low)
+        end = bisect.bisect_left(self.usernames, high, lo=start)
+        return self.username_ids[start:end]
+
+    def indexed_equal(self, key, value):
+        if key == "id":
+            return [int(value)] if value.isdigit() and 1 <= int(value) <= self.count else []
+        if key == "username":
+            lowered = value.lower()
+            return [user_id for user_id in self.username_range(lowered, lowered + "\0")
+                    if fields(user_id)[1] == value]
+        if key == "name":
+            return self.by_name.get(value, ())
+        if key == "address.city":
+            return self.by_city.get(value, ())
+        return None
+
+    def indexed_prefix(self, key, prefix):
+        prefix = prefix.lower()
+        if key == "username":
+            # "\U0010ffff" больше любого символа: диапазон [prefix, prefix + max)
+            return self.username_range(prefix, prefix + "\U0010ffff")
+        if key == "name":
+            start = bisect.bisect_left(self.name_keys, prefix)
+            end = bisect.bisect_left(self.name_keys, prefix + "\U0010ffff", lo=start)
+            ids = array("I")
+            for _, name in self.names[start:end]:
+                ids.extend(self.by_name[name])
+            return ids
+        return None
+
+    def candidates(self, key, values):
+        """Множество id для фильтра по индексу или None, если нужен перебор."""
+
+        like = key.endswith("_like")
+        field = key[:-5] if like else key
+        ids = set()
+        for value in values:
+            if like:
+                prefix = literal_prefix(value)
+                if prefix is None:
+                    return None
+                found = self.indexed_prefix(field, prefix)
+            else:
+                found = self.indexed_equal(field, value)
+            if found is None:
+                return None
+            ids.update(found)
+        return ids
+
+    def query(self, params):
+        return self.search(params)[0]
+
+    def search(self, params, offset=0, limit=None):
+        """Возвращает (пользователи страницы, всего найдено)."""
+
+        indexed = []
+        scanned = {}
+        for key, values in params.items():
+            ids = self.candidates(key, values)
+            if ids is None:
+                scanned[key] = values
+            else:
+                indexed.append(ids)
+
+        if not indexed and not scanned:
+            end = self.count if limit is None else min(self.count, offset + limit)
+            return [self.get(user_id) for user_id in range(offset + 1, end + 1)], self.count
+
+        if indexed:
+            indexed.sort(key=len)
+            ids = indexed[0].intersection(*indexed[1:])
+            ordered = sorted(ids)
+        else:
+            ordered = range(1, self.count + 1)
+
+        if not scanned:
+            page = ordered[offset:None if limit is None else offset + limit]
+            return [self.get(user_id) for user_id in page], len(ordered)
+
+        # Полный перебор: пользователи собираются и проверяются блоками
+        matcher = compile_filters(scanned)
+        matched, total = [], 0
+        for block_start in range(0, len(ordered), SCAN_BLOCK):
+            for user_id in ordered[block_start:block_start + SCAN_BLOCK]:
+                user = self.get(user_id)
+                if matcher(user):
+                    if total >= offset and (limit is None or len(matched) < limit):
+                        matched.append(user)
+                    total += 1
+        return matched, total
+
+
+REGEX_SPECIAL = set(".^$*+?{}[]|()")
+
+
+def literal_prefix(pattern):
+    """Префикс для шаблона вида ^литерал; None, если шаблон не сводится к префиксу."""
+
+    if not pattern.startswith("^"):
+        return None
+    prefix = []
+    chars = iter(pattern[1:])
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            if not escaped or escaped.isalnum():
+                return None
+            prefix.append(escaped)
+        elif char in REGEX_SPECIAL:
+            return None
+        else:
+            prefix.append(char)
+    return "".join(prefix)
+
+
+def measure(store, queries, repeat=1):
+    """Запросов в секунду для списка (params, offset, limit)."""
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for params, offset, limit in queries:
+            store.search(params, offset, limit)
+    elapsed = time.perf_counter() - start
+    return len(queries) * repeat / elapsed if elapsed else float("inf")
+
+
+def benchmark(size, lookups=2000):
+    """Замер индексированных фильтров и полного перебора на наборе размера size."""
+
+    store = SyntheticUsers(size)
+    step = max(1, size // lookups)
+    ids = range(11, size + 1, step)
+    equality = [({"username": [fields(user_id)[1]]}, 0, None) for user_id in ids]
+    names = [({"name": [fields(user_id)[0]]}, 0, 10) for user_id in ids]
+    prefixes = [({"username_like": [f"^{first}\\.{last[:2]}"]}, 0, 10)
+                for first in FIRST_NAMES[:10] for last in LAST_NAMES[:10]]
+
+    scan_start = time.perf_counter()
+    _, total = store.search({"email_like": ["@users\\.test$"]}, 0, 10)
+    scan_time = time.perf_counter() - scan_start
+    return {
+        "size": size,
+        "build_s": store.build_time,
+        "username_eq_qps": measure(store, equality),
+        "name_eq_page_qps": measure(store, names),
+        "username_prefix_page_qps": measure(store, prefixes),
+        "full_scan_rows_per_s": size / scan_time,
+        "full_scan_matches": total,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пропускная способность фильтров синтетического набора")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args(argv)
+
+    print(f"{'размер':>9} {'индексы, с':>11} {'username=, зап/с':>17} {'name=, зап/с':>13} "
+          f"{'префикс, зап/с':>15} {'перебор, строк/с':>17}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        result = benchmark(size)
+        print(f"{result['size']:>9} {result['build_s']:>11.2f} {result['username_eq_qps']:>17.0f} "
+              f"{result['name_eq_page_qps']:>13.0f} {result['username_prefix_page_qps']:>15.0f} "
+              f"{result['full_scan_rows_per_s']:>17.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
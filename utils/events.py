@@ -0,0 +1,282 @@
+"""Живой поток событий прогона в формате JSONL.
+
+Пока идет прогон, в файл дописывается по строке на событие: начало и
+конец сессии, начало теста, каждая фаза (setup/call/teardown) с исходом
+и длительностью, конец теста с итоговым исходом, числом HTTP-вызовов и
+объемом переданных байт. Результаты видны сразу, не дожидаясь генерации
+Allure в конце стадии.
+
+Поток теста только кладет кортеж в очередь; сериализация и запись на
+диск выполняются фоновым потоком пачками, поэтому тест не ждет диска.
+Файл открывается на дозапись, и шарды могут писать в один файл:
+каждая пачка уходит на диск одним вызовом write.
+
+    pytest tests/api --events-file=test-results/events.jsonl
+    python -m utils.events test-results/events.jsonl --follow   # пропускная способность и ETA
+"""
+
+import argparse
+import collections
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+from utils import http_hooks
+
+# Сколько последних тестов учитывается в скользящей пропускной способности
+THROUGHPUT_WINDOW = 50
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("events", "Живой поток событий прогона")
+    group.addoption("--events-file", default=os.environ.get("PYTEST_EVENTS_FILE"),
+                    help="Дописывать события прогона в JSONL-файл (или PYTEST_EVENTS_FILE)")
+    group.addoption("--events-flush-interval", type=float, default=0.5,
+                    help="Как часто фоновый поток сбрасывает события на диск, секунд")
+
+
+def pytest_configure(config):
+    path = config.getoption("--events-file")
+    if path:
+        config.pluginmanager.register(
+            EventStream(path, config.getoption("--events-flush-interval")), "event-stream")
+
+
+class EventWriter:
+    """Буферизованная запись событий фоновым потоком.
+
+    emit() не выполняет ни сериализации, ни ввода-вывода: событие
+    кладется в очередь, а поток записи раз в flush_interval секунд
+    забирает все накопленное и пишет одной операцией.
+    """
+
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.stopped = threading.Event()
+        self.source = f"{socket.gethostname()}:{os.getpid()}"
+        self.written = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.thread = threading.Thread(target=self.run, name="event-writer", daemon=True)
+        self.thread.start()
+
+    def emit(self, event, fields):
+        self.queue.put((time.time(), event, fields))
+
+    def drain(self):
+        lines = []
+        while True:
+            try:
+                ts, event, fields = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            lines.append(json.dumps({"ts": round(ts, 6), "event": event, "source": self.source, **fields},
+                                    ensure_ascii=False))
+        if lines:
+            os.write(self.fd, ("\n".join(lines) + "\n").encode("utf-8"))
+            self.written += len(lines)
+
+    def run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.drain()
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        self.drain()
+        os.close(self.fd)
+
+
+class EventStream:
+    """Преобразует хуки pytest и HTTP-вызовы в события потока."""
+
+    def __init__(self, path, flush_interval):
+        self.writer = EventWriter(path, flush_interval)
+        self.handle = None
+        self.http_calls = 0
+        self.http_bytes = 0
+        self.phases = {}
+
+    def after_request(self, request, response, elapsed):
+        self.http_calls += 1
+        body = request.body
+        sent = len(body) if body else 0
+        received = 0
+        if response is not None:
+            # Тело не дочитывается ради подсчета: берется уже прочитанное или Content-Length
+            content = response._content
+            if content:
+                received = len(content)
+            else:
+                received = int(response.headers.get("Content-Length") or 0)
+        self.http_bytes += sent + received
+
+    def pytest_sessionstart(self, session):
+        self.handle = http_hooks.register(after=self.after_request)
+
+    def pytest_collection_finish(self, session):
+        self.writer.emit("session_start", {"total": len(session.items)})
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self.http_calls = self.http_bytes = 0
+        self.phases = {}
+        self.writer.emit("test_start", {"nodeid": nodeid})
+
+    def pytest_runtest_logreport(self, report):
+        self.phases[report.when] = report
+        self.writer.emit("phase", {"nodeid": report.nodeid, "when": report.when,
+                                   "outcome": report.outcome, "duration": report.duration})
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        reports = self.phases.values()
+        if any(report.failed for report in reports):
+            outcome = "failed" if self.phases.get("call") and self.phases["call"].failed else "error"
+        elif any(report.skipped for report in reports):
+            outcome = "skipped"
+        else:
+            outcome = "passed"
+        self.writer.emit("test_end", {
+            "nodeid": nodeid,
+            "outcome": outcome,
+            "duration": sum(report.duration for report in reports),
+            "http_calls": self.http_calls,
+            "http_bytes": self.http_bytes,
+        })
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        http_hooks.unregister(self.handle)
+        self.writer.emit("session_end", {"exitstatus": int(exitstatus)})
+        self.writer.close()
+
+
+class ProgressTracker:
+    """Пропускная способность и ETA по событиям потока."""
+
+    def __init__(self, window=THROUGHPUT_WINDOW):
+        self.total = {}
+        self.finished = 0
+        self.outcomes = {}
+        self.http_calls = 0
+        self.http_bytes = 0
+        self.recent = collections.deque(maxlen=window)
+
+    def feed(self, event):
+        kind = event["event"]
+        if kind == "session_start":
+            self.total[event["source"]] = event["total"]
+        elif kind == "test_end":
+            self.finished += 1
+            self.outcomes[event["outcome"]] = self.outcomes.get(event["outcome"], 0) + 1
+            self.http_calls += event["http_calls"]
+            self.http_bytes += event["http_bytes"]
+            self.recent.append(event["ts"])
+
+    def throughput(self):
+        """Тестов в секунду по последним window завершениям."""
+
+        if len(self.recent) < 2 or self.recent[-1] == self.recent[0]:
+            return 0.0
+        return (len(self.recent) - 1) / (self.recent[-1] - self.recent[0])
+
+    def eta(self):
+        """Оценка оставшегося времени в секундах; None, если оценить нельзя."""
+
+        remaining = sum(self.total.values()) - self.finished
+        rate = self.throughput()
+        if remaining <= 0:
+            return 0.0
+        return remaining / rate if rate else None
+
+    def status(self):
+        total = sum(self.total.values())
+        eta = self.eta()
+        outcomes = ", ".join(f"{name}: {count}" for name, count in sorted(self.outcomes.items()))
+        return (f"{self.finished}/{total or '?'} тестов, {self.throughput():.1f} тест/с, "
+                f"ETA {'?' if eta is None else f'{eta:.0f} с'}, HTTP: {self.http_calls} вызовов, "
+                f"{self.http_bytes / 1024:.0f} КБ ({outcomes or 'нет результатов'})")
+
+
+def current_run_offset(path):
+    """Смещение, с которого начинается текущий прогон в файле.
+
+    Файл может хранить завершенные сессии прошлых сборок. Текущими
+    считаются сессии, не завершенные к концу файла: чтение начинается
+    с самого раннего их session_start. Если таких нет, прогон еще не
+    начался и читать нужно с конца файла.
+    """
+
+    started = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            event = json.loads(line)
+            if event["event"] == "session_start":
+                started[event["source"]] = offset
+            elif event["event"] == "session_end":
+                started.pop(event["source"], None)
+            offset += len(line)
+    return min(started.values(), default=offset)
+
+
+def read_events(path, follow=False, poll_interval=0.5, offset=0):
+    """Читает события из файла с offset; с follow ждет новых строк, как tail -f."""
+
+    with open(path, encoding="utf-8") as f:
+        f.seek(offset)
+        buffer = ""
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buffer += chunk
+                if buffer.endswith("\n"):
+                    yield json.loads(buffer)
+                    buffer = ""
+                continue
+            if not follow:
+                return
+            time.sleep(poll_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Прогресс прогона по потоку событий")
+    parser.add_argument("path", help="JSONL-файл событий")
+    parser.add_argument("--follow", action="store_true", help="Следить за файлом до конца сессии")
+    parser.add_argument("--interval", type=float, default=2.0, help="Период вывода статуса, секунд")
+    args = parser.parse_args(argv)
+
+    tracker = ProgressTracker()
+    sessions = set()
+    printed = 0.0
+    # Без follow отчет строится по всему файлу, с follow — только по текущему прогону
+    offset = current_run_offset(args.path) if args.follow else 0
+    for event in read_events(args.path, args.follow, offset=offset):
+        if event["event"] == "session_start":
+            sessions.add(event["source"])
+        elif args.follow and event["source"] not in sessions:
+            continue
+        tracker.feed(event)
+        if event["event"] == "session_end":
+            sessions.discard(event["source"])
+        if event["event"] == "test_end" and event["outcome"] in ("failed", "error"):
+            print(f"{event['outcome'].upper()}: {event['nodeid']}")
+        now = time.monotonic()
+        if args.follow and now - printed >= args.interval:
+            print(tracker.status(), flush=True)
+            printed = now
+        if args.follow and event["event"] == "session_end" and not sessions:
+            break
+    print(tracker.status())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""Генеративный fuzz-движок для POST/PUT /users.
+
+Из JSON-схемы пользователя выводятся тысячи некорректных и вредоносных тел
+запросов: подмена типов, пропуск обязательных полей, сверхдлинные строки,
+пограничные случаи Unicode и векторы внедрения скриптов. Запросы отправляются
+параллельно, а каждый найденный класс ошибки сжимается до минимального тела,
+на котором ошибка все еще воспроизводится.
+
+Запуск вручную против локального стенда:
+    python -m utils.fuzzing --payloads 5000 --workers 32 --strict
+"""
+
+import argparse
+import copy
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+from jsonschema import Draft7Validator
+
+from utils.schemas import VALID_USER, user_payload_schema
+
+# Векторы внедрения скриптов и разметки
+INJECTION_VECTORS = [
+    "<script>alert('XSS')</script>",
+    "<img src=x onerror=alert('XSS')>",
+    "javascript:alert('XSS')",
+    "<svg onload=alert('XSS')>",
+    "<iframe src='javascript:alert(\"XSS\")'></iframe>",
+    "\"><script>alert(document.cookie)</script>",
+    "<body onload=alert(1)>",
+    "<a href=\"javascript:alert(1)\">x</a>",
+    "'; DROP TABLE users; --",
+    "{{7*7}}${7*7}",
+    "../../../../etc/passwd",
+]
+
+# Пограничные случаи Unicode
+UNICODE_EDGE_CASES = [
+    "",
+    " ",
+    "\u0000",
+    "\ufeffBOM",
+    "\u202eRTL override",
+    "zero\u200bwidth",
+    "e\u0301\u0301\u0301",
+    "\U0001F600\U0001F4A9",
+    "\ud800",
+    "\ufb01 ligature",
+    "\uff26\uff55\uff4c\uff4c\uff57\uff49\uff44\uff54\uff48",
+    "Привет, мир",
+    "\r\n\t",
+]
+
+# Значения для подмены типов
+TYPE_SAMPLES = [0, -1, 2 ** 63, 3.14, True, False, None, [], [1, "a"], {}, {"nested": {}}, "", "1"]
+
+# Открывающий HTML-тег, вернувшийся в ответе без экранирования
+RAW_MARKUP = re.compile(r"<[a-zA-Z/!]")
+
+
+@dataclass
+class FuzzCase:
+    """Один сгенерированный запрос."""
+
+    method: str
+    path: str
+    payload: object
+    mutations: list = field(default_factory=list)
+
+
+@dataclass
+class FuzzFailure:
+    """Класс ошибки с исходным и минимальным воспроизводящим запросом."""
+
+    code: str
+    detail: str
+    case: FuzzCase
+    minimal: FuzzCase
+    count: int = 1
+
+
+@dataclass
+class FuzzReport:
+    """Итог прогона fuzz-движка."""
+
+    total: int
+    elapsed: float
+    failures: dict = field(default_factory=dict)
+
+    @property
+    def payloads_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        lines = [
+            f"Отправлено тел запросов: {self.total} за {self.elapsed:.2f} с "
+            f"({self.payloads_per_second:.0f} payload/с)",
+            f"Классов ошибок: {len(self.failures)}",
+        ]
+        for failure in self.failures.values():
+            minimal = json.dumps(failure.minimal.payload, ensure_ascii=False)
+            lines.append(
+                f"  [{failure.code}] x{failure.count}: {failure.detail}; "
+                f"минимальный запрос: {failure.minimal.method} {failure.minimal.path} {minimal[:300]}"
+            )
+        return "\n".join(lines)
+
+
+def schema_fields(schema, prefix=()):
+    """Перечисляет (путь, подсхема) для всех полей схемы объекта."""
+
+    for name, subschema in schema.get("properties", {}).items():
+        path = prefix + (name,)
+        yield path, subschema
+        if subschema.get("type") == "object":
+            yield from schema_fields(subschema, path)
+
+
+def required_fields(schema, prefix=()):
+    """Перечисляет пути всех обязательных полей, включая вложенные."""
+
+    for name in schema.get("required", []):
+        yield prefix + (name,)
+    for name, subschema in schema.get("properties", {}).items():
+        if subschema.get("type") == "object":
+            yield from required_fields(subschema, prefix + (name,))
+
+
+def parent_of(payload, path):
+    """Возвращает словарь-родитель поля или None, если путь уже разрушен."""
+
+    node = payload
+    for key in path[:-1]:
+        if not isinstance(node, dict) or not isinstance(node.get(key), dict):
+            return None
+        node = node[key]
+    return node if isinstance(node, dict) else None
+
+
+class PayloadGenerator:
+    """Детерминированно порождает некорректные тела запросов из схемы."""
+
+    def __init__(self, schema=None, base=None, seed=0, max_string_length=20000):
+        self.schema = schema or user_payload_schema()
+        self.base = base or VALID_USER
+        self.rng = random.Random(seed)
+        self.max_string_length = max_string_length
+        self.fields = list(schema_fields(self.schema))
+        self.string_fields = [path for path, sub in self.fields if sub.get("type") == "string"]
+        self.required = list(required_fields(self.schema))
+        self.mutators = [
+            self.type_confusion,
+            self.missing_field,
+            self.oversized_string,
+            self.unicode_edge_case,
+            self.script_injection,
+            self.unknown_field,
+        ]
+
+    def set_field(self, payload, path, value):
+        parent = parent_of(payload, path)
+        if parent is None:
+            return False
+        parent[path[-1]] = value
+        return True
+
+    def type_confusion(self, payload):
+        path, _ = self.rng.choice(self.fields)
+        value = self.rng.choice(TYPE_SAMPLES)
+        if self.set_field(payload, path, copy.deepcopy(value)):
+            return f"type:{'.'.join(path)}={json.dumps(value)}"
+
+    def missing_field(self, payload):
+        path = self.rng.choice(self.required)
+        parent = parent_of(payload, path)
+        if parent is not None and path[-1] in parent:
+            del parent[path[-1]]
+            return f"missing:{'.'.join(path)}"
+
+    def oversized_string(self, payload):
+        path = self.rng.choice(self.string_fields)
+        length = self.rng.choice([1001, 4096, self.max_string_length])
+        if self.set_field(payload, path, self.rng.choice("aZ<é") * length):
+            return f"oversized:{'.'.join(path)}[{length}]"
+
+    def unicode_edge_case(self, payload):
+        path = self.rng.choice(self.string_fields)
+        value = self.rng.choice(UNICODE_EDGE_CASES)
+        if self.set_field(payload, path, value):
+            return f"unicode:{'.'.join(path)}"
+
+    def script_injection(self, payload):
+        path = self.rng.choice(self.string_fields)
+        vector = self.rng.choice(INJECTION_VECTORS)
+        if self.set_field(payload, path, vector):
+            return f"injection:{'.'.join(path)}"
+
+    def unknown_field(self, payload):
+        name = self.rng.choice(["invalid_field", "__proto__", "isAdmin", "constructor", "$where"])
+        payload[name] = self.rng.choice(["some_value", True, {"polluted": True}])
+        return f"unknown:{name}"
+
+    def case(self):
+        payload = copy.deepcopy(self.base)
+        mutations = []
+        for _ in range(self.rng.randint(1, 3)):
+            description = self.rng.choice(self.mutators)(payload)
+            if description:
+                mutations.append(description)
+        if self.rng.random() < 0.5:
+            return FuzzCase("POST", "/users", payload, mutations)
+        return FuzzCase("PUT", f"/users/{self.rng.randint(1, 10)}", payload, mutations)
+
+    def cases(self, count):
+        for _ in range(count):
+            yield self.case()
+
+
+def shrink_candidates(value):
+    """Порождает упрощенные варианты значения, от грубых к точечным."""
+
+    if isinstance(value, dict):
+        if value:
+            yield {}
+        for key in list(value):
+            yield {k: v for k, v in value.items() if k != key}
+        for key, item in value.items():
+            for smaller in shrink_candidates(item):
+                yield {**value, key: smaller}
+    elif isinstance(value, list):
+        if value:
+            yield []
+            yield value[:len(value) // 2]
+    elif isinstance(value, str):
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+            yield value[:1]
+        if value:
+            yield ""
+    elif isinstance(value, bool) or value is None:
+        return
+    elif isinstance(value, (int, float)) and value != 0:
+        yield 0
+
+
+class FuzzEngine:
+    """Параллельно отправляет тела запросов и проверяет ответы оракулом.
+
+    strict=True означает, что сервер обязан отклонять тела, нарушающие схему
+    (статус 400), принимать корректные и не возвращать неэкранированную
+    разметку. Без strict оракул повторяет допущения test_create_user_with_invalid_data
+    для JSONPlaceholder: 200/201/400 и наличие id или error в ответе.
+    """
+
+    def __init__(self, base_url, strict=False, workers=16, timeout=10,
+                 schema=None, shrink_attempts=300):
+        self.base_url = base_url.rstrip("/")
+        self.strict = strict
+        self.workers = workers
+        self.timeout = timeout
+        self.validator = Draft7Validator(schema or user_payload_schema())
+        self.shrink_attempts = shrink_attempts
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            # У каждого воркера своя сессия и свой пул: общий пул utils.warmup не рассчитан на workers потоков
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=1))
+            session.mount("http://", HTTPAdapter(pool_maxsize=1))
+            self.local.session = session
+        return self.local.session
+
+    def send(self, case):
+        """Отправляет запрос, возвращает (status, text); status=None при обрыве соединения."""
+
+        body = json.dumps(case.payload).encode("utf-8")
+        try:
+            response = self.session().request(
+                case.method, f"{self.base_url}{case.path}", data=body,
+                headers={"Content-Type": "application/json"}, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            return None, f"{type(e).__name__}: {e}"
+        return response.status_code, response.text
+
+    def check(self, case, status, text):
+        """Оракул: возвращает (code, detail) для ошибки или None."""
+
+        if status is None:
+            return "connection", text[:200]
+        if status >= 500:
+            return "server_error", f"статус {status}: {text[:200]}"
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return "not_json", f"статус {status}, тело не JSON"
+
+        if not self.strict:
+            if status not in (200, 201, 400):
+                return "unexpected_status", f"статус {status}"
+            if not isinstance(data, dict) or ("id" not in data and "error" not in data):
+                return "no_id_or_error", "ответ не содержит ID или сообщения об ошибке"
+            return None
+
+        invalid = not self.validator.is_valid(case.payload)
+        if invalid and status != 400:
+            return "accepted_invalid", f"невалидное тело принято со статусом {status}"
+        if not invalid and status not in (200, 201):
+            return "rejected_valid", f"корректное тело отклонено со статусом {status}"
+        if RAW_MARKUP.search(text):
+            return "reflected_markup", "разметка вернулась в ответе без экранирования"
+        return None
+
+    def execute(self, case):
+        status, text = self.send(case)
+        return self.check(case, status, text)
+
+    def shrink(self, case, code):
+        """Жадно упрощает тело запроса, пока ошибка с тем же кодом воспроизводится."""
+
+        payload = case.payload
+        attempts = 0
+        progress = True
+        while progress and attempts < self.shrink_attempts:
+            progress = False
+            for candidate in shrink_candidates(payload):
+                attempts += 1
+                result = self.execute(FuzzCase(case.method, case.path, candidate))
+                if result and result[0] == code:
+                    payload = candidate
+                    progress = True
+                    break
+                if attempts >= self.shrink_attempts:
+                    break
+        return FuzzCase(case.method, case.path, payload, ["shrunk"])
+
+    def run(self, cases, shrink=True):
+        """Прогоняет все тела запросов и возвращает FuzzReport."""
+
+        failures = {}
+        total = 0
+        in_flight = set()
+        start = time.perf_counter()
+
+        def collect(done):
+            for future in done:
+                case, result = future.result()
+                if result is None:
+                    continue
+                code, detail = result
+                if code in failures:
+                    failures[code].count += 1
+                else:
+                    failures[code] = FuzzFailure(code, detail, case, case)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for case in cases:
+                total += 1
+                in_flight.add(executor.submit(lambda c: (c, self.execute(c)), case))
+                # Ограничиваем очередь, чтобы не держать в памяти все тела сразу
+                if len(in_flight) >= self.workers * 4:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(in_flight)
+
+        elapsed = time.perf_counter() - start
+        if shrink:
+            for failure in failures.values():
+                failure.minimal = self.shrink(failure.case, failure.code)
+        return FuzzReport(total=total, elapsed=elapsed, failures=failures)
+
+
+def main(argv=None):
+    from utils.stub_server import StubServer
+
+    parser = argparse.ArgumentParser(description="Fuzz-прогон POST/PUT /users")
+    parser.add_argument("--base-url", help="Адрес API; по умолчанию поднимается локальный стенд")
+    parser.add_argument("--payloads", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strict", action="store_true", help="Ожидать строгую валидацию на сервере")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = StubServer(strict=args.strict).start()
+        base_url = server.url
+    try:
+        engine = FuzzEngine(base_url, strict=args.strict, workers=args.workers)
+        report = engine.run(PayloadGenerator(seed=args.seed).cases(args.payloads))
+        print(report.summary())
+    finally:
+        if server:
+            server.stop()
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
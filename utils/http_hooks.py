@@ -0,0 +1,78 @@
+"""Единая точка перехвата HTTP-запросов, отправляемых через requests.
+
+Тесты вызывают requests.get/post/... напрямую, поэтому инструменты
+фреймворка (троттлинг, счетчики, трассировка) подключаются к
+requests.Session.send, через который проходят все запросы.
+
+    handle = http_hooks.register(before=on_request, after=on_response)
+    ...
+    http_hooks.unregister(handle)
+
+before(request) вызывается до отправки PreparedRequest,
+after(request, response, elapsed) — после; response равен None,
+если запрос завершился исключением.
+"""
+
+import threading
+import time
+
+import requests
+
+_hooks = []
+_lock = threading.Lock()
+_original_send = None
+
+
+def _send(session, request, **kwargs):
+    hooks = _hooks
+    for before, _ in hooks:
+        if before:
+            before(request)
+    response = None
+    start = time.perf_counter()
+    try:
+        response = _original_send(session, request, **kwargs)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        for _, after in hooks:
+            if after:
+                after(request, response, elapsed)
+
+
+def install():
+    """Подменяет requests.Session.send; повторный вызов ничего не делает."""
+
+    global _original_send
+    with _lock:
+        if _original_send is None:
+            _original_send = requests.Session.send
+            requests.Session.send = _send
+
+
+def uninstall():
+    """Возвращает оригинальный requests.Session.send."""
+
+    global _original_send
+    with _lock:
+        if _original_send is not None:
+            requests.Session.send = _original_send
+            _original_send = None
+
+
+def register(before=None, after=None):
+    """Добавляет пару обработчиков и возвращает handle для unregister."""
+
+    global _hooks
+    install()
+    handle = (before, after)
+    with _lock:
+        # Список заменяется целиком, чтобы отправка в других потоках не видела его изменения
+        _hooks = _hooks + [handle]
+    return handle
+
+
+def unregister(handle):
+    global _hooks
+    with _lock:
+        _hooks = [hook for hook in _hooks if hook is not handle]
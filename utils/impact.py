@@ -0,0 +1,358 @@
+"""Индекс влияния: какие тесты обращаются к каким эндпоинтам API.
+
+При полном прогоне с --impact-record каждый HTTP-запрос приписывается
+текущему тесту, а путь приводится к шаблону: числовые и UUID-сегменты
+заменяются на {id}, строка запроса отбрасывается ("GET /users/{id}").
+Для каждого эндпоинта сохраняется хеш структуры JSON-ответа (ключи и
+типы значений без самих значений) по каждому коду статуса и пример
+пути для повторного запроса.
+
+Выбор тестов по индексу:
+    pytest tests/api --impact-record                       # полный прогон, запись индекса
+    pytest tests/api --impact-endpoint="GET /users/{id}"   # только тесты этого эндпоинта
+    pytest tests/api --impact-endpoint="* /users*"         # шаблоны fnmatch
+    pytest tests/api --impact-changed                      # эндпоинты с изменившимся ответом
+
+--impact-changed повторяет записанные GET-запросы против BASE_URL и
+выбирает тесты эндпоинтов, структура ответа которых отличается от
+записанной. Тесты, которых нет в индексе, выполняются всегда.
+"""
+
+import argparse
+import fcntl
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+
+import pytest
+import requests
+
+from utils import http_hooks
+
+DEFAULT_INDEX_PATH = ".impact_index.json"
+INDEX_VERSION = 1
+
+ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{24,})$"
+)
+WILDCARDS = set("*?[")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("impact", "Выбор тестов по затронутым эндпоинтам")
+    group.addoption("--impact-index", default=DEFAULT_INDEX_PATH,
+                    help="JSON-индекс тест -> эндпоинты (относительно корня проекта)")
+    group.addoption("--impact-record", action="store_true", default=False,
+                    help="Записать индекс по трафику текущего прогона")
+    group.addoption("--impact-endpoint", action="append", default=[],
+                    help='Выполнить только тесты эндпоинта, например "GET /users/{id}" или "* /users*"')
+    group.addoption("--impact-changed", action="store_true", default=False,
+                    help="Выполнить только тесты эндпоинтов, структура ответа которых изменилась")
+    group.addoption("--impact-base-url", default=None,
+                    help="Адрес API для --impact-changed (по умолчанию BASE_URL)")
+
+
+def pytest_configure(config):
+    path = os.path.join(config.rootpath, config.getoption("--impact-index"))
+    if config.getoption("--impact-record"):
+        config.pluginmanager.register(ImpactRecorder(path), "impact-recorder")
+    if config.getoption("--impact-endpoint") or config.getoption("--impact-changed"):
+        config.pluginmanager.register(ImpactSelector(config, path), "impact-selector")
+
+
+def normalize_path(path):
+    """Шаблон пути: без строки запроса, идентификаторы заменены на {id}."""
+
+    path = path.split("?", 1)[0].split("#", 1)[0] or "/"
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def endpoint_key(method, url):
+    """Ключ эндпоинта "МЕТОД /шаблон/пути" для полного URL или пути."""
+
+    if "://" in url:
+        url = "/" + url.split("://", 1)[1].partition("/")[2]
+    return f"{method.upper()} {normalize_path(url)}"
+
+
+def shape(value):
+    """Структура JSON-значения: ключи и типы без самих значений."""
+
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, list):
+        # Элементы одной структуры схлопываются, порядок разных структур не важен
+        shapes = {json.dumps(shape(item), sort_keys=True) for item in value}
+        return [json.loads(item) for item in sorted(shapes)]
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if value is None:
+        return "null"
+    return "string"
+
+
+def response_shape_hash(response):
+    """Короткий хеш структуры ответа; для не-JSON — хеш типа содержимого."""
+
+    try:
+        signature = json.dumps(shape(response.json()), sort_keys=True)
+    except ValueError:
+        signature = "content-type:" + response.headers.get("Content-Type", "").split(";")[0]
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
+
+
+def empty_index():
+    return {"version": INDEX_VERSION, "tests": {}, "endpoints": {}}
+
+
+def load_index(path):
+    """Читает индекс; отсутствующий файл — пустой индекс."""
+
+    if not path or not os.path.exists(path):
+        return empty_index()
+    with open(path, encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        raise pytest.UsageError(f"Индекс {path} записан другой версией, перезапишите его с --impact-record")
+    return index
+
+
+def merge_index(base, update):
+    """Данные тестов из update заменяют данные тех же тестов в base."""
+
+    base["tests"].update(update["tests"])
+    for key, endpoint in update["endpoints"].items():
+        target = base["endpoints"].setdefault(key, {"shapes": {}, "sample": endpoint["sample"]})
+        target["shapes"].update(endpoint["shapes"])
+        target["sample"] = endpoint["sample"]
+    # Эндпоинты, к которым больше не обращается ни один тест, удаляются
+    used = {key for test in base["tests"].values() for key in test["endpoints"]}
+    base["endpoints"] = {key: value for key, value in sorted(base["endpoints"].items()) if key in used}
+    return base
+
+
+def tests_by_endpoint(index):
+    """Обратный индекс {эндпоинт: множество nodeid} для быстрого выбора."""
+
+    inverted = {}
+    for nodeid, test in index["tests"].items():
+        for key in test["endpoints"]:
+            inverted.setdefault(key, set()).add(nodeid)
+    return inverted
+
+
+def match_endpoints(specs, endpoints):
+    """Эндпоинты индекса, подходящие под спецификации "МЕТОД путь" (метод * — любой)."""
+
+    matched = set()
+    for spec in specs:
+        method, _, path = spec.strip().partition(" ")
+        if not path:
+            method, path = "*", method
+        if not WILDCARDS & set(path):
+            path = normalize_path(path)
+        pattern = f"{method.upper()} {path}"
+        matched.update(key for key in endpoints if fnmatch.fnmatchcase(key, pattern))
+    return matched
+
+
+def changed_endpoints(index, fetch):
+    """Эндпоинты, структура ответа которых отличается от записанной.
+
+    fetch(sample_path) возвращает response; повторяются только GET-запросы,
+    чтобы проверка не меняла данные на сервере.
+    """
+
+    changed = set()
+    for key, endpoint in index["endpoints"].items():
+        if not key.startswith("GET "):
+            continue
+        try:
+            response = fetch(endpoint["sample"])
+        except requests.RequestException:
+            changed.add(key)
+            continue
+        recorded = endpoint["shapes"].get(str(response.status_code))
+        if recorded != response_shape_hash(response):
+            changed.add(key)
+    return changed
+
+
+def select(index, nodeids, endpoints):
+    """Разделяет nodeid на выбранные и исключенные.
+
+    Выбираются тесты, обращающиеся к любому из endpoints, и тесты,
+    отсутствующие в индексе (о них ничего не известно).
+    """
+
+    inverted = tests_by_endpoint(index)
+    affected = set()
+    for key in endpoints:
+        affected |= inverted.get(key, set())
+    known = index["tests"]
+    selected = [nodeid for nodeid in nodeids if nodeid in affected or nodeid not in known]
+    selected_set = set(selected)
+    deselected = [nodeid for nodeid in nodeids if nodeid not in selected_set]
+    return selected, deselected
+
+
+def estimate_savings(index, selected, deselected):
+    """Оценка времени (выбранные, исключенные) по длительностям из индекса."""
+
+    durations = [test["duration"] for test in index["tests"].values() if test.get("duration")]
+    fallback = sum(durations) / len(durations) if durations else 0.0
+
+    def total(nodeids):
+        return sum(index["tests"].get(nodeid, {}).get("duration") or fallback for nodeid in nodeids)
+
+    return total(selected), total(deselected)
+
+
+class ImpactRecorder:
+    """Приписывает HTTP-запросы текущему тесту и сохраняет индекс."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = empty_index()
+        # Обычный атрибут, а не thread-local: запросы из пулов потоков теста тоже учитываются
+        self.current = None
+        self.handle = None
+
+    def pytest_sessionstart(self, session):
+        self.handle = http_hooks.register(after=self.after)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.current = self.index["tests"].setdefault(item.nodeid, {"endpoints": [], "duration": 0.0})
+        self.current["endpoints"] = []
+        self.current["duration"] = 0.0
+        yield
+        self.current["endpoints"].sort()
+        self.current = None
+
+    def pytest_runtest_logreport(self, report):
+        test = self.index["tests"].get(report.nodeid)
+        if test is not None:
+            test["duration"] = round(test["duration"] + report.duration, 4)
+
+    def after(self, request, response, elapsed):
+        test = self.current
+        if test is None:
+            return
+        key = endpoint_key(request.method, request.url)
+        if key not in test["endpoints"]:
+            test["endpoints"].append(key)
+        if response is None:
+            return
+        endpoint = self.index["endpoints"].setdefault(key, {"shapes": {}, "sample": None})
+        status = str(response.status_code)
+        if status not in endpoint["shapes"]:
+            endpoint["shapes"][status] = response_shape_hash(response)
+            if endpoint["sample"] is None or response.ok:
+                endpoint["sample"] = request.path_url
+
+    def pytest_sessionfinish(self, session):
+        http_hooks.unregister(self.handle)
+        # Шарды и повторные частичные прогоны дописывают индекс, а не затирают его
+        with open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                index = merge_index(json.loads(raw) if raw else empty_index(), self.index)
+                f.seek(0)
+                f.truncate()
+                json.dump(index, f, indent=1, ensure_ascii=False, sort_keys=True)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ImpactSelector:
+    """Оставляет только тесты, затронутые выбранными эндпоинтами."""
+
+    def __init__(self, config, path):
+        self.config = config
+        self.path = path
+        self.summary = None
+
+    def target_endpoints(self, index):
+        endpoints = match_endpoints(self.config.getoption("--impact-endpoint"), index["endpoints"])
+        if self.config.getoption("--impact-changed"):
+            base_url = self.config.getoption("--impact-base-url") or os.environ.get(
+                "BASE_URL", "https://jsonplaceholder.typicode.com")
+            session = requests.Session()
+            endpoints |= changed_endpoints(
+                index, lambda path: session.get(f"{base_url.rstrip('/')}{path}", timeout=10))
+            session.close()
+        return endpoints
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        index = load_index(self.path)
+        if not index["tests"]:
+            raise pytest.UsageError(f"Индекс {self.path} пуст: сначала выполните полный прогон с --impact-record")
+
+        endpoints = self.target_endpoints(index)
+        selected, deselected = select(index, [item.nodeid for item in items], endpoints)
+        selected_time, saved_time = estimate_savings(index, selected, deselected)
+        self.summary = {
+            "endpoints": sorted(endpoints),
+            "selected": len(selected),
+            "total": len(items),
+            "selected_time": selected_time,
+            "saved_time": saved_time,
+        }
+        if deselected:
+            deselected_set = set(deselected)
+            config.hook.pytest_deselected(items=[item for item in items if item.nodeid in deselected_set])
+            items[:] = [item for item in items if item.nodeid not in deselected_set]
+
+    def pytest_sessionfinish(self, session):
+        # Ни один тест не затронут — это успешный результат, а не ошибка сбора
+        if self.summary and not self.summary["selected"] and session.exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED:
+            session.exitstatus = pytest.ExitCode.OK
+
+    def pytest_report_collectionfinish(self, config, items):
+        return self.summary_lines()
+
+    def summary_lines(self):
+        summary = self.summary
+        if summary is None:
+            return []
+        total_time = summary["selected_time"] + summary["saved_time"]
+        share = summary["saved_time"] / total_time * 100 if total_time else 0.0
+        return [
+            f"impact: эндпоинты: {', '.join(summary['endpoints']) or 'нет'}",
+            f"impact: выбрано тестов {summary['selected']} из {summary['total']}, "
+            f"оценка экономии {summary['saved_time']:.1f} с из {total_time:.1f} с ({share:.0f}%)",
+        ]
+
+    def pytest_terminal_summary(self, terminalreporter):
+        for line in self.summary_lines():
+            terminalreporter.write_line(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Запросы к индексу влияния")
+    parser.add_argument("endpoints", nargs="*", help='Эндпоинты, например "GET /users/{id}"')
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    index = load_index(args.index)
+    if not args.endpoints:
+        inverted = tests_by_endpoint(index)
+        for key in sorted(inverted):
+            print(f"{len(inverted[key]):5d}  {key}")
+        return 0
+    selected, _ = select(index, sorted(index["tests"]), match_endpoints(args.endpoints, index["endpoints"]))
+    print("\n".join(selected))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""Имитация сетевых условий: TCP-прокси между тестами и локальным стендом.
+
+NetworkProxy принимает соединения и пересылает байты на upstream,
+добавляя задержку в каждом направлении, джиттер, ограничение полосы и
+случайные обрывы соединения (RST). Установка нового соединения стоит
+одного RTT, как TCP-рукопожатие в настоящей сети, поэтому видна выгода
+от переиспользования соединений. Порядок байт внутри соединения
+сохраняется: джиттер не переставляет блоки.
+
+    python -m utils.stub_server --port 8765
+    python -m utils.netsim proxy --upstream 127.0.0.1:8765 --profile remote_ci --port 9000
+    BASE_URL=http://127.0.0.1:9000 pytest tests/api
+
+Матрица прогонов набора тестов через разные профили сети, с общим пулом
+соединений и без него (--shared-pool):
+    python -m utils.netsim matrix --profiles local,broadband,remote_ci,mobile_3g \\
+        --output netsim.json tests/api/test_api_example.py
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from utils.events import read_events
+
+CHUNK_SIZE = 16 * 1024
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """Параметры канала; задержка и джиттер — в одну сторону, в миллисекундах."""
+
+    name: str
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    bandwidth_kbps: float = None
+    reset_rate: float = 0.0
+
+    @property
+    def rtt(self):
+        return 2 * self.latency_ms / 1000
+
+    def delay(self, rng):
+        jitter = rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def transmit_time(self, size):
+        if not self.bandwidth_kbps:
+            return 0.0
+        return size * 8 / (self.bandwidth_kbps * 1000)
+
+
+PROFILES = {
+    profile.name: profile
+    for profile in [
+        NetworkProfile("local"),
+        NetworkProfile("lan", latency_ms=1, jitter_ms=0.5, bandwidth_kbps=100_000),
+        NetworkProfile("broadband", latency_ms=20, jitter_ms=5, bandwidth_kbps=20_000),
+        NetworkProfile("remote_ci", latency_ms=60, jitter_ms=20, bandwidth_kbps=5_000, reset_rate=0.005),
+        NetworkProfile("mobile_3g", latency_ms=150, jitter_ms=50, bandwidth_kbps=750, reset_rate=0.02),
+    ]
+}
+
+
+class Direction:
+    """Одно направление соединения: чтение, планирование доставки и отложенная запись."""
+
+    def __init__(self, link, source, target_ready, name):
+        self.link = link
+        self.source = source
+        self.target_ready = target_ready
+        self.name = name
+        self.queue = queue.Queue()
+        self.link_free = 0.0
+        self.last_delivery = 0.0
+
+    def schedule(self, size):
+        """Момент доставки блока: передача по полосе, затем задержка канала."""
+
+        profile = self.link.proxy.profile
+        now = time.monotonic()
+        start = max(now, self.link_free)
+        self.link_free = start + profile.transmit_time(size)
+        with self.link.proxy.lock:
+            delay = profile.delay(self.link.proxy.rng)
+        self.last_delivery = max(self.link_free + delay, self.last_delivery)
+        return self.last_delivery
+
+    def read(self):
+        try:
+            while True:
+                data = self.source.recv(CHUNK_SIZE)
+                if not data:
+                    break
+                if self.link.should_reset():
+                    self.link.reset()
+                    break
+                self.queue.put((self.schedule(len(data)), data))
+        except OSError:
+            pass
+        self.queue.put((time.monotonic(), None))
+
+    def write(self):
+        target = self.target_ready()
+        try:
+            while True:
+                deliver_at, data = self.queue.get()
+                delay = deliver_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                if data is None or target is None:
+                    break
+                target.sendall(data)
+                self.link.proxy.count_bytes(self.name, len(data))
+            if target is not None:
+                target.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self.link.direction_done()
+
+
+class Link:
+    """Проксируемое соединение клиент — upstream."""
+
+    def __init__(self, proxy, client):
+        self.proxy = proxy
+        self.client = client
+        self.upstream = None
+        self.connected = threading.Event()
+        self.closed = threading.Lock()
+        self.remaining = 2
+
+    def upstream_ready(self):
+        self.connected.wait()
+        return self.upstream
+
+    def client_ready(self):
+        return self.client
+
+    def connect(self):
+        # Новое соединение стоит одного RTT, как TCP-рукопожатие
+        time.sleep(self.proxy.profile.rtt)
+        try:
+            self.upstream = socket.create_connection(self.proxy.upstream)
+            self.upstream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            self.upstream = None
+        self.connected.set()
+        if self.upstream is None:
+            self.close()
+            return
+        upstream_to_client = Direction(self, self.upstream, self.client_ready, "received")
+        self.proxy.spawn(upstream_to_client.read)
+        self.proxy.spawn(upstream_to_client.write)
+
+    def start(self):
+        self.client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client_to_upstream = Direction(self, self.client, self.upstream_ready, "sent")
+        # Данные клиента уходят в канал только после рукопожатия
+        client_to_upstream.link_free = time.monotonic() + self.proxy.profile.rtt
+        self.proxy.spawn(self.connect)
+        self.proxy.spawn(client_to_upstream.read)
+        self.proxy.spawn(client_to_upstream.write)
+
+    def should_reset(self):
+        profile = self.proxy.profile
+        if not profile.reset_rate:
+            return False
+        with self.proxy.lock:
+            return self.proxy.rng.random() < profile.reset_rate
+
+    def reset(self):
+        """Обрывает соединение: клиент получает RST, а не штатное закрытие."""
+
+        self.proxy.count_reset()
+        try:
+            self.client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            # SHUT_RD будит потоки, ждущие recv, и ничего не отправляет клиенту
+            self.client.shutdown(socket.SHUT_RD)
+            self.client.close()
+        except OSError:
+            pass
+        self.close()
+
+    def direction_done(self):
+        with self.closed:
+            self.remaining -= 1
+            done = self.remaining <= 0
+        if done:
+            self.close()
+
+    def close(self):
+        for sock in (self.client, self.upstream):
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+class NetworkProxy:
+    """TCP-прокси с имитацией сетевых условий, запускаемый в фоновом потоке."""
+
+    def __init__(self, upstream, profile="local", host="127.0.0.1", port=0, seed=None):
+        if isinstance(upstream, str):
+            upstream_host, _, upstream_port = upstream.rpartition(":")
+            upstream = (upstream_host, int(upstream_port))
+        self.upstream = upstream
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.listener = socket.create_server((host, port))
+        self.stats = {"connections": 0, "resets": 0, "sent": 0, "received": 0}
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.listener.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def spawn(self, target):
+        threading.Thread(target=target, daemon=True).start()
+
+    def count_bytes(self, direction, size):
+        with self.lock:
+            self.stats[direction] += size
+
+    def count_reset(self):
+        with self.lock:
+            self.stats["resets"] += 1
+
+    def serve(self):
+        while not self.stopped.is_set():
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                break
+            if self.stopped.is_set():
+                client.close()
+                break
+            with self.lock:
+                self.stats["connections"] += 1
+            Link(self, client).start()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        try:
+            # Разблокирует accept() в потоке сервера
+            socket.create_connection(self.listener.getsockname()[:2], timeout=1).close()
+        except OSError:
+            pass
+        self.listener.close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def run_suite(paths, base_url, extra_args=(), timeout=1800):
+    """Прогоняет тесты отдельным процессом и возвращает итоги по потоку событий."""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events_path = os.path.join(tmp, "events.jsonl")
+        start = time.perf_counter()
+        # Плагины подключаются явно, чтобы матрицу можно было запускать и вне корня проекта
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", *paths, "-q", "-p", "no:cacheprovider",
+             "-p", "utils.events", "-p", "utils.warmup", "-p", "utils.benchmarks",
+             f"--events-file={events_path}", f"--benchmark-db={os.path.join(tmp, 'history.sqlite')}",
+             *extra_args],
+            capture_output=True, text=True, timeout=timeout,
+            env={**os.environ, "BASE_URL": base_url, "PYTHONPATH": ROOT}
+        )
+        duration = time.perf_counter() - start
+        tests = {}
+        if os.path.exists(events_path):
+            for event in read_events(events_path):
+                if event["event"] == "test_end":
+                    tests[event["nodeid"]] = {key: event[key] for key in ("outcome", "duration", "http_calls")}
+    return {"exitstatus": result.returncode, "duration": duration, "tests": tests}
+
+
+def run_matrix(paths, profiles, extra_args=(), seed=0, reuse_variants=(False, True)):
+    """Прогоняет набор через каждый профиль с общим пулом соединений и без него."""
+
+    from utils.stub_server import StubServer
+
+    results = []
+    with StubServer() as server:
+        upstream = server.httpd.server_address[:2]
+        for name in profiles:
+            for reuse in reuse_variants:
+                with NetworkProxy(upstream, name, seed=seed) as proxy:
+                    args = [*extra_args, "--shared-pool"] if reuse else list(extra_args)
+                    run = run_suite(paths, proxy.url, args)
+                    run.update(profile=name, reuse=reuse, proxy=dict(proxy.stats))
+                    results.append(run)
+    return results
+
+
+def latency_sensitivity(results, top=10):
+    """Тесты с наибольшим приростом длительности относительно самого быстрого профиля."""
+
+    durations = {}
+    for run in results:
+        for nodeid, test in run["tests"].items():
+            durations.setdefault(nodeid, []).append(test["duration"])
+    growth = {nodeid: max(values) - min(values) for nodeid, values in durations.items() if len(values) > 1}
+    return sorted(growth.items(), key=lambda item: -item[1])[:top]
+
+
+def matrix_report(results, focus="test_response_time"):
+    """Текстовая таблица матрицы: длительность набора, исходы и итог focus-теста."""
+
+    lines = [f"{'профиль':<12} {'пул':<5} {'набор, с':>9} {'passed':>7} {'failed':>7} "
+             f"{'обрывов':>8} {'соедин.':>8}  {focus}"]
+    for run in results:
+        outcomes = [test["outcome"] for test in run["tests"].values()]
+        focused = [f"{test['outcome']} {test['duration']:.3f} с"
+                   for nodeid, test in run["tests"].items() if nodeid.rsplit("::", 1)[-1] == focus]
+        lines.append(
+            f"{run['profile']:<12} {'да' if run['reuse'] else 'нет':<5} {run['duration']:>9.2f} "
+            f"{outcomes.count('passed'):>7} {outcomes.count('failed') + outcomes.count('error'):>7} "
+            f"{run['proxy']['resets']:>8} {run['proxy']['connections']:>8}  {', '.join(focused) or '-'}"
+        )
+
+    by_profile = {}
+    for run in results:
+        by_profile.setdefault(run["profile"], {})[run["reuse"]] = run["duration"]
+    savings = [(name, runs[False] - runs[True]) for name, runs in by_profile.items() if len(runs) == 2]
+    if savings:
+        lines.append("Выигрыш от переиспользования соединений:")
+        lines.extend(f"  {name:<12} {saved:+.2f} с" for name, saved in savings)
+    lines.append("Самые чувствительные к сети тесты (прирост длительности):")
+    lines.extend(f"  {growth:+8.3f} с  {nodeid}" for nodeid, growth in latency_sensitivity(results))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Имитация сетевых условий перед локальным стендом")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    proxy_parser = commands.add_parser("proxy", help="Запустить прокси")
+    proxy_parser.add_argument("--upstream", required=True, help="host:port стенда")
+    proxy_parser.add_argument("--profile", default="remote_ci", choices=sorted(PROFILES))
+    proxy_parser.add_argument("--host", default="127.0.0.1")
+    proxy_parser.add_argument("--port", type=int, default=9000)
+    proxy_parser.add_argument("--seed", type=int, default=None)
+
+    matrix_parser = commands.add_parser("matrix", help="Прогнать тесты через набор профилей")
+    matrix_parser.add_argument("paths", nargs="+", help="Пути к тестам")
+    matrix_parser.add_argument("--profiles", default="local,broadband,remote_ci,mobile_3g")
+    matrix_parser.add_argument("--no-reuse-variant", action="store_true",
+                               help="Не повторять прогоны с общим пулом соединений")
+    matrix_parser.add_argument("--seed", type=int, default=0)
+    matrix_parser.add_argument("--output", default=None, help="Сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "proxy":
+        proxy = NetworkProxy(args.upstream, args.profile, args.host, args.port, args.seed).start()
+        print(f"Network proxy ({args.profile}): {proxy.url} -> {args.upstream}")
+        try:
+            proxy.thread.join()
+        except KeyboardInterrupt:
+            proxy.stop()
+        return 0
+
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"Неизвестные профили: {', '.join(sorted(unknown))}")
+    variants = (False,) if args.no_reuse_variant else (False, True)
+    results = run_matrix(args.paths, profiles, seed=args.seed, reuse_variants=variants)
+    print(matrix_report(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"profiles": {name: asdict(PROFILES[name]) for name in profiles}, "runs": results},
+                      f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Постраничное чтение списков API с упреждающей загрузкой страниц.
+
+JSONPlaceholder (json-server) и локальный стенд отдают страницы по
+?_page=N&_limit=M, а общее число записей — в заголовке X-Total-Count.
+Первая страница запрашивается сразу, по ее X-Total-Count известно число
+страниц, и следующие prefetch страниц загружаются параллельно, пока
+тест обрабатывает текущую. Записи выдаются строго по порядку.
+
+    for user in iter_pages(f"{BASE_URL}/users", {"name_like": "^Ava"}, limit=100):
+        ...
+"""
+
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def fetch_page(session, url, params, page, limit, timeout):
+    response = session.get(url, params={**params, "_page": page, "_limit": limit}, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def iter_pages(url, params=None, limit=100, prefetch=4, session=None, timeout=30):
+    """Генератор записей всех страниц; prefetch — сколько страниц загружается наперед.
+
+    Если сервер не вернул X-Total-Count, считается, что пагинации нет и
+    первая страница — весь список.
+    """
+
+    params = dict(params or {})
+    window = max(prefetch, 1)
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        # Свой пул по числу потоков загрузки: общий пул utils.warmup рассчитан на другую нагрузку
+        adapter = HTTPAdapter(pool_maxsize=window)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    executor = None
+    try:
+        first = fetch_page(session, url, params, 1, limit, timeout)
+        total = first.headers.get("X-Total-Count")
+        pages = math.ceil(int(total) / limit) if total is not None else 1
+        if pages > 1:
+            executor = ThreadPoolExecutor(max_workers=window)
+        pending = deque()
+        next_page = 2
+        records = first.json()
+        while True:
+            # Окно загрузки (не больше prefetch страниц наперед) пополняется до того,
+            # как вызывающий получит текущую страницу, в том числе первую
+            while next_page <= pages and len(pending) < window:
+                pending.append(executor.submit(fetch_page, session, url, params, next_page, limit, timeout))
+                next_page += 1
+            yield from records
+            if not pending:
+                return
+            records = pending.popleft().result().json()
+    finally:
+        # Генератор могли не дочитать: незапущенные загрузки отменяются
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if own_session:
+            session.close()
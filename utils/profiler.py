@@ -0,0 +1,346 @@
+"""Сэмплирующий профилировщик процесса pytest по запросу.
+
+Фоновый поток с заданной частотой снимает стек главного потока через
+sys._current_frames() и считает одинаковые стеки. Тесты не
+инструментируются, поэтому профилировщик можно включать на обычном
+прогоне, а его собственная стоимость ограничена бюджетом: если снятие
+выборок занимает больше max_overhead времени, интервал увеличивается.
+Поток выборок ждет GIL, поэтому фактическая частота при занятом
+процессоре не выше 1 / sys.getswitchinterval() (200 Гц по умолчанию).
+
+По часам cpu (по умолчанию) учитываются только выборки, между которыми
+главный поток потратил процессорное время, то есть ожидание сети и sleep
+в профиль не попадают; по часам wall учитывается все.
+
+    pytest tests/api --profile                 # один профиль на сессию
+    pytest tests/api --profile --profile-mode=test --alluredir=allure-results
+
+Результат — свернутые стеки (формат flamegraph.pl: "a;b;c 42") и SVG с
+flame graph в --profile-dir; в режиме test профиль каждого теста
+прикладывается к нему в Allure. В конце прогона печатаются самые
+дорогие функции.
+"""
+
+import collections
+import html
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+
+import allure
+import pytest
+
+# Ниже такой доли процессорного времени интервал между выборками считается простоем
+CPU_IDLE_SHARE = 0.1
+# Во сколько раз можно увеличить интервал, подстраиваясь под бюджет накладных расходов
+MAX_SLOWDOWN = 20
+STDLIB = os.path.dirname(os.__file__) + os.sep
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("profiler", "Сэмплирующий профилировщик процесса pytest")
+    group.addoption("--profile", action="store_true", default=False,
+                    help="Профилировать прогон сэмплирующим профилировщиком")
+    group.addoption("--profile-mode", default="session", choices=["session", "test"],
+                    help="Один профиль на сессию или дополнительно профиль каждого теста")
+    group.addoption("--profile-rate", type=float, default=100,
+                    help="Частота выборок стека, Гц")
+    group.addoption("--profile-max-overhead", type=float, default=0.02,
+                    help="Допустимая доля времени на снятие выборок; при превышении частота снижается")
+    group.addoption("--profile-clock", default="cpu", choices=["cpu", "wall"],
+                    help="cpu — только выборки с работой процессора, wall — включая ожидание")
+    group.addoption("--profile-top", type=int, default=15,
+                    help="Сколько самых дорогих функций показать в итогах")
+    group.addoption("--profile-dir", default=".profile",
+                    help="Каталог для свернутых стеков и SVG")
+
+
+def pytest_configure(config):
+    if config.getoption("--profile"):
+        config.pluginmanager.register(ProfilerSession(config, config.getoption("--profile-mode")), "profiler-session")
+
+
+def short_path(path):
+    """Путь без префикса site-packages и текущего каталога, чтобы подписи были короткими."""
+
+    marker = "site-packages" + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    for prefix in (os.getcwd() + os.sep, STDLIB):
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return path
+
+
+class StackSampler:
+    """Фоновый поток выборок стека одного потока.
+
+    Стек хранится кортежем code-объектов от корня к листу: при выборке
+    не строится ни одной строки, подписи вычисляются один раз при выводе.
+    """
+
+    def __init__(self, rate=100, max_overhead=0.02, clock="cpu", thread=None):
+        self.interval = 1 / rate
+        self.base_interval = self.interval
+        self.max_overhead = max_overhead
+        self.target = thread or threading.main_thread()
+        self.cpu_clock = self.thread_cpu_clock() if clock == "cpu" else None
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.samples = 0
+        self.idle = 0
+        self.busy = 0.0
+        self.started = None
+        self.elapsed = 0.0
+        self.labels = {}
+
+    def thread_cpu_clock(self):
+        try:
+            return time.pthread_getcpuclockid(self.target.ident)
+        except (AttributeError, OSError):
+            # Часы процессорного времени потока есть не везде: считаем по настенным
+            return None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def run(self):
+        target = self.target.ident
+        cpu_clock = self.cpu_clock
+        last_cpu = time.clock_gettime(cpu_clock) if cpu_clock is not None else 0.0
+        last_wall = deadline = time.perf_counter()
+        while True:
+            # Ожидание отсчитывается от плана, а не от конца выборки: задержка захвата GIL не копится
+            deadline = max(deadline + self.interval, time.perf_counter() + self.interval / 2)
+            if self.stopped.wait(deadline - time.perf_counter()):
+                break
+            begin = time.perf_counter()
+            if cpu_clock is not None:
+                cpu = time.clock_gettime(cpu_clock)
+                working = cpu - last_cpu >= (begin - last_wall) * CPU_IDLE_SHARE
+                last_cpu, last_wall = cpu, begin
+                if not working:
+                    self.idle += 1
+                    continue
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            del frame
+            if stack:
+                stack.reverse()
+                with self.lock:
+                    self.counts[tuple(stack)] += 1
+                self.samples += 1
+            spent = time.perf_counter() - begin
+            self.busy += spent
+            self.adapt(spent)
+
+    def adapt(self, spent):
+        # Доля времени на выборку spent / interval не должна превышать бюджет
+        needed = spent / self.max_overhead if self.max_overhead > 0 else self.interval
+        self.interval = min(max(self.base_interval, needed), self.base_interval * MAX_SLOWDOWN)
+
+    def collect(self):
+        """Забирает накопленные стеки и обнуляет счетчик."""
+
+        with self.lock:
+            counts, self.counts = self.counts, collections.Counter()
+        return counts
+
+    @property
+    def overhead(self):
+        elapsed = self.elapsed or (time.perf_counter() - self.started)
+        return self.busy / elapsed if elapsed else 0.0
+
+    @property
+    def effective_rate(self):
+        elapsed = self.elapsed or (time.perf_counter() - self.started)
+        return (self.samples + self.idle) / elapsed if elapsed else 0.0
+
+    def label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+            # ";" разделяет кадры в свернутом формате
+            label = self.labels[code] = label.replace(";", ":")
+        return label
+
+    def collapsed(self, counts):
+        """Свернутые стеки: {"корень;...;лист": число выборок}."""
+
+        folded = collections.Counter()
+        for stack, count in counts.items():
+            folded[";".join(self.label(code) for code in stack)] += count
+        return folded
+
+
+def collapsed_text(folded):
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(folded.items()))
+
+
+def top_functions(folded, limit=15):
+    """[(функция, собственные выборки, выборки со вложенными)] по убыванию собственных."""
+
+    own = collections.Counter()
+    total = collections.Counter()
+    for stack, count in folded.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        # Рекурсивная функция считается в стеке один раз
+        for frame in set(frames):
+            total[frame] += count
+    return [(name, count, total[name]) for name, count in own.most_common(limit)]
+
+
+def frame_color(name):
+    # Цвет зависит только от имени: одна функция одного цвета на всех графиках
+    value = zlib.crc32(name.encode("utf-8"))
+    return f"rgb({205 + value % 50},{(value >> 8) % 180 + 40},{(value >> 16) % 55})"
+
+
+def flamegraph_svg(folded, title="Flame graph", width=1200, frame_height=16, min_width=0.3):
+    """SVG flame graph без внешних зависимостей; подсказка у кадра — число выборок."""
+
+    root = {"children": {}, "value": 0}
+    for stack, count in folded.items():
+        root["value"] += count
+        node = root
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"children": {}, "value": 0})
+            node["value"] += count
+    total = root["value"]
+
+    rects = []
+    depth_max = 0
+
+    def layout(node, x, depth):
+        nonlocal depth_max
+        for name, child in sorted(node["children"].items()):
+            child_width = child["value"] / total * width
+            if child_width >= min_width:
+                depth_max = max(depth_max, depth)
+                rects.append((name, child["value"], x, depth, child_width))
+                layout(child, x, depth + 1)
+            x += child_width
+
+    if total:
+        layout(root, 0.0, 0)
+    header = 24
+    height = header + (depth_max + 1) * frame_height + 4
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        '<rect width="100%" height="100%" fill="#fafafa"/>',
+        f'<text x="{width / 2}" y="16" text-anchor="middle" font-size="13">'
+        f'{html.escape(title)} ({total} выборок)</text>',
+    ]
+    for name, value, x, depth, rect_width in rects:
+        # Корень внизу, вызываемые функции выше
+        y = height - 4 - (depth + 1) * frame_height
+        text = name[:int(rect_width / 7)] if rect_width > 21 else ""
+        parts.append(
+            f'<g><title>{html.escape(name)}: {value} ({value / total:.1%})</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{rect_width:.2f}" height="{frame_height - 1}" '
+            f'fill="{frame_color(name)}" rx="2"/>'
+            + (f'<text x="{x + 3:.2f}" y="{y + frame_height - 4}">{html.escape(text)}</text>' if text else "")
+            + "</g>"
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def safe_name(nodeid):
+    return re.sub(r"[^\w.-]+", "_", nodeid).strip("_")[:150]
+
+
+class ProfilerSession:
+    """Плагин --profile: поток выборок на весь прогон и разбиение профиля по тестам."""
+
+    def __init__(self, config, mode):
+        self.config = config
+        self.mode = mode
+        self.directory = config.getoption("--profile-dir")
+        self.top = config.getoption("--profile-top")
+        self.sampler = StackSampler(
+            rate=config.getoption("--profile-rate"),
+            max_overhead=config.getoption("--profile-max-overhead"),
+            clock=config.getoption("--profile-clock"),
+        )
+        self.total = collections.Counter()
+        self.folded = {}
+        # Шарды pytest-xdist пишут каждый в свои файлы
+        self.suffix = f"-{os.environ['PYTEST_XDIST_WORKER']}" if "PYTEST_XDIST_WORKER" in os.environ else ""
+
+    def write(self, name, folded, title):
+        os.makedirs(self.directory, exist_ok=True)
+        collapsed_path = os.path.join(self.directory, f"{name}{self.suffix}.collapsed")
+        svg_path = os.path.join(self.directory, f"{name}{self.suffix}.svg")
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            f.write(collapsed_text(folded))
+        svg = flamegraph_svg(folded, title)
+        with open(svg_path, "w", encoding="utf-8") as f:
+            f.write(svg)
+        return svg
+
+    def pytest_sessionstart(self, session):
+        self.sampler.start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        if self.mode == "test":
+            # Выборки между тестами (сбор, хуки) идут только в общий профиль
+            self.total.update(self.sampler.collect())
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        yield
+        if self.mode != "test" or call.when != "teardown":
+            return
+        counts = self.sampler.collect()
+        self.total.update(counts)
+        if not counts:
+            return
+        folded = self.sampler.collapsed(counts)
+        svg = self.write(safe_name(item.nodeid), folded, item.nodeid)
+        allure.attach(collapsed_text(folded), name="Профиль: свернутые стеки",
+                      attachment_type=allure.attachment_type.TEXT)
+        allure.attach(svg, name="Профиль: flame graph", attachment_type=allure.attachment_type.SVG)
+
+    def pytest_sessionfinish(self, session):
+        self.sampler.stop()
+        self.total.update(self.sampler.collect())
+        self.folded = self.sampler.collapsed(self.total)
+        if self.folded:
+            self.write("session", self.folded, "Сессия pytest")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        sampler = self.sampler
+        samples = sum(self.folded.values())
+        terminalreporter.section("profile")
+        terminalreporter.write_line(
+            f"{samples} выборок ({self.config.getoption('--profile-clock')}), частота "
+            f"{self.config.getoption('--profile-rate'):.0f} Гц, фактически {sampler.effective_rate:.0f} Гц, "
+            f"накладные расходы {sampler.overhead:.2%}")
+        if not samples:
+            return
+        terminalreporter.write_line(f"{'собств.':>8} {'всего':>7}  функция")
+        for name, own, total in top_functions(self.folded, self.top):
+            terminalreporter.write_line(f"{own / samples:>8.1%} {total / samples:>7.1%}  {name}")
+        terminalreporter.write_line(f"Flame graph: {os.path.join(self.directory, 'session' + self.suffix + '.svg')}")
@@ -0,0 +1,95 @@
+"""JSON-схемы ресурсов тестируемого API."""
+
+# Схема пользователя в ответе API (GET /users, GET /users/{id})
+USER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": "string"},
+        "username": {"type": "string"},
+        "email": {"type": "string"},
+        "address": {
+            "type": "object",
+            "properties": {
+                "street": {"type": "string"},
+                "suite": {"type": "string"},
+                "city": {"type": "string"},
+                "zipcode": {"type": "string"},
+                "geo": {
+                    "type": "object",
+                    "properties": {
+                        "lat": {"type": "string"},
+                        "lng": {"type": "string"}
+                    },
+                    "required": ["lat", "lng"]
+                }
+            },
+            "required": ["street", "suite", "city", "zipcode", "geo"]
+        },
+        "phone": {"type": "string"},
+        "website": {"type": "string"},
+        "company": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "catchPhrase": {"type": "string"},
+                "bs": {"type": "string"}
+            },
+            "required": ["name", "catchPhrase", "bs"]
+        }
+    },
+    "required": ["id", "name", "username", "email", "address", "phone", "website", "company"]
+}
+
+# Максимальная длина строкового поля, которую принимает строгий сервер
+MAX_STRING_LENGTH = 1000
+
+
+def user_payload_schema():
+    """Строгая схема тела запроса POST/PUT /users.
+
+    В отличие от USER_SCHEMA: id не обязателен, лишние поля запрещены,
+    строки ограничены по длине, а name и email не могут быть пустыми.
+    """
+
+    def tighten(schema):
+        schema = dict(schema)
+        if schema.get("type") == "object":
+            schema["additionalProperties"] = False
+            schema["properties"] = {
+                key: tighten(value) for key, value in schema["properties"].items()
+            }
+        elif schema.get("type") == "string":
+            schema["maxLength"] = MAX_STRING_LENGTH
+        return schema
+
+    schema = tighten(USER_SCHEMA)
+    schema["required"] = [field for field in schema["required"] if field != "id"]
+    schema["properties"]["name"]["minLength"] = 1
+    schema["properties"]["email"]["pattern"] = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+    return schema
+
+
+# Эталонный валидный пользователь для генерации тел запросов
+VALID_USER = {
+    "name": "Test User",
+    "username": "testuser",
+    "email": "testuser@example.com",
+    "address": {
+        "street": "Kulas Light",
+        "suite": "Apt. 556",
+        "city": "Gwenborough",
+        "zipcode": "92998-3874",
+        "geo": {
+            "lat": "-37.3159",
+            "lng": "81.1496"
+        }
+    },
+    "phone": "1-770-736-8031 x56442",
+    "website": "hildegard.org",
+    "company": {
+        "name": "Romaguera-Crona",
+        "catchPhrase": "Multi-layered client-server neural-net",
+        "bs": "harness real-time e-markets"
+    }
+}
@@ -0,0 +1,199 @@
+"""Детерминированное разбиение тестов на шарды для параллельного запуска в CI.
+
+Тесты распределяются по шардам жадно (самый долгий — на наименее
+загруженный шард) по сохраненной истории длительностей. Тесты одной
+группы (маркер shard_group или один модуль при --shard-by=module)
+всегда попадают в один шард и выполняются в исходном порядке.
+
+Запуск одного шарда:
+    pytest tests/api --shard-index=0 --shard-total=4 --store-durations=durations-0.json
+
+Слияние результатов шардов; длительности дописываются в историю
+.test_durations.json, по которой следующий запуск строит разбиение:
+    python -m utils.sharding merge --durations durations-*.json \\
+        --results test-results/api-shard-* --output-results test-results/api
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+
+import pytest
+
+DEFAULT_DURATIONS_PATH = ".test_durations.json"
+# Длительность теста без истории, если нет ни одного замера
+DEFAULT_DURATION = 1.0
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("sharding", "Разбиение тестов на шарды")
+    group.addoption("--shard-index", type=int, default=None,
+                    help="Номер текущего шарда, начиная с 0")
+    group.addoption("--shard-total", type=int, default=None,
+                    help="Общее количество шардов")
+    group.addoption("--shard-by", choices=["test", "module"], default="test",
+                    help="Минимальная неделимая единица: отдельный тест или модуль")
+    group.addoption("--shard-durations", default=DEFAULT_DURATIONS_PATH,
+                    help="JSON с историей длительностей тестов {nodeid: секунды}")
+    group.addoption("--store-durations", default=None,
+                    help="Сохранить длительности тестов текущего запуска в JSON")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "shard_group(name): тесты группы всегда выполняются в одном шарде по порядку"
+    )
+    path = config.getoption("--store-durations")
+    if path:
+        config.pluginmanager.register(DurationRecorder(path), "shard-durations")
+
+
+def load_durations(path):
+    """Читает историю длительностей; отсутствующий файл — пустая история."""
+
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def group_key(item, shard_by):
+    marker = item.get_closest_marker("shard_group")
+    if marker and marker.args:
+        return f"group:{marker.args[0]}"
+    if shard_by == "module":
+        return item.nodeid.split("::")[0]
+    return item.nodeid
+
+
+def partition(groups, durations, total):
+    """Раскладывает группы по шардам.
+
+    groups — словарь {ключ группы: [nodeid, ...]}; возвращает список из total
+    множеств ключей групп. Результат зависит только от входных данных.
+    """
+
+    known = [value for value in durations.values() if value > 0]
+    fallback = sum(known) / len(known) if known else DEFAULT_DURATION
+    weights = {
+        key: sum(durations.get(nodeid, fallback) for nodeid in nodeids)
+        for key, nodeids in groups.items()
+    }
+
+    shards = [set() for _ in range(total)]
+    loads = [0.0] * total
+    # Самые долгие группы раскладываются первыми; ключ разрешает равенство длительностей
+    for key in sorted(weights, key=lambda k: (-weights[k], k)):
+        target = min(range(total), key=lambda index: (loads[index], index))
+        shards[target].add(key)
+        loads[target] += weights[key]
+    return shards
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    index = config.getoption("--shard-index")
+    total = config.getoption("--shard-total")
+    if index is None and total is None:
+        return
+    if index is None or total is None or total < 1 or not 0 <= index < total:
+        raise pytest.UsageError("--shard-index и --shard-total задаются вместе, 0 <= index < total")
+
+    shard_by = config.getoption("--shard-by")
+    groups = {}
+    for item in items:
+        groups.setdefault(group_key(item, shard_by), []).append(item.nodeid)
+
+    durations = load_durations(os.path.join(config.rootpath, config.getoption("--shard-durations")))
+    selected_groups = partition(groups, durations, total)[index]
+
+    selected, deselected = [], []
+    for item in items:
+        (selected if group_key(item, shard_by) in selected_groups else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def pytest_report_header(config):
+    if config.getoption("--shard-total"):
+        return f"shard: {config.getoption('--shard-index')} из {config.getoption('--shard-total')}"
+
+
+class DurationRecorder:
+    """Суммирует setup/call/teardown каждого теста и сохраняет их в JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.durations = {}
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(self.durations.items())), f, indent=2, ensure_ascii=False)
+
+
+def merge_durations(paths, base=None):
+    """Объединяет файлы длительностей; более поздние файлы перекрывают ранние."""
+
+    merged = dict(base or {})
+    for path in paths:
+        merged.update(load_durations(path))
+    return dict(sorted(merged.items()))
+
+
+def merge_results(result_dirs, output_dir):
+    """Копирует результаты Allure всех шардов в один каталог.
+
+    Файлы Allure имеют уникальные (uuid) имена, поэтому простое копирование
+    дает корректный общий отчет.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    copied = 0
+    for result_dir in result_dirs:
+        for name in sorted(os.listdir(result_dir)):
+            source = os.path.join(result_dir, name)
+            if os.path.isfile(source):
+                shutil.copy2(source, os.path.join(output_dir, name))
+                copied += 1
+    return copied
+
+
+def expand(patterns):
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    return [path for path in paths if os.path.exists(path)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Слияние результатов шардов")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge = subparsers.add_parser("merge", help="Объединить длительности и результаты Allure")
+    merge.add_argument("--durations", nargs="*", default=[], help="Файлы длительностей шардов")
+    merge.add_argument("--output-durations", default=DEFAULT_DURATIONS_PATH)
+    merge.add_argument("--results", nargs="*", default=[], help="Каталоги allure-results шардов")
+    merge.add_argument("--output-results", default=None)
+    args = parser.parse_args(argv)
+
+    duration_files = expand(args.durations)
+    if duration_files:
+        merged = merge_durations(duration_files, load_durations(args.output_durations))
+        with open(args.output_durations, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, ensure_ascii=False)
+        print(f"Длительности: {len(duration_files)} файлов, {len(merged)} тестов -> {args.output_durations}")
+
+    result_dirs = [path for path in expand(args.results) if os.path.isdir(path)]
+    if result_dirs and args.output_results:
+        copied = merge_results(result_dirs, args.output_results)
+        print(f"Результаты: {len(result_dirs)} каталогов, {copied} файлов -> {args.output_results}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,347 @@
+"""Эталонные снимки ответов API со сравнением по хешам поддеревьев.
+
+Снимок хранит нормализованное тело ответа: ключи отсортированы, значения
+по маскам заменены их типом ("<str>", "<number>", ...), поэтому
+изменчивые поля (идентификаторы, даты, токены) не ломают сравнение, а
+их наличие и тип по-прежнему проверяются. Маска — glob-шаблон пути,
+сегменты которого разделены точками, индексы списков — числа. Сегмент
+вида "начало:конец" задает диапазон индексов, как срез (конец не
+включается, любая граница может отсутствовать): "id", "*.updatedAt",
+"1:" (все элементы списка, кроме первого), "items.0:3.price".
+
+Сравнение двухуровневое. В заголовке файла лежит хеш всего тела, и при
+совпадении тело снимка даже не распаковывается. При расхождении спуск
+идет только в отличающиеся поддеревья; элементы списков разной длины
+сопоставляются по хешам поддеревьев, поэтому вставка в начало длинного
+списка дает одно отличие, а не сдвиг всех элементов.
+
+    def test_user(snapshot):
+        snapshot.assert_match(requests.get(url).json(), mask=["id"])
+
+    pytest tests/api --snapshot-update   # записать или обновить снимки
+
+Снимки лежат рядом с тестами: __snapshots__/<модуль>/<тест>.json.gz.
+"""
+
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from fnmatch import translate
+from functools import lru_cache
+
+import pytest
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = "__snapshots__"
+# Сколько отличий показывать в сообщении об ошибке
+MAX_REPORTED = 20
+# Сегмент маски с диапазоном индексов списка: "1:", ":3", "2:5"
+INDEX_RANGE = re.compile(r"(\d*):(\d*)")
+
+
+def type_name(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if value is None:
+        return "null"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    return "str"
+
+
+def normalize(value, masks=(), path=""):
+    """Копия значения, в которой значения по маскам заменены их типом.
+
+    Маска, совпавшая с объектом или списком, скрывает все значения внутри,
+    но сохраняет структуру: ключи, длины списков и типы.
+    """
+
+    if not masks:
+        return value
+    if any(mask_matches(path, mask) for mask in masks):
+        return mask_values(value)
+    if isinstance(value, dict):
+        return {key: normalize(item, masks, f"{path}.{key}" if path else str(key)) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item, masks, f"{path}.{index}" if path else str(index)) for index, item in enumerate(value)]
+    return value
+
+
+@lru_cache(maxsize=None)
+def compile_mask(mask):
+    """Регулярное выражение маски и диапазоны индексов ее сегментов "начало:конец"."""
+
+    parts, ranges = [], []
+    for segment in mask.split("."):
+        bounds = INDEX_RANGE.fullmatch(segment)
+        if bounds:
+            parts.append(f"(?P<index{len(ranges)}>\\d+)")
+            ranges.append((int(bounds[1] or 0), int(bounds[2]) if bounds[2] else None))
+        else:
+            parts.append(translate(segment).removesuffix("\\Z"))
+    return re.compile(r"\.".join(parts)), ranges
+
+
+def mask_matches(path, mask):
+    pattern, ranges = compile_mask(mask)
+    match = pattern.fullmatch(path)
+    if not match:
+        return False
+    for number, (start, stop) in enumerate(ranges):
+        index = int(match[f"index{number}"])
+        if index < start or (stop is not None and index >= stop):
+            return False
+    return True
+
+
+def mask_values(value):
+    if isinstance(value, dict):
+        return {key: mask_values(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [mask_values(item) for item in value]
+    return f"<{type_name(value)}>"
+
+
+def canonical(value):
+    """Каноническая сериализация: одинаковые данные дают одинаковые байты."""
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def subtree_hash(value):
+    return hashlib.blake2b(canonical(value), digest_size=16).hexdigest()
+
+
+@dataclass
+class Difference:
+    path: str
+    kind: str
+    expected: object = None
+    actual: object = None
+
+    def describe(self):
+        path = self.path or "<корень>"
+        if self.kind == "added":
+            return f"{path}: добавлено {short(self.actual)}"
+        if self.kind == "removed":
+            return f"{path}: удалено {short(self.expected)}"
+        return f"{path}: ожидалось {short(self.expected)}, получено {short(self.actual)}"
+
+
+def short(value, limit=80):
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def join(path, key):
+    return f"{path}.{key}" if path else str(key)
+
+
+def diff(expected, actual, path="", differences=None, strict=False):
+    """Отличия actual от expected; совпадающие поддеревья пропускаются.
+
+    Обычно поддеревья сравниваются через ==, но для Python True == 1, поэтому
+    в strict-режиме вложенные объекты и списки сравниваются по хешам.
+    """
+
+    if differences is None:
+        differences = []
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(expected.keys() | actual.keys(), key=str):
+            if key not in actual:
+                differences.append(Difference(join(path, key), "removed", expected[key]))
+            elif key not in expected:
+                differences.append(Difference(join(path, key), "added", actual=actual[key]))
+            else:
+                compare_children(expected[key], actual[key], join(path, key), differences, strict)
+    elif isinstance(expected, list) and isinstance(actual, list):
+        diff_lists(expected, actual, path, differences, strict)
+    elif type_name(expected) != type_name(actual) or expected != actual:
+        differences.append(Difference(path, "changed", expected, actual))
+    return differences
+
+
+def same(expected, actual, strict=False):
+    """Совпадение поддеревьев: == выполняется в C без сериализации, strict — по хешам."""
+
+    if type_name(expected) != type_name(actual):
+        return False
+    if strict and isinstance(expected, (dict, list)):
+        return subtree_hash(expected) == subtree_hash(actual)
+    return expected == actual
+
+
+def compare_children(expected, actual, path, differences, strict=False):
+    if same(expected, actual, strict):
+        return
+    if isinstance(expected, (dict, list)) and isinstance(actual, (dict, list)):
+        diff(expected, actual, path, differences, strict)
+    else:
+        differences.append(Difference(path, "changed", expected, actual))
+
+
+def diff_lists(expected, actual, path, differences, strict=False):
+    """Сравнивает списки; при разной длине элементы сопоставляются по хешам поддеревьев."""
+
+    if len(expected) == len(actual):
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            compare_children(left, right, join(path, index), differences, strict)
+        return
+
+    # Общие начало и конец отбрасываются, хешируется только середина
+    start = 0
+    limit = min(len(expected), len(actual))
+    while start < limit and same(expected[start], actual[start], strict):
+        start += 1
+    end = 0
+    while end < limit - start and same(expected[-1 - end], actual[-1 - end], strict):
+        end += 1
+    expected_hashes = [subtree_hash(item) for item in expected[start:len(expected) - end]]
+    actual_hashes = [subtree_hash(item) for item in actual[start:len(actual) - end]]
+
+    matcher = difflib.SequenceMatcher(None, expected_hashes, actual_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        i1, i2, j1, j2 = i1 + start, i2 + start, j1 + start, j2 + start
+        paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for offset in range(paired):
+            compare_children(expected[i1 + offset], actual[j1 + offset], join(path, j1 + offset), differences,
+                             strict)
+        for index in range(i1 + paired, i2):
+            differences.append(Difference(join(path, index), "removed", expected[index]))
+        for index in range(j1 + paired, j2):
+            differences.append(Difference(join(path, index), "added", actual=actual[index]))
+
+
+class Snapshot:
+    """Файл снимка: строка-заголовок с хешем и масками, затем тело."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def header(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return json.loads(f.readline())
+
+    def body(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            f.readline()
+            return json.loads(f.readline())
+
+    def write(self, data, digest, masks):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        header = {"version": SNAPSHOT_VERSION, "hash": digest, "masks": list(masks)}
+        # mtime=0: одинаковое содержимое дает одинаковый файл и не создает лишних изменений в git
+        with open(self.path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as f:
+            f.write(json.dumps(header, sort_keys=True).encode("utf-8") + b"\n")
+            f.write(data + b"\n")
+
+
+def compare(snapshot, value, masks=()):
+    """Сравнивает значение со снимком; возвращает список отличий."""
+
+    normalized = normalize(value, masks)
+    data = canonical(normalized)
+    if snapshot.header()["hash"] == hashlib.blake2b(data, digest_size=16).hexdigest():
+        return []
+    expected, actual = snapshot.body(), json.loads(data)
+    # Хеши различаются, а быстрый проход ничего не нашел: отличие вида True/1 внутри списка
+    return diff(expected, actual) or diff(expected, actual, strict=True)
+
+
+def snapshot_path(node, name=None):
+    module = node.path
+    test_name = re.sub(r"[^\w.-]+", "_", node.name).strip("_")
+    filename = f"{test_name}.{name}" if name else test_name
+    return os.path.join(module.parent, SNAPSHOT_DIR, module.stem, f"{filename}.json.gz")
+
+
+class SnapshotAssertion:
+    """Фикстура snapshot: сравнение ответа с эталоном текущего теста."""
+
+    def __init__(self, node, session):
+        self.node = node
+        self.session = session
+        self.calls = 0
+
+    def assert_match(self, value, name=None, mask=()):
+        """Сравнивает value с эталоном; name различает несколько снимков одного теста."""
+
+        self.calls += 1
+        if name is None and self.calls > 1:
+            name = str(self.calls)
+        snapshot = Snapshot(snapshot_path(self.node, name))
+        masks = tuple(mask)
+
+        if self.session.update:
+            data = canonical(normalize(value, masks))
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            if not snapshot.exists() or snapshot.header() != {"version": SNAPSHOT_VERSION, "hash": digest,
+                                                              "masks": list(masks)}:
+                self.session.count("updated" if snapshot.exists() else "written")
+                snapshot.write(data, digest, masks)
+            else:
+                self.session.count("matched")
+            return
+
+        if not snapshot.exists():
+            self.session.count("missing")
+            pytest.fail(f"Нет снимка {snapshot.path}; запустите тесты с --snapshot-update", pytrace=False)
+        stored_masks = tuple(snapshot.header()["masks"])
+        if stored_masks != masks:
+            pytest.fail(f"Маски снимка {list(stored_masks)} не совпадают с {list(masks)}; "
+                        f"обновите снимок с --snapshot-update", pytrace=False)
+
+        differences = compare(snapshot, value, masks)
+        if not differences:
+            self.session.count("matched")
+            return
+        self.session.count("failed")
+        lines = [difference.describe() for difference in differences[:MAX_REPORTED]]
+        if len(differences) > MAX_REPORTED:
+            lines.append(f"... и еще {len(differences) - MAX_REPORTED}")
+        pytest.fail(f"Ответ отличается от снимка {os.path.basename(snapshot.path)} "
+                    f"({len(differences)} отличий):\n  " + "\n  ".join(lines), pytrace=False)
+
+
+class SnapshotSession:
+    def __init__(self, update):
+        self.update = update
+        self.counts = {}
+
+    def count(self, outcome):
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.counts:
+            stats = ", ".join(f"{name}: {count}" for name, count in sorted(self.counts.items()))
+            terminalreporter.write_line(f"Снимки ответов: {stats}")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("snapshots", "Эталонные снимки ответов")
+    group.addoption("--snapshot-update", action="store_true", default=False,
+                    help="Записать отсутствующие и перезаписать изменившиеся снимки")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(SnapshotSession(config.getoption("--snapshot-update")), "snapshot-session")
+
+
+@pytest.fixture
+def snapshot(request):
+    """Сравнение ответов с эталонными снимками."""
+
+    return SnapshotAssertion(request.node, request.config.pluginmanager.get_plugin("snapshot-session"))
@@ -0,0 +1,252 @@
+"""Soak-режим: многократный прогон выбранных тестов с поиском утечек памяти.
+
+Выбранные тесты выполняются по кругу заданное число итераций или заданное
+время. После каждой итерации снимаются показатели tracemalloc, RSS и число
+открытых файловых дескрипторов; периодически делается снимок tracemalloc.
+В отчете — места аллокаций с наибольшим ростом относительно снимка после
+прогрева и наклон роста на итерацию (метод наименьших квадратов).
+Аллокации самого pytest (он хранит отчет каждого выполненного теста)
+исключаются из снимков, чтобы не маскировать рост в тестах и утилитах.
+Если рост памяти превышает бюджет, сессия завершается с ошибкой.
+
+    pytest tests/api -k "user_by_id or get_all_users" \\
+        --soak-iterations=200 --soak-budget-kb=16 --soak-report=soak.json
+"""
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("soak", "Soak-режим и поиск утечек памяти")
+    group.addoption("--soak-iterations", type=int, default=None,
+                    help="Сколько раз прогнать выбранные тесты")
+    group.addoption("--soak-duration", type=float, default=None,
+                    help="Сколько секунд гонять выбранные тесты по кругу")
+    group.addoption("--soak-warmup", type=int, default=1,
+                    help="Итерации прогрева, не входящие в расчет роста")
+    group.addoption("--soak-snapshot-every", type=int, default=5,
+                    help="Частота снимков tracemalloc, в итерациях")
+    group.addoption("--soak-frames", type=int, default=1,
+                    help="Глубина стека, сохраняемая tracemalloc для каждой аллокации")
+    group.addoption("--soak-top", type=int, default=10,
+                    help="Сколько мест аллокаций с наибольшим ростом показать")
+    group.addoption("--soak-budget-kb", type=float, default=None,
+                    help="Допустимый рост памяти Python (без аллокаций pytest) на итерацию, КБ")
+    group.addoption("--soak-rss-budget-kb", type=float, default=None,
+                    help="Допустимый рост RSS процесса на итерацию, КБ")
+    group.addoption("--soak-fd-budget", type=float, default=None,
+                    help="Допустимый рост числа открытых дескрипторов на итерацию")
+    group.addoption("--soak-report", default=None,
+                    help="Сохранить отчет soak-прогона в JSON")
+
+
+def pytest_configure(config):
+    if config.getoption("--soak-iterations") or config.getoption("--soak-duration"):
+        config.pluginmanager.register(SoakRunner(config), "soak-runner")
+
+
+# Аллокации тестового раннера, которые растут с каждым выполненным тестом
+HARNESS_FILTERS = [
+    tracemalloc.Filter(False, "*/_pytest/*"),
+    tracemalloc.Filter(False, "*/pluggy/*"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+@dataclass
+class Sample:
+    iteration: int
+    elapsed: float
+    traced_kb: float
+    rss_kb: float
+    fds: int
+    app_kb: float = None
+
+
+def rss_kb():
+    """Текущий RSS процесса в КБ (Linux /proc, иначе пиковый RSS)."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError):
+        import resource
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def slope(xs, ys):
+    """Наклон прямой, проведенной методом наименьших квадратов."""
+
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if not denominator:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+class SoakRunner:
+    """Заменяет стандартный цикл выполнения тестов циклом soak-прогона."""
+
+    def __init__(self, config):
+        self.config = config
+        self.iterations = config.getoption("--soak-iterations")
+        self.duration = config.getoption("--soak-duration")
+        self.warmup = config.getoption("--soak-warmup")
+        self.snapshot_every = max(1, config.getoption("--soak-snapshot-every"))
+        self.top = config.getoption("--soak-top")
+        self.samples = []
+        self.baseline = None
+        self.latest = None
+        self.report = None
+        # (последний тест итерации, номер итерации, начало прогона, снимать ли tracemalloc)
+        self.checkpoint = None
+
+    def sample(self, iteration, start, snapshot=False):
+        gc.collect()
+        traced, _ = tracemalloc.get_traced_memory()
+        sample = Sample(iteration, time.perf_counter() - start, traced / 1024, rss_kb(), open_fds())
+        if snapshot:
+            self.latest = tracemalloc.take_snapshot().filter_traces(HARNESS_FILTERS)
+            sample.app_kb = sum(stat.size for stat in self.latest.statistics("filename")) / 1024
+            if self.baseline is None:
+                self.baseline = self.latest
+        self.samples.append(sample)
+
+    def finished(self, iteration, start):
+        if self.iterations is not None and iteration >= self.iterations:
+            return True
+        return self.duration is not None and time.perf_counter() - start >= self.duration
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        if session.testsfailed and not session.config.option.continue_on_collection_errors:
+            raise session.Interrupted(f"{session.testsfailed} ошибок при сборе тестов")
+        if session.config.option.collectonly:
+            return True
+
+        tracemalloc.start(self.config.getoption("--soak-frames"))
+        start = time.perf_counter()
+        iteration = 0
+        final = not session.items
+        try:
+            while not final:
+                iteration += 1
+                items = session.items
+                for index, item in enumerate(items):
+                    if index + 1 < len(items):
+                        nextitem = items[index + 1]
+                    else:
+                        # Следующая итерация снова начнется с первого теста: с nextitem=None pytest
+                        # разобрал бы фикстуры сессии и модулей, и рост в них не был бы виден
+                        final = self.finished(iteration, start)
+                        nextitem = None if final else items[0]
+                        snapshot = iteration >= self.warmup and (
+                            iteration == self.warmup or iteration % self.snapshot_every == 0 or final
+                        )
+                        self.checkpoint = (item, iteration, start, snapshot)
+                    item.config.hook.pytest_runtest_protocol(item=item, nextitem=nextitem)
+                    if session.shouldfail or session.shouldstop:
+                        raise session.Failed(session.shouldfail or session.shouldstop)
+        finally:
+            self.report = self.build_report()
+            tracemalloc.stop()
+        return True
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        # Замер итерации — до разбора фикстур ее последнего теста: на последней итерации
+        # вместе с ними разбираются фикстуры сессии, и накопленный в них рост пропал бы из замера
+        if self.checkpoint and self.checkpoint[0] is item:
+            _, iteration, start, snapshot = self.checkpoint
+            self.checkpoint = None
+            self.sample(iteration, start, snapshot)
+
+    def build_report(self):
+        measured = [sample for sample in self.samples if sample.iteration > self.warmup]
+        xs = [sample.iteration for sample in measured]
+        snapshots = [sample for sample in self.samples if sample.app_kb is not None]
+        report = {
+            "iterations": len(self.samples),
+            "warmup": self.warmup,
+            "app_kb_per_iteration": slope([sample.iteration for sample in snapshots],
+                                           [sample.app_kb for sample in snapshots]),
+            "traced_kb_per_iteration": slope(xs, [sample.traced_kb for sample in measured]),
+            "rss_kb_per_iteration": slope(xs, [sample.rss_kb for sample in measured]),
+            "fds_per_iteration": slope(xs, [sample.fds for sample in measured]),
+            "top_growth": [],
+            "samples": [asdict(sample) for sample in self.samples],
+        }
+        if self.baseline is not None and self.latest is not self.baseline:
+            stats = self.latest.compare_to(self.baseline, "traceback")
+            growing = [stat for stat in stats if stat.size_diff > 0][:self.top]
+            report["top_growth"] = [
+                {
+                    "site": " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in stat.traceback),
+                    "size_diff_kb": stat.size_diff / 1024,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in growing
+            ]
+        report["violations"] = self.violations(report)
+        return report
+
+    def violations(self, report):
+        budgets = [
+            ("app_kb_per_iteration", "--soak-budget-kb", "память Python, КБ/итерацию"),
+            ("rss_kb_per_iteration", "--soak-rss-budget-kb", "RSS, КБ/итерацию"),
+            ("fds_per_iteration", "--soak-fd-budget", "дескрипторы/итерацию"),
+        ]
+        violations = []
+        for key, option, title in budgets:
+            budget = self.config.getoption(option)
+            if budget is not None and report[key] > budget:
+                violations.append(f"рост {title}: {report[key]:.2f} > бюджета {budget}")
+        return violations
+
+    def pytest_sessionfinish(self, session):
+        if self.report is None:
+            return
+        path = self.config.getoption("--soak-report")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report, f, indent=2, ensure_ascii=False)
+        if self.report["violations"]:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter):
+        report = self.report
+        if report is None:
+            return
+        write = terminalreporter.write_line
+        terminalreporter.section("soak")
+        write(f"Итераций: {report['iterations']} (прогрев: {report['warmup']})")
+        write(f"Рост памяти Python без pytest: {report['app_kb_per_iteration']:.2f} КБ/итерацию "
+              f"(всего процесс: {report['traced_kb_per_iteration']:.2f})")
+        write(f"Рост RSS: {report['rss_kb_per_iteration']:.2f} КБ/итерацию")
+        write(f"Рост открытых дескрипторов: {report['fds_per_iteration']:.3f} /итерацию")
+        if report["top_growth"]:
+            write("Места аллокаций с наибольшим ростом:")
+            for stat in report["top_growth"]:
+                write(f"  {stat['size_diff_kb']:+10.1f} КБ {stat['count_diff']:+7d} блоков  {stat['site']}")
+        for violation in report["violations"]:
+            write(f"ПРЕВЫШЕН БЮДЖЕТ: {violation}", red=True)
@@ -0,0 +1,460 @@
+"""Локальная замена JSONPlaceholder для ресурса /users.
+
+Сервер повторяет поведение https://jsonplaceholder.typicode.com в объеме,
+который нужен тестам из tests/api, и работает целиком в памяти процесса.
+На нем можно безопасно гонять нагрузочные и fuzz-сценарии.
+
+GET /users понимает фильтры и пагинацию json-server: ?username=Bret,
+?name_like=^Leanne (регулярное выражение без учета регистра),
+?_page=2&_limit=50 с общим числом записей в заголовке X-Total-Count.
+
+Запуск вручную:
+    python -m utils.stub_server --port 8000 [--strict] [--dataset-size 1000000]
+    BASE_URL=http://127.0.0.1:8000 pytest tests/api
+"""
+
+import argparse
+import html
+import json
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from jsonschema import Draft7Validator
+
+from utils.schemas import user_payload_schema
+from utils.token_bucket import TokenBucket
+
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+# (name, username, email, city, company)
+_SEED = [
+    ("Leanne Graham", "Bret", "Sincere@april.biz", "Gwenborough", "Romaguera-Crona"),
+    ("Ervin Howell", "Antonette", "Shanna@melissa.tv", "Wisokyburgh", "Deckow-Crist"),
+    ("Clementine Bauch", "Samantha", "Nathan@yesenia.net", "McKenziehaven", "Romaguera-Jacobson"),
+    ("Patricia Lebsack", "Karianne", "Julianne.OConner@kory.org", "South Elvis", "Robel-Corkery"),
+    ("Chelsey Dietrich", "Kamren", "Lucio_Hettinger@annie.ca", "Roscoeview", "Keebler LLC"),
+    ("Mrs. Dennis Schulist", "Leopoldo_Corkery", "Karley_Dach@jasper.info", "South Christy", "Considine-Lockman"),
+    ("Kurtis Weissnat", "Elwyn.Skiles", "Telly.Hoeger@billy.biz", "Howemouth", "Johns Group"),
+    ("Nicholas Runolfsdottir V", "Maxime_Nienow", "Sherwood@rosamond.me", "Aliyaview", "Abernathy Group"),
+    ("Glenna Reichert", "Delphine", "Chaim_McDermott@dana.io", "Bartholomebury", "Yost and Sons"),
+    ("Clementina DuBuque", "Moriah.Stanton", "Rey.Padberg@karina.biz", "Lebsackbury", "Hoeger LLC"),
+]
+
+
+def make_user(user_id, name, username, email, city, company):
+    """Собирает пользователя в формате JSONPlaceholder."""
+
+    return {
+        "id": user_id,
+        "name": name,
+        "username": username,
+        "email": email,
+        "address": {
+            "street": f"Street {user_id}",
+            "suite": f"Apt. {100 + user_id}",
+            "city": city,
+            "zipcode": f"{10000 + user_id}-{1000 + user_id}",
+            "geo": {"lat": f"{-37.3159 + user_id:.4f}", "lng": f"{81.1496 - user_id:.4f}"}
+        },
+        "phone": f"1-770-736-{8000 + user_id}",
+        "website": f"{username.lower().replace('.', '').replace('_', '')}.org",
+        "company": {
+            "name": company,
+            "catchPhrase": "Multi-layered client-server neural-net",
+            "bs": "harness real-time e-markets"
+        }
+    }
+
+
+# Остальные поля пользователей JSONPlaceholder по порядку id:
+# (street, suite, zipcode, lat, lng, phone, website, catchPhrase, bs)
+_DETAILS = [
+    ("Kulas Light", "Apt. 556", "92998-3874", "-37.3159", "81.1496", "1-770-736-8031 x56442", "hildegard.org",
+     "Multi-layered client-server neural-net", "harness real-time e-markets"),
+    ("Victor Plains", "Suite 879", "90566-7771", "-43.9509", "-34.4618", "010-692-6593 x09125", "anastasia.net",
+     "Proactive didactic contingency", "synergize scalable supply-chains"),
+    ("Douglas Extension", "Suite 847", "59590-4157", "-68.6102", "-47.0653", "1-463-123-4447", "ramiro.info",
+     "Face to face bifurcated interface", "e-enable strategic applications"),
+    ("Hoeger Mall", "Apt. 692", "53919-4257", "29.4572", "-164.2990", "493-170-9623 x156", "kale.biz",
+     "Multi-tiered zero tolerance productivity", "transition cutting-edge web services"),
+    ("Skiles Walks", "Suite 351", "33263", "-31.8129", "62.5342", "(254)954-1289", "demarco.info",
+     "User-centric fault-tolerant solution", "revolutionize end-to-end systems"),
+    ("Norberto Crossing", "Apt. 950", "23505-1337", "-71.4197", "71.7478", "1-477-935-8478 x6430", "ola.org",
+     "Synchronised bottom-line interface", "e-enable innovative applications"),
+    ("Rex Trail", "Suite 280", "58804-1099", "24.8918", "21.8984", "210.067.6132", "elvis.io",
+     "Configurable multimedia task-force", "generate enterprise e-tailers"),
+    ("Ellsworth Summit", "Suite 729", "45169", "-14.3990", "-120.7677", "586.493.6943 x140", "jacynthe.com",
+     "Implemented secondary concept", "e-enable extensible e-tailers"),
+    ("Dayna Park", "Suite 449", "76495-3109", "24.6463", "-168.8889", "(775)976-6794 x41206", "conrad.com",
+     "Switchable contextually-based project", "aggregate real-time technologies"),
+    ("Kattie Turnpike", "Suite 198", "31428-2261", "-38.2386", "57.2232", "024-648-3804", "ambrose.net",
+     "Centralized empowering task-force", "target end-to-end models"),
+]
+
+
+def default_users():
+    """Возвращает свежую копию стандартного набора из 10 пользователей.
+
+    Набор полностью совпадает с /users JSONPlaceholder, поэтому снимки,
+    записанные на стенде, проверяют и настоящий API.
+    """
+
+    users = []
+    for index, seed in enumerate(_SEED):
+        user = make_user(index + 1, *seed)
+        street, suite, zipcode, lat, lng, phone, website, catch_phrase, bs = _DETAILS[index]
+        user["address"].update({"street": street, "suite": suite, "zipcode": zipcode, "geo": {"lat": lat, "lng": lng}})
+        user.update({"phone": phone, "website": website})
+        user["company"].update({"catchPhrase": catch_phrase, "bs": bs})
+        users.append(user)
+    return users
+
+
+def escape_strings(value):
+    """Рекурсивно экранирует HTML во всех строках ответа."""
+
+    if isinstance(value, str):
+        return html.escape(value)
+    if isinstance(value, dict):
+        return {key: escape_strings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [escape_strings(item) for item in value]
+    return value
+
+
+class UsersStore:
+    """Потокобезопасное хранилище пользователей в памяти."""
+
+    def __init__(self, users=None):
+        self.lock = threading.Lock()
+        self.users = {user["id"]: user for user in (users if users is not None else default_users())}
+        # Как и в JSONPlaceholder, созданный пользователь всегда получает id = 11
+        self.created_id = len(self.users) + 1
+
+    def get(self, user_id):
+        with self.lock:
+            return self.users.get(user_id)
+
+    def query(self, params):
+        return self.search(params)[0]
+
+    def search(self, params, offset=0, limit=None):
+        """Возвращает (пользователи страницы, всего найдено)."""
+
+        with self.lock:
+            users = list(self.users.values())
+        if params:
+            users = list(filter(compile_filters(params), users))
+        return users[offset:None if limit is None else offset + limit], len(users)
+
+
+def lookup(user, key):
+    """Значение вложенного поля по пути через точку ("address.city")."""
+
+    value = user
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def compile_filters(params):
+    """Предикат для фильтров json-server: равенство и field_like (регулярное выражение)."""
+
+    checks = []
+    for key, values in params.items():
+        if key.endswith("_like"):
+            patterns = [re.compile(value, re.IGNORECASE) for value in values]
+            checks.append(lambda user, k=key[:-5], p=patterns: any(
+                pattern.search(str(lookup(user, k))) for pattern in p))
+        else:
+            checks.append(lambda user, k=key, v=set(values): str(lookup(user, k)) in v)
+    return lambda user: all(check(user) for check in checks)
+
+
+def page_bounds(params):
+    """Извлекает _page, _limit и _start из параметров; возвращает (offset, limit) или None без пагинации.
+
+    Как в json-server: _page нумеруется с 1, без _limit страница — 10 записей.
+    """
+
+    page = params.pop("_page", None)
+    limit = params.pop("_limit", None)
+    start = params.pop("_start", None)
+    if page is None and limit is None and start is None:
+        return None
+    limit = int(limit[0]) if limit else (10 if page else None)
+    if page:
+        return max(int(page[0]) - 1, 0) * (limit or 0), limit
+    return int(start[0]) if start else 0, limit
+
+
+class TokenIssuer:
+    """Выдает короткоживущие bearer-токены и проверяет их; считает вызовы /login."""
+
+    def __init__(self, users=None, ttl=300, clock=time.time):
+        self.users = users or {"tester": "secret"}
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.login_calls = 0
+
+    def login(self, payload):
+        """Возвращает (status, payload) ответа на POST /login."""
+
+        with self.lock:
+            self.login_calls += 1
+        if self.users.get(payload.get("username")) != payload.get("password"):
+            return 401, {"error": "Неверные учетные данные"}
+        # Клиент может попросить более короткий срок жизни, но не длиннее ttl сервера
+        try:
+            ttl = min(float(payload.get("expires_in") or self.ttl), self.ttl)
+        except (TypeError, ValueError):
+            return 400, {"error": "expires_in должен быть числом"}
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.tokens[token] = self.clock() + ttl
+        return 200, {"token": token, "token_type": "Bearer", "expires_in": ttl}
+
+    def check(self, authorization):
+        """Возвращает текст ошибки для заголовка Authorization или None, если токен действителен."""
+
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme != "Bearer" or not token:
+            return "Требуется заголовок Authorization: Bearer <token>"
+        with self.lock:
+            expires_at = self.tokens.get(token)
+        if expires_at is None:
+            return "Недействительный токен"
+        if expires_at <= self.clock():
+            return "Срок действия токена истек"
+        return None
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к /users."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "StubServer/1.0"
+    # Заголовки и тело уходят разными записями: без TCP_NODELAY каждый ответ ждет delayed ACK
+    disable_nagle_algorithm = True
+    user_path = re.compile(r"^/users/(\d+)$")
+
+    def log_message(self, format, *args):
+        # Не засоряем вывод pytest логами каждого запроса
+        pass
+
+    def send_json(self, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not raw:
+            return {}
+        return json.loads(raw.decode("utf-8"))
+
+    def user_id(self, path):
+        match = self.user_path.match(path)
+        return int(match.group(1)) if match else None
+
+    def route(self, method):
+        """Возвращает (status, payload[, headers]) для запроса или None, если путь неизвестен."""
+
+        url = urlsplit(self.path)
+        store = self.server.store
+
+        auth = self.server.auth
+        if auth is not None:
+            if method == "POST" and url.path == "/login":
+                try:
+                    payload = self.read_json()
+                except ValueError:
+                    return 400, {"error": "Тело запроса не является корректным JSON"}
+                return auth.login(payload if isinstance(payload, dict) else {})
+            error = auth.check(self.headers.get("Authorization"))
+            if error:
+                return 401, {"error": error}
+
+        if method == "GET" and url.path == "/users":
+            params = parse_qs(url.query)
+            try:
+                bounds = page_bounds(params)
+            except ValueError:
+                return 400, {"error": "_page, _limit и _start должны быть целыми числами"}
+            try:
+                if bounds is None:
+                    return 200, store.query(params)
+                users, total = store.search(params, *bounds)
+            except re.error as e:
+                return 400, {"error": f"Некорректное регулярное выражение: {e}"}
+            return 200, users, {"X-Total-Count": str(total)}
+
+        user_id = self.user_id(url.path)
+        if method == "GET" and user_id is not None:
+            user = store.get(user_id)
+            return (200, user) if user else (404, {})
+        if method == "DELETE" and user_id is not None:
+            return 200, {}
+
+        if method in ("POST", "PUT") and (url.path == "/users" or user_id is not None):
+            try:
+                payload = self.read_json()
+            except ValueError:
+                return 400, {"error": "Тело запроса не является корректным JSON"}
+            if not isinstance(payload, dict):
+                return 400, {"error": "Ожидается JSON-объект"}
+            if self.server.strict:
+                errors = sorted(self.server.validator.iter_errors(payload), key=lambda e: [str(part) for part in e.path])
+                if errors:
+                    # Сообщение jsonschema содержит присланное значение — его тоже экранируем
+                    return 400, {"error": html.escape(errors[0].message[:200])}
+                payload = escape_strings(payload)
+            if method == "POST" and url.path == "/users":
+                return 201, {**payload, "id": store.created_id}
+            if method == "PUT" and user_id is not None:
+                if store.get(user_id) is None:
+                    return 500, {"error": f"Cannot read properties of undefined (id {user_id})"}
+                return 200, {**payload, "id": user_id}
+        return None
+
+    def rate_limited(self):
+        limiter = self.server.limiter
+        if limiter is None:
+            return False
+        with self.server.limiter_lock:
+            if limiter.try_take(time.monotonic()):
+                return False
+            self.server.rejected += 1
+        return True
+
+    def handle_method(self, method):
+        if self.rate_limited():
+            self.send_json(429, {"error": "Too Many Requests"}, {"Retry-After": "1"})
+            return
+        try:
+            result = self.route(method)
+        except Exception as e:
+            # Ошибка обработчика — это баг стенда, о котором fuzz-тест должен узнать
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        if result is None:
+            self.send_json(404, {})
+        else:
+            self.send_json(*result)
+
+    def do_GET(self):
+        self.handle_method("GET")
+
+    def do_POST(self):
+        self.handle_method("POST")
+
+    def do_PUT(self):
+        self.handle_method("PUT")
+
+    def do_DELETE(self):
+        self.handle_method("DELETE")
+
+
+class StubServer:
+    """Локальный HTTP-сервер, запускаемый в фоновом потоке.
+
+    strict=True включает валидацию тел POST/PUT (ответ 400 с полем error)
+    и HTML-экранирование строк в ответах, как в защищенном боевом API.
+    rate_limit (запросов в секунду) и rate_burst включают ограничение
+    частоты запросов с ответом 429, как у боевого бэкенда.
+    auth_ttl включает аутентификацию: POST /login выдает токены со сроком
+    жизни auth_ttl секунд, остальные запросы без действующего токена
+    получают 401.
+    dataset_size заменяет стандартных пользователей синтетическим набором
+    такого размера с индексами (см. utils.dataset).
+    """
+
+    handler_class = StubRequestHandler
+
+    def __init__(self, host="127.0.0.1", port=0, strict=False, users=None,
+                 rate_limit=None, rate_burst=1, auth_ttl=None, auth_users=None, dataset_size=None):
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.strict = strict
+        self.httpd.limiter = TokenBucket(rate_limit, rate_burst) if rate_limit else None
+        self.httpd.limiter_lock = threading.Lock()
+        self.httpd.rejected = 0
+        self.httpd.auth = TokenIssuer(auth_users, auth_ttl) if auth_ttl else None
+        self.httpd.validator = Draft7Validator(user_payload_schema())
+        if dataset_size:
+            # utils.dataset сам импортирует этот модуль, поэтому импорт здесь
+            from utils.dataset import SyntheticUsers
+
+            self.httpd.store = SyntheticUsers(dataset_size)
+        else:
+            self.httpd.store = UsersStore(users)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def store(self):
+        return self.httpd.store
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальная замена JSONPlaceholder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--strict", action="store_true", help="Валидировать тела POST/PUT")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Лимит запросов в секунду (429)")
+    parser.add_argument("--rate-burst", type=float, default=1)
+    parser.add_argument("--auth-ttl", type=float, default=None,
+                        help="Требовать bearer-токен; срок жизни токенов /login в секундах")
+    parser.add_argument("--dataset-size", type=int, default=None,
+                        help="Синтетический набор из N пользователей с индексами вместо стандартных 10")
+    args = parser.parse_args(argv)
+
+    server = StubServer(args.host, args.port, strict=args.strict,
+                        rate_limit=args.rate_limit, rate_burst=args.rate_burst,
+                        auth_ttl=args.auth_ttl, dataset_size=args.dataset_size)
+    print(f"Stub server: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
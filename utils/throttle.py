@@ -0,0 +1,232 @@
+"""Общий для всех процессов хоста клиентский троттлинг запросов к API.
+
+Бюджет задается алгоритмом token bucket: rate запросов в секунду и
+burst — сколько запросов можно отправить подряд без ожидания. Состояние
+ведер хранится в локальном файле под блокировкой fcntl.flock, поэтому
+все воркеры pytest на одной машине делят один бюджет без внешних сервисов.
+
+Запрос сначала резервирует токен (уровень ведра может уйти в минус),
+а ждет уже после снятия блокировки: очередь честная и без активного
+ожидания. Кроме общего бюджета можно задать бюджеты отдельных эндпоинтов.
+
+    pytest tests/api --throttle-rps=40 --throttle-burst=5 \\
+        --throttle-endpoint="GET /users/*=10:2"
+
+Бюджет стоит задавать немного ниже лимита сервера, а burst — меньше
+серверного: задержки сети смещают моменты прихода запросов.
+"""
+
+import fcntl
+import fnmatch
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import pytest
+
+from utils import http_hooks
+from utils.token_bucket import TokenBucket
+
+GLOBAL_BUCKET = "*"
+
+
+@dataclass
+class EndpointRule:
+    """Бюджет для запросов, совпадающих с методом и glob-шаблоном пути."""
+
+    method: str
+    pattern: str
+    rate: float
+    burst: float
+
+    @property
+    def key(self):
+        return f"{self.method} {self.pattern}"
+
+    def matches(self, method, path):
+        return self.method in ("*", method) and fnmatch.fnmatchcase(path, self.pattern)
+
+    @classmethod
+    def parse(cls, spec):
+        """Разбирает строку вида "GET /users/*=10:2" (burst необязателен)."""
+
+        target, _, budget = spec.rpartition("=")
+        method, _, pattern = target.strip().partition(" ")
+        rate, _, burst = budget.partition(":")
+        if not pattern or not rate:
+            raise ValueError(f"Ожидается 'METHOD /path/*=rate[:burst]', получено: {spec!r}")
+        return cls(method.upper(), pattern.strip(), float(rate), float(burst or 1))
+
+
+@dataclass
+class ThrottleStats:
+    requests: int = 0
+    delayed: int = 0
+    waited: float = 0.0
+    max_wait: float = 0.0
+    penalties: int = 0
+
+
+class SharedThrottle:
+    """Token bucket, состояние которого разделяют все процессы через файл."""
+
+    def __init__(self, rate=None, burst=1, rules=(), state_path=None, clock=time.time, sleep=time.sleep):
+        self.buckets = {}
+        if rate:
+            self.buckets[GLOBAL_BUCKET] = (rate, burst)
+        self.rules = list(rules)
+        for rule in self.rules:
+            self.buckets[rule.key] = (rule.rate, rule.burst)
+        # Имя с uid: файл в общем /tmp не должен достаться другому пользователю агента
+        self.state_path = state_path or os.path.join(tempfile.gettempdir(), f"qa-throttle-{os.getuid()}.json")
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = ThrottleStats()
+        self.stats_lock = threading.Lock()
+        self.thread_lock = threading.Lock()
+
+    def keys_for(self, method, path):
+        keys = [GLOBAL_BUCKET] if GLOBAL_BUCKET in self.buckets else []
+        keys += [rule.key for rule in self.rules if rule.matches(method, path)]
+        return keys
+
+    def open_state(self):
+        """Открывает файл состояния, доступный только владельцу: чужой файл мог бы менять бюджет."""
+
+        fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            stat = os.fstat(fd)
+            if stat.st_uid != os.getuid():
+                raise PermissionError(f"Файл состояния троттлинга {self.state_path} принадлежит другому пользователю")
+            if stat.st_mode & 0o077:
+                os.fchmod(fd, 0o600)
+            return os.fdopen(fd, "r+", encoding="utf-8")
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def transaction(self, keys, action):
+        """Под межпроцессной блокировкой применяет action(bucket, now) к ведрам keys."""
+
+        # flock работает на уровне файлового дескриптора, потоки одного процесса
+        # дополнительно сериализуются обычной блокировкой
+        with self.thread_lock, self.open_state() as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                state = json.loads(raw) if raw else {}
+                now = self.clock()
+                results = []
+                for key in keys:
+                    rate, burst = self.buckets[key]
+                    tokens, updated = state.get(key, (None, None))
+                    bucket = TokenBucket(rate, burst, tokens, updated)
+                    results.append(action(bucket, now))
+                    state[key] = (bucket.tokens, bucket.updated)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return results
+
+    def acquire(self, method, url):
+        """Ждет, пока бюджет позволит отправить запрос; возвращает время ожидания."""
+
+        keys = self.keys_for(method, urlsplit(url).path or "/")
+        if not keys:
+            return 0.0
+        wait = max(self.transaction(keys, lambda bucket, now: bucket.reserve(now)))
+        if wait > 0:
+            self.sleep(wait)
+        with self.stats_lock:
+            self.stats.requests += 1
+            if wait > 0:
+                self.stats.delayed += 1
+                self.stats.waited += wait
+                self.stats.max_wait = max(self.stats.max_wait, wait)
+        return wait
+
+    def penalize(self, method, url, seconds):
+        """Останавливает все процессы на seconds после ответа 429 от сервера."""
+
+        keys = self.keys_for(method, urlsplit(url).path or "/")
+        if keys:
+            self.transaction(keys, lambda bucket, now: bucket.penalize(now, seconds))
+            with self.stats_lock:
+                self.stats.penalties += 1
+
+    def before_send(self, request):
+        self.acquire(request.method, request.url)
+
+    def after_send(self, request, response, elapsed):
+        if response is not None and response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("Retry-After", 1))
+            except ValueError:
+                retry_after = 1.0
+            self.penalize(request.method, request.url, retry_after)
+
+    def install(self):
+        self.handle = http_hooks.register(before=self.before_send, after=self.after_send)
+        return self
+
+    def uninstall(self):
+        http_hooks.unregister(self.handle)
+
+    def summary(self):
+        stats = self.stats
+        return (
+            f"Троттлинг: {stats.requests} запросов, задержано {stats.delayed}, "
+            f"ожидание {stats.waited:.2f} с (макс. {stats.max_wait * 1000:.0f} мс), "
+            f"ответов 429: {stats.penalties}"
+        )
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("throttle", "Клиентский троттлинг запросов к API")
+    group.addoption("--throttle-rps", type=float, default=None,
+                    help="Общий бюджет запросов в секунду для всех воркеров хоста")
+    group.addoption("--throttle-burst", type=float, default=1,
+                    help="Сколько запросов общего бюджета можно отправить подряд без ожидания")
+    group.addoption("--throttle-endpoint", action="append", default=[],
+                    help="Бюджет эндпоинта: 'GET /users/*=rate[:burst]', можно указать несколько раз")
+    group.addoption("--throttle-state", default=None,
+                    help="Файл общего состояния ведер (по умолчанию во временном каталоге)")
+
+
+def pytest_configure(config):
+    rate = config.getoption("--throttle-rps")
+    specs = config.getoption("--throttle-endpoint")
+    if not rate and not specs:
+        return
+    try:
+        rules = [EndpointRule.parse(spec) for spec in specs]
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+    throttle = SharedThrottle(rate, config.getoption("--throttle-burst"), rules,
+                              config.getoption("--throttle-state"))
+    # Недоступный файл состояния — ошибка запуска, а не каждого запроса в хуке отправки
+    try:
+        throttle.open_state().close()
+    except OSError as e:
+        raise pytest.UsageError(str(e))
+    throttle.install()
+    config.pluginmanager.register(ThrottleReporter(throttle), "throttle-reporter")
+
+
+class ThrottleReporter:
+    def __init__(self, throttle):
+        self.throttle = throttle
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.write_line(self.throttle.summary())
+
+    def pytest_unconfigure(self, config):
+        self.throttle.uninstall()
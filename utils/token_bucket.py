@@ -0,0 +1,42 @@
+"""Алгоритм token bucket для ограничения частоты запросов."""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше burst в запасе."""
+
+    rate: float
+    burst: float
+    tokens: float = None
+    updated: float = None
+
+    def refill(self, now):
+        if self.tokens is None or self.updated is None or now < self.updated:
+            self.tokens, self.updated = float(self.burst), now
+            return
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """Забирает токен в долг и возвращает, сколько секунд ждать до его появления."""
+
+        self.refill(now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def try_take(self, now):
+        """Забирает токен, только если он есть прямо сейчас."""
+
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def penalize(self, now, seconds):
+        """Опустошает ведро так, чтобы следующий токен появился не раньше чем через seconds."""
+
+        self.refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
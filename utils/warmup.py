@@ -0,0 +1,269 @@
+"""Кэш DNS и прогрев соединений до первого теста.
+
+Тесты вызывают requests.get/post/... напрямую, а каждый такой вызов
+создает новую сессию: имя хоста разрешается заново, TCP- и TLS-
+соединение устанавливается заново. Первые тесты воркера оплачивают
+холодный старт, и test_response_time измеряет не API, а рукопожатия.
+
+DnsCache кэширует результаты socket.getaddrinfo на ttl секунд.
+SharedPool подключает ко всем сессиям requests один пул соединений,
+который не закрывается вместе с сессией, и умеет заранее открыть в нем
+заданное число соединений с каждым хостом.
+
+    pytest tests/api --dns-cache-ttl=300 --prewarm-connections=4
+
+Холодный запрос для раздельного замера выполняется через cold_session():
+отдельная сессия без общего пула и с разрешением имени в обход кэша.
+"""
+
+import contextlib
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DnsCache:
+    """Кэш результатов socket.getaddrinfo с ограниченным временем жизни.
+
+    Ошибки разрешения не кэшируются. Настоящий TTL записи DNS через
+    getaddrinfo недоступен, поэтому время жизни задается явно.
+    """
+
+    def __init__(self, ttl=60.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.resolve_time = 0.0
+        self.original = None
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        if getattr(self.local, "bypass", False):
+            return self.original(host, port, family, type, proto, flags)
+        key = (host, port, family, type, proto, flags)
+        now = self.clock()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return list(entry[1])
+        start = time.perf_counter()
+        result = self.original(host, port, family, type, proto, flags)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.misses += 1
+            self.resolve_time += elapsed
+            self.entries[key] = (now + self.ttl, tuple(result))
+        return result
+
+    @contextlib.contextmanager
+    def bypass(self):
+        """В пределах блока текущий поток разрешает имена без кэша."""
+
+        previous = getattr(self.local, "bypass", False)
+        self.local.bypass = True
+        try:
+            yield
+        finally:
+            self.local.bypass = previous
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def install(self):
+        if self.original is None:
+            self.original = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        if self.original is not None:
+            socket.getaddrinfo = self.original
+            self.original = None
+
+    def summary(self):
+        return (f"DNS-кэш: попаданий {self.hits}, промахов {self.misses}, "
+                f"время разрешения {self.resolve_time * 1000:.1f} мс")
+
+
+class PersistentAdapter(HTTPAdapter):
+    """Адаптер, пул которого переживает закрытие сессии."""
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        super().close()
+
+
+class SharedPool:
+    """Общий для всех сессий requests пул соединений с прогревом.
+
+    Пул рассчитан на последовательные вызовы тестов. Клиенты с
+    собственной параллельностью (FuzzEngine, iter_pages) монтируют в
+    свои сессии отдельные адаптеры нужного размера.
+    """
+
+    def __init__(self, maxsize=10):
+        self.adapter = PersistentAdapter(pool_maxsize=maxsize)
+        self.original_init = None
+        self.warmed = {}
+
+    def install(self):
+        if self.original_init is not None:
+            return
+        original_init = self.original_init = requests.Session.__init__
+        adapter = self.adapter
+
+        def init(session, *args, **kwargs):
+            original_init(session, *args, **kwargs)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+        requests.Session.__init__ = init
+
+    def uninstall(self):
+        if self.original_init is not None:
+            requests.Session.__init__ = self.original_init
+            self.original_init = None
+        self.adapter.shutdown()
+
+    def prewarm(self, url, connections, timeout=10):
+        """Открывает в пуле connections соединений с хостом url.
+
+        Запросы выполняются одновременно и удерживают соединения, пока не
+        стартуют все: иначе быстрые ответы переиспользовали бы одно соединение.
+        Возвращает время прогрева в секундах.
+        """
+
+        barrier = threading.Barrier(connections)
+        errors = []
+
+        def open_connection():
+            session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            try:
+                response = session.get(url, stream=True, timeout=timeout)
+                try:
+                    barrier.wait(timeout)
+                finally:
+                    # Дочитанное тело возвращает соединение в пул
+                    response.content
+            except (requests.RequestException, threading.BrokenBarrierError) as error:
+                barrier.abort()
+                errors.append(error)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=open_connection) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        host = urlsplit(url).netloc
+        self.warmed[host] = (connections - len(errors), elapsed)
+        if errors:
+            raise errors[0]
+        return elapsed
+
+    def summary(self):
+        return ", ".join(
+            f"{host}: {opened} соединений за {elapsed * 1000:.0f} мс" for host, (opened, elapsed) in self.warmed.items()
+        )
+
+
+# Кэш DNS текущей сессии; None, если плагин его не включил
+dns_cache = None
+
+
+@contextlib.contextmanager
+def cold_session():
+    """Сессия для замера холодного запроса: новое соединение и разрешение имени без кэша."""
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter())
+    session.mount("http://", HTTPAdapter())
+    bypass = dns_cache.bypass() if dns_cache else contextlib.nullcontext()
+    try:
+        with bypass:
+            yield session
+    finally:
+        session.close()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("warmup", "Кэш DNS и прогрев соединений")
+    group.addoption("--dns-cache-ttl", type=float, default=0.0,
+                    help="Кэшировать разрешение имен на заданное число секунд (0 — выключено)")
+    group.addoption("--shared-pool", action="store_true", default=False,
+                    help="Общий пул соединений для всех вызовов requests")
+    group.addoption("--prewarm-connections", type=int, default=0,
+                    help="Сколько соединений открыть с каждым хостом до первого теста (включает общий пул)")
+    group.addoption("--prewarm-url", action="append", default=[],
+                    help="URL для прогрева (по умолчанию BASE_URL)")
+
+
+def pytest_configure(config):
+    ttl = config.getoption("--dns-cache-ttl")
+    connections = config.getoption("--prewarm-connections")
+    if ttl > 0 or connections > 0 or config.getoption("--shared-pool"):
+        config.pluginmanager.register(NetworkWarmup(config), "network-warmup")
+
+
+class NetworkWarmup:
+    """Включает кэш DNS и общий пул на время сессии и прогревает соединения."""
+
+    def __init__(self, config):
+        self.config = config
+        self.connections = config.getoption("--prewarm-connections")
+        ttl = config.getoption("--dns-cache-ttl")
+        self.dns_cache = DnsCache(ttl) if ttl > 0 else None
+        shared = self.connections > 0 or config.getoption("--shared-pool")
+        self.pool = SharedPool(maxsize=max(10, self.connections)) if shared else None
+        self.error = None
+
+    def urls(self):
+        urls = self.config.getoption("--prewarm-url")
+        if not urls and os.environ.get("BASE_URL"):
+            urls = [os.environ["BASE_URL"]]
+        return urls or ["https://jsonplaceholder.typicode.com"]
+
+    def pytest_sessionstart(self, session):
+        global dns_cache
+        if self.dns_cache:
+            self.dns_cache.install()
+            dns_cache = self.dns_cache
+        if self.pool:
+            self.pool.install()
+            if self.connections > 0:
+                for url in self.urls():
+                    try:
+                        self.pool.prewarm(url, self.connections)
+                    except (requests.RequestException, threading.BrokenBarrierError) as error:
+                        # Прогрев — оптимизация: недоступный хост проявится в самих тестах
+                        self.error = f"{url}: {error}"
+
+    def pytest_sessionfinish(self, session):
+        global dns_cache
+        if self.pool:
+            self.pool.uninstall()
+        if self.dns_cache:
+            self.dns_cache.uninstall()
+            dns_cache = None
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.dns_cache:
+            terminalreporter.write_line(self.dns_cache.summary())
+        if self.pool and self.pool.warmed:
+            terminalreporter.write_line(f"Прогрев соединений: {self.pool.summary()}")
+        if self.error:
+            terminalreporter.write_line(f"Прогрев не удался: {self.error}", yellow=True)